@@ -11,4 +11,6 @@ class UserCreateSerializer(UserCreateSerializer):
 class UserSerializer(UserSerializer):
     class Meta(UserSerializer.Meta):
         model = User
-        fields = ('id', 'email', 'first_name', 'last_name', 'is_active', 'date_joined')
\ No newline at end of file
+        fields = ('id', 'email', 'first_name', 'last_name', 'is_active', 'date_joined', 'is_staff')
+        # El frontend lo usa para no pedir los agregados del gimnasio, reservados al personal
+        read_only_fields = (*UserSerializer.Meta.read_only_fields, 'is_staff')
\ No newline at end of file
@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Socio
+
+# El LRU local evita ir a la caché en cada paso por el torniquete; su TTL corto
+# acota cuánto tarda en verse una invalidación hecha en otro proceso, siempre
+# que CACHE_URL apunte a una caché compartida (con LocMem no llega a los demás).
+LOCAL_TTL = getattr(settings, 'ACCESS_LOCAL_TTL', 30)
+LOCAL_SIZE = getattr(settings, 'ACCESS_LOCAL_SIZE', 10000)
+CACHE_TIMEOUT = getattr(settings, 'ACCESS_CACHE_TIMEOUT', 60 * 60)
+
+
+class LocalLRU:
+    """LRU en memoria con caducidad por entrada, seguro entre hilos"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local = LocalLRU(LOCAL_SIZE, LOCAL_TTL)
+
+
+def access_cache_key(socio_id):
+    return f'core:acceso:{socio_id}'
+
+
+def load_access_record(socio_id):
+    """Registro de acceso calculado en la base de datos (una consulta)"""
+    return (
+        Socio.objects.con_vigencia()
+        .filter(pk=socio_id)
+        .values('socio_id', 'user_id', 'suspendido', 'vigente_hasta', membresia_tipo=F('membresia__tipo'))
+        .first()
+    )
+
+
+def get_access_record(socio_id):
+    """Registro de acceso desde el LRU local, la caché compartida o la base de datos"""
+    record = _local.get(socio_id)
+    if record is not None:
+        return record
+
+    key = access_cache_key(socio_id)
+    record = cache.get(key)
+    if record is None:
+        record = load_access_record(socio_id)
+        if record is None:
+            return None
+        cache.set(key, record, CACHE_TIMEOUT)
+    _local.set(socio_id, record)
+    return record
+
+
+def invalidate_access(socio_id):
+    """Descarta el registro del socio cuando se confirma la transacción"""
+    invalidate_access_many([socio_id])
+
+
+def invalidate_access_many(socio_ids):
+    """
+    Descarta los registros de varios socios al confirmarse la transacción.
+    Se llama desde las señales de Pago, Socio y Membresia (apps/core/signals.py);
+    las escrituras que no envían señales (QuerySet.update, bulk_create sobre
+    filas existentes) deben llamarla a mano.
+    """
+    socio_ids = list(socio_ids)
+    if not socio_ids:
+        return
+
+    def apply():
+        for socio_id in socio_ids:
+            _local.delete(socio_id)
+        cache.delete_many([access_cache_key(socio_id) for socio_id in socio_ids])
+
+    transaction.on_commit(apply)
+
+
+def check_access(record, now=None):
+    """Decide si el registro permite entrar ahora; devuelve (acceso, motivo)"""
+    now = now or timezone.now()
+    if record['suspendido']:
+        return False, 'suspendido'
+    if record['vigente_hasta'] is None:
+        return False, 'sin_pago'
+    if record['vigente_hasta'] < now:
+        return False, 'vencida'
+    return True, None
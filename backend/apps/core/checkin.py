@@ -0,0 +1,120 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import Asistencia
+
+logger = logging.getLogger(__name__)
+
+# Ventana en segundos para juntar entradas en un mismo INSERT; 0 escribe cada una al llegar.
+# Solo conviene con workers con hilos o ASGI: con workers síncronos no hay nada que
+# juntar y cada entrada esperaría la ventana y el paso al hilo del buffer
+BATCH_WINDOW = getattr(settings, 'CHECKIN_BATCH_WINDOW', 0)
+BATCH_SIZE = getattr(settings, 'CHECKIN_BATCH_SIZE', 200)
+RESULT_TIMEOUT = getattr(settings, 'CHECKIN_RESULT_TIMEOUT', 5)
+
+
+class WriteBuffer:
+    """
+    Agrupa las entradas que llegan casi a la vez en micro-lotes escritos con
+    bulk_create desde un hilo propio. Cada petición espera el futuro de su
+    fila, así que solo responde cuando la entrada ya está guardada.
+    """
+
+    def __init__(self, model, window, size):
+        self.model = model
+        self.window = window
+        self.size = size
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='checkin-buffer', daemon=True)
+                self._thread.start()
+
+    def submit(self, obj):
+        future = Future()
+        self._ensure_started()
+        self._queue.put((obj, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            close_old_connections()
+            self._escribir(batch)
+
+    def _escribir(self, batch):
+        # Las entradas cuya petición ya dejó de esperar se descartan sin escribirse
+        batch = [(obj, future) for obj, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            with transaction.atomic():
+                created = self.model.objects.bulk_create([obj for obj, _ in batch])
+        except Exception as exc:
+            if len(batch) == 1:
+                batch[0][1].set_exception(exc)
+                return
+            # Una fila inválida (p. ej. una segunda visita abierta) no tumba al resto del lote
+            logger.warning('Lote de %s entradas rechazado (%s); se escriben una a una', len(batch), exc)
+            for obj, future in batch:
+                self._escribir_fila(obj, future)
+        else:
+            for obj, (_, future) in zip(created, batch):
+                future.set_result(obj)
+
+    def _escribir_fila(self, obj, future):
+        try:
+            with transaction.atomic():
+                obj.save(force_insert=True)
+        except Exception as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(obj)
+
+
+_buffer = WriteBuffer(Asistencia, BATCH_WINDOW, BATCH_SIZE)
+
+
+def registrar_entrada(socio_id):
+    """
+    Crea la asistencia del socio y la devuelve una vez guardada. Lanza
+    IntegrityError si el socio ya tiene una visita abierta y TimeoutError si
+    el lote no llegó a escribirse a tiempo; en ese caso la fila no se escribe.
+    """
+    asistencia = Asistencia(socio_id=socio_id)
+    if not BATCH_WINDOW:
+        with transaction.atomic():
+            asistencia.save()
+        return asistencia
+
+    future = _buffer.submit(asistencia)
+    try:
+        return future.result(timeout=RESULT_TIMEOUT)
+    except FutureTimeoutError:
+        if future.cancel():
+            raise
+    # El hilo ya tomó la fila: se espera a que termine de escribirla
+    return future.result()
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+CACHES_LOCALES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(deploy=True)
+def check_cache_compartida(app_configs, **kwargs):
+    """Los contadores y las invalidaciones en caché necesitan una caché común a todos los procesos"""
+    if settings.CACHES['default']['BACKEND'] in CACHES_LOCALES:
+        return [Warning(
+            'La caché por defecto es local a cada proceso.',
+            hint='Configura CACHE_URL con una caché compartida (p. ej. redis://host:6379/1); si no, '
+                 'los contadores de no leídas, la ocupación y el acceso se desincronizan entre procesos.',
+            id='core.W001',
+        )]
+    return []
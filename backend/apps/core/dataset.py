@@ -0,0 +1,340 @@
+import math
+import random
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import (
+    DIAS_POR_MES, Asistencia, Clase, Entrenador, Equipo, Membresia, Pago, Socio, SocioClase, normalizar
+)
+
+DIAS_HISTORIA = 365
+BATCH_SIZE = 5000
+
+# tipo, descripción, precio mensual, meses, peso en la mezcla de socios
+MEMBRESIAS = [
+    ('Básica', 'Acceso al gimnasio y área de pesas.', Decimal('599.00'), 1, 45),
+    ('Premium', 'Acceso completo al gimnasio, clases grupales y área de cardio.', Decimal('899.00'), 1, 25),
+    ('VIP', 'Acceso completo + entrenamientos personales + nutricionista.', Decimal('1299.00'), 1, 8),
+    ('Anual Básica', 'Membresía básica con descuento por pago anual.', Decimal('499.00'), 12, 14),
+    ('Anual Premium', 'Membresía premium con descuento por pago anual.', Decimal('749.00'), 12, 8),
+]
+
+# Probabilidad de baja en cada renovación según la duración de la membresía
+BAJA_POR_RENOVACION = {1: 0.07, 12: 0.35}
+
+NOMBRES = [
+    'Juan', 'María', 'Carlos', 'Ana', 'Luis', 'Carmen', 'Roberto', 'Patricia', 'Diego', 'Laura', 'Fernando',
+    'Sofía', 'Andrés', 'Valeria', 'Javier', 'Gabriela', 'Ricardo', 'Mónica', 'Alejandro', 'Isabella', 'José',
+    'Lucía', 'Miguel', 'Elena', 'Raúl', 'Natalia', 'Óscar', 'Paula', 'Iñigo', 'Begoña',
+]
+APELLIDOS = [
+    'Pérez', 'García', 'Ruiz', 'López', 'Martín', 'Sánchez', 'Torres', 'Morales', 'Vega', 'Silva', 'Castro',
+    'Herrera', 'Jiménez', 'Romero', 'Mendoza', 'Flores', 'Vargas', 'Reyes', 'Cruz', 'Ramírez', 'Núñez',
+    'Muñoz', 'Díaz', 'Gómez', 'Hernández', 'Ortiz', 'Álvarez', 'Castillo', 'Ibáñez', 'Peña',
+]
+DOMINIOS = ['email.com', 'correo.com', 'gmail.com', 'hotmail.com', 'outlook.com']
+METODOS = (['tarjeta', 'efectivo', 'transferencia'], [55, 25, 20])
+
+# Entradas por hora local (picos antes del trabajo y por la tarde) y por día de la semana
+PESO_HORA = {6: 6, 7: 9, 8: 8, 9: 5, 10: 4, 11: 3, 12: 4, 13: 4, 14: 3, 15: 3, 16: 5, 17: 8, 18: 10, 19: 10,
+             20: 7, 21: 4, 22: 2}
+PESO_DIA = [1.15, 1.1, 1.05, 1.0, 0.85, 0.6, 0.35]
+
+# Clases de cada día: nombre, especialidad, capacidad, hora
+CLASES = [
+    ('CrossFit Matutino', 'CrossFit', 15, 6), ('Yoga Relajante', 'Yoga', 20, 7),
+    ('Spinning Intenso', 'Spinning', 25, 8), ('Pilates Core', 'Pilates', 18, 9),
+    ('Funcional HIIT', 'Funcional', 20, 10), ('Zumba Fitness', 'Zumba', 30, 17),
+    ('Natación Libre', 'Natación', 12, 18), ('Aeróbicos Vespertino', 'Aeróbicos', 25, 19),
+    ('CrossFit Nocturno', 'CrossFit', 15, 20), ('Yoga Nocturno', 'Yoga', 20, 21),
+]
+DIAS_CLASES_PASADAS = 28
+DIAS_CLASES_FUTURAS = 14
+
+EQUIPOS = ['Cinta de Correr', 'Bicicleta Estática', 'Máquina de Remo', 'Banco de Pesas', 'Rack de Sentadillas',
+           'Máquina Elíptica', 'Set de Mancuernas', 'Máquina de Poleas', 'Prensa de Piernas', 'Barra Olímpica']
+ESTADOS_EQUIPO = (['disponible', 'mantenimiento', 'reparacion', 'baja'], [80, 10, 7, 3])
+
+
+class Cargador:
+    """
+    Acumula filas (tuplas en el orden de `campos`) y las escribe por lotes:
+    con COPY en PostgreSQL (psycopg 3) y con bulk_create en el resto.
+    """
+
+    def __init__(self, model, campos, batch_size=BATCH_SIZE):
+        self.model = model
+        self.campos = campos
+        self.batch_size = batch_size
+        self.filas = []
+        self.total = 0
+
+    def agregar(self, fila):
+        self.filas.append(fila)
+        if len(self.filas) >= self.batch_size:
+            self.vaciar()
+
+    def vaciar(self):
+        if not self.filas:
+            return
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql' and hasattr(cursor.cursor, 'copy'):
+                self._copy(cursor.cursor)
+            else:
+                self.model.objects.bulk_create([self.model(**dict(zip(self.campos, fila))) for fila in self.filas])
+        self.total += len(self.filas)
+        self.filas = []
+
+    def _copy(self, cursor):
+        quote = connection.ops.quote_name
+        columnas = ', '.join(quote(self.model._meta.get_field(campo).column) for campo in self.campos)
+        with cursor.copy(f'COPY {quote(self.model._meta.db_table)} ({columnas}) FROM STDIN') as copy:
+            for fila in self.filas:
+                copy.write_row(fila)
+
+
+@contextmanager
+def fechas_explicitas(*models):
+    """Desactiva auto_now/auto_now_add para que bulk_create respete las fechas generadas"""
+    campos = [
+        (field, field.auto_now, field.auto_now_add)
+        for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    for field, _, _ in campos:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in campos:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def siguiente_id(model):
+    return (model.objects.aggregate(ultimo=Max(model._meta.pk.attname))['ultimo'] or 0) + 1
+
+
+def poisson(rng, media):
+    if media <= 0:
+        return 0
+    if media > 30:
+        return max(0, round(rng.gauss(media, math.sqrt(media))))
+    limite, k, p = math.exp(-media), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limite:
+            return k
+        k += 1
+
+
+class GeneradorDataset:
+    """
+    Genera un gimnasio sintético y determinista para `escala` socios.
+
+    Todas las fechas se calculan respecto a `hasta` (por defecto hoy a las
+    19:00), así que la misma semilla y la misma fecha producen los mismos
+    datos. Los contadores derivados (`Clase.inscritos`, columnas normalizadas
+    de Socio) se escriben coherentes con las filas generadas.
+    """
+
+    def __init__(self, escala, seed=0, hasta=None, batch_size=BATCH_SIZE):
+        self.escala = escala
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        fecha = hasta or timezone.localdate()
+        self.hasta = timezone.make_aware(datetime.combine(fecha, time(19, 0)))
+        self.resumen = {}
+
+    def cargador(self, model, campos):
+        return Cargador(model, campos, self.batch_size)
+
+    def generar(self):
+        models = [Membresia, Entrenador, Socio, Pago, Asistencia, Clase, SocioClase, Equipo]
+        with transaction.atomic(), fechas_explicitas(*models):
+            membresias = self.generar_membresias()
+            entrenadores = self.generar_entrenadores()
+            socios = self.generar_socios(membresias)
+            self.generar_pagos(socios, membresias)
+            self.generar_asistencias(socios)
+            self.generar_clases(socios, entrenadores)
+            self.generar_equipos()
+            # Los ids se escribieron explícitamente: las secuencias de PostgreSQL deben avanzar
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                    cursor.execute(sql)
+        return self.resumen
+
+    def generar_membresias(self):
+        membresias = []
+        for tipo, descripcion, precio, meses, peso in MEMBRESIAS:
+            membresia, _ = Membresia.objects.get_or_create(
+                tipo=tipo, defaults={'descripcion': descripcion, 'precio_mensual': precio, 'duracion_meses': meses}
+            )
+            membresias.append((membresia.pk, membresia.precio_mensual, membresia.duracion_meses, peso))
+        return membresias
+
+    def generar_entrenadores(self):
+        """Entrenadores por especialidad: {especialidad: [ids]}"""
+        rng = self.rng
+        especialidades = sorted({especialidad for _, especialidad, _, _ in CLASES})
+        por_especialidad = {especialidad: [] for especialidad in especialidades}
+        carga = self.cargador(Entrenador, ['entrenador_id', 'nombre', 'especialidad', 'telefono', 'correo'])
+        entrenador_id = siguiente_id(Entrenador)
+        for i in range(max(len(especialidades), self.salas() * 4)):
+            especialidad = especialidades[i % len(especialidades)]
+            nombre = f'{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}'
+            correo = f"{normalizar(nombre).replace(' ', '.')}.{entrenador_id}@gimnasio.com"
+            carga.agregar((entrenador_id, nombre, especialidad, f'555-{rng.randrange(10 ** 7):07d}', correo))
+            por_especialidad[especialidad].append(entrenador_id)
+            entrenador_id += 1
+        carga.vaciar()
+        self.resumen['entrenadores'] = carga.total
+        return por_especialidad
+
+    def salas(self):
+        """Copias del horario diario de clases según el tamaño del gimnasio"""
+        return max(1, self.escala // 2000)
+
+    def generar_socios(self, membresias):
+        """Crea los socios y devuelve su ciclo de vida: (id, membresía, alta, baja)"""
+        rng = self.rng
+        ids_membresia = list(range(len(membresias)))
+        pesos = [peso for *_, peso in membresias]
+        carga = self.cargador(Socio, [
+            'socio_id', 'nombre', 'telefono', 'correo', 'membresia_id', 'fecha_registro', 'suspendido',
+            'nombre_normalizado', 'correo_normalizado', 'actualizado_en',
+        ])
+        socios = []
+        socio_id = siguiente_id(Socio)
+        for _ in range(self.escala):
+            # Más altas recientes que antiguas: el gimnasio crece
+            alta = self.hasta - timedelta(days=DIAS_HISTORIA * (1 - math.sqrt(rng.random())),
+                                          seconds=rng.randrange(36000))
+            indice = rng.choices(ids_membresia, pesos)[0]
+            meses = membresias[indice][2]
+            renovaciones = 1
+            while rng.random() > BAJA_POR_RENOVACION.get(meses, 0.1) and renovaciones * meses < 60:
+                renovaciones += 1
+            baja = alta + timedelta(days=renovaciones * meses * DIAS_POR_MES)
+
+            nombre = f'{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}'
+            correo = f"{normalizar(nombre).replace(' ', '.')}.{socio_id}@{rng.choice(DOMINIOS)}"
+            carga.agregar((
+                socio_id, nombre, f'555-{rng.randrange(10 ** 7):07d}', correo, membresias[indice][0], alta,
+                rng.random() < 0.01, normalizar(nombre), correo, alta,
+            ))
+            socios.append((socio_id, indice, alta, baja))
+            socio_id += 1
+        carga.vaciar()
+        self.resumen['socios'] = carga.total
+        return socios
+
+    def generar_pagos(self, socios, membresias):
+        """Un pago por periodo de la membresía mientras el socio sigue activo"""
+        rng = self.rng
+        carga = self.cargador(Pago, ['pago_id', 'socio_id', 'monto', 'fecha_pago', 'metodo'])
+        pago_id = siguiente_id(Pago)
+        for socio_id, indice, alta, baja in socios:
+            _, precio, meses, _ = membresias[indice]
+            periodo = timedelta(days=meses * DIAS_POR_MES)
+            fecha, fin = alta, min(baja, self.hasta)
+            while fecha < fin:
+                monto = precio * meses
+                if rng.random() < 0.1:
+                    monto = (monto * Decimal('0.9')).quantize(Decimal('0.01'))
+                pago = min(fecha + timedelta(hours=rng.randrange(72)), self.hasta)
+                carga.agregar((pago_id, socio_id, monto, pago, rng.choices(*METODOS)[0]))
+                pago_id += 1
+                fecha += periodo
+        carga.vaciar()
+        self.resumen['pagos'] = carga.total
+
+    def generar_asistencias(self, socios):
+        """Visitas con horas pico y menos afluencia el fin de semana; las de ahora quedan abiertas"""
+        rng = self.rng
+        horas, pesos_hora = list(PESO_HORA), list(PESO_HORA.values())
+        peso_dia_max = max(PESO_DIA)
+        carga = self.cargador(Asistencia, ['asistencia_id', 'socio_id', 'fecha_entrada', 'fecha_salida'])
+        asistencia_id = siguiente_id(Asistencia)
+        zona = timezone.get_current_timezone()
+        for socio_id, _, alta, baja in socios:
+            inicio, fin = alta.date(), min(baja, self.hasta).date()
+            dias = (fin - inicio).days + 1
+            por_semana = min(max(rng.lognormvariate(0.7, 0.5), 0.3), 6)
+            visitas = []
+            for _ in range(poisson(rng, por_semana * dias / 7)):
+                dia = inicio + timedelta(days=rng.randrange(dias))
+                if rng.random() > PESO_DIA[dia.weekday()] / peso_dia_max:
+                    continue
+                hora = rng.choices(horas, pesos_hora)[0]
+                entrada = datetime.combine(dia, time(hora, rng.randrange(60)), tzinfo=zona)
+                if not alta <= entrada < self.hasta:
+                    continue
+                visitas.append(entrada)
+            visitas.sort()
+            for i, entrada in enumerate(visitas):
+                salida = entrada + timedelta(minutes=min(max(rng.gauss(75, 20), 25), 180))
+                if i + 1 < len(visitas):
+                    # Solo la última visita puede quedar abierta
+                    salida = min(salida, visitas[i + 1])
+                carga.agregar((asistencia_id, socio_id, entrada, salida if salida <= self.hasta else None))
+                asistencia_id += 1
+        carga.vaciar()
+        self.resumen['asistencias'] = carga.total
+
+    def generar_clases(self, socios, entrenadores):
+        """Horario diario de clases con ocupación mayor en horas pico e inscripciones coherentes"""
+        rng = self.rng
+        clases = self.cargador(Clase, ['clase_id', 'nombre', 'entrenador_id', 'horario', 'capacidad_max', 'inscritos'])
+        inscripciones = self.cargador(SocioClase, ['id', 'socio_id', 'clase_id', 'fecha_inscripcion'])
+        clase_id, inscripcion_id = siguiente_id(Clase), siguiente_id(SocioClase)
+        zona = timezone.get_current_timezone()
+        peso_max = max(PESO_HORA.values())
+
+        primer_dia = self.hasta.date() - timedelta(days=DIAS_CLASES_PASADAS)
+        for offset in range(DIAS_CLASES_PASADAS + DIAS_CLASES_FUTURAS + 1):
+            dia = primer_dia + timedelta(days=offset)
+            momento = datetime.combine(dia, time(12), tzinfo=zona)
+            # Solo se inscriben socios activos ese día
+            activos = [socio_id for socio_id, _, alta, baja in socios if alta <= momento < baja]
+            for _ in range(self.salas()):
+                for nombre, especialidad, capacidad, hora in CLASES:
+                    horario = datetime.combine(dia, time(hora, rng.choice([0, 30])), tzinfo=zona)
+                    ocupacion = rng.betavariate(2, 1.5) * (0.6 + 0.4 * PESO_HORA.get(hora, 1) / peso_max)
+                    alumnos = rng.sample(activos, min(len(activos), round(capacidad * min(ocupacion, 1))))
+                    clases.agregar((clase_id, nombre, rng.choice(entrenadores[especialidad]), horario, capacidad,
+                                    len(alumnos)))
+                    for socio_id in alumnos:
+                        fecha = horario - timedelta(minutes=rng.randrange(60, 7 * 24 * 60))
+                        inscripciones.agregar((inscripcion_id, socio_id, clase_id, min(fecha, self.hasta)))
+                        inscripcion_id += 1
+                    clase_id += 1
+            # Las clases del día se escriben antes que cualquier lote de sus inscripciones
+            clases.vaciar()
+        inscripciones.vaciar()
+        self.resumen['clases'] = clases.total
+        self.resumen['inscripciones'] = inscripciones.total
+
+    def generar_equipos(self):
+        rng = self.rng
+        carga = self.cargador(Equipo, [
+            'equipo_id', 'nombre', 'descripcion', 'fecha_adquisicion', 'estado', 'ultima_mantenimiento',
+        ])
+        equipo_id = siguiente_id(Equipo)
+        hoy = self.hasta.date()
+        for i in range(max(len(EQUIPOS), self.escala // 100)):
+            adquisicion = hoy - timedelta(days=rng.randrange(30, 1500))
+            mantenimiento = None
+            if rng.random() < 0.7:
+                mantenimiento = min(adquisicion + timedelta(days=rng.randrange(30, 365)), hoy)
+            carga.agregar((equipo_id, f'{EQUIPOS[i % len(EQUIPOS)]} #{i // len(EQUIPOS) + 1}', '', adquisicion,
+                           rng.choices(*ESTADOS_EQUIPO)[0], mantenimiento))
+            equipo_id += 1
+        carga.vaciar()
+        self.resumen['equipos'] = carga.total
@@ -0,0 +1,186 @@
+import csv
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.negotiation import DefaultContentNegotiation
+
+CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+FORMATOS = ('csv', 'xlsx')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Una celda que empieza así se evalúa como fórmula al abrirla en Excel o LibreOffice
+INICIO_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+# Caracteres de control que no admite XML 1.0
+_CONTROL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class ExportNegotiation(DefaultContentNegotiation):
+    """
+    Ignora `?format=`: en las exportaciones indica el tipo de archivo y no el
+    renderer de DRF, que respondería 404 a `csv` o `xlsx`.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+def valor(dato):
+    """Convierte un valor de la base de datos a texto para el archivo"""
+    if dato is None:
+        return ''
+    if isinstance(dato, datetime):
+        return timezone.localtime(dato).strftime('%Y-%m-%d %H:%M:%S') if timezone.is_aware(dato) else dato.isoformat(' ')
+    if isinstance(dato, date):
+        return dato.isoformat()
+    if isinstance(dato, bool):
+        return 'Sí' if dato else 'No'
+    if isinstance(dato, str) and dato.startswith(INICIO_FORMULA):
+        # El apóstrofo hace que la hoja de cálculo lo trate como texto
+        return "'" + dato
+    return str(dato)
+
+
+def filas(queryset, campos):
+    """Recorre el queryset por bloques leyendo solo las columnas exportadas"""
+    return queryset.values_list(*campos).iterator(chunk_size=CHUNK_SIZE)
+
+
+class Echo:
+    """Pseudo-buffer: csv.writer devuelve lo escrito en lugar de guardarlo"""
+
+    def write(self, value):
+        return value
+
+
+def csv_stream(encabezados, datos):
+    writer = csv.writer(Echo())
+    # BOM para que Excel abra el archivo como UTF-8
+    yield '\ufeff' + writer.writerow(encabezados)
+    bloque = []
+    for fila in datos:
+        bloque.append(writer.writerow([valor(dato) for dato in fila]))
+        if len(bloque) >= CHUNK_SIZE:
+            yield ''.join(bloque)
+            bloque = []
+    if bloque:
+        yield ''.join(bloque)
+
+
+class Sumidero:
+    """
+    Archivo de solo escritura sin seek: zipfile escribe entonces cada entrada
+    con descriptor de datos y el contenido se puede ir enviando por bloques.
+    """
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, data):
+        self._partes.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        data = b''.join(self._partes)
+        self._partes = []
+        return data
+
+
+XLSX_ESTATICOS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Datos" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def celda(dato):
+    if isinstance(dato, (int, float, Decimal)) and not isinstance(dato, bool):
+        return f'<c><v>{dato}</v></c>'
+    texto = _CONTROL.sub('', valor(dato))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(texto)}</t></is></c>'
+
+
+def xlsx_stream(encabezados, datos):
+    """Libro de una hoja con cadenas en línea, escrito fila a fila dentro del zip"""
+    sumidero = Sumidero()
+    with zipfile.ZipFile(sumidero, 'w', compression=zipfile.ZIP_DEFLATED) as libro:
+        for nombre, contenido in XLSX_ESTATICOS.items():
+            libro.writestr(nombre, contenido)
+        yield sumidero.vaciar()
+
+        with libro.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as hoja:
+            hoja.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            hoja.write(('<row>' + ''.join(celda(dato) for dato in encabezados) + '</row>').encode())
+            bloque = []
+            for fila in datos:
+                bloque.append('<row>' + ''.join(celda(dato) for dato in fila) + '</row>')
+                if len(bloque) >= CHUNK_SIZE:
+                    hoja.write(''.join(bloque).encode())
+                    bloque = []
+                    yield sumidero.vaciar()
+            hoja.write(''.join(bloque).encode())
+            hoja.write(b'</sheetData></worksheet>')
+    yield sumidero.vaciar()
+
+
+def exportar(queryset, columnas, formato, nombre):
+    """
+    Respuesta en streaming con las columnas (encabezado, campo) del queryset.
+    Los campos pueden cruzar relaciones (`socio__nombre`) y se resuelven con
+    JOIN en la misma consulta.
+    """
+    encabezados = [encabezado for encabezado, _ in columnas]
+    datos = filas(queryset, [campo for _, campo in columnas])
+    stream = xlsx_stream(encabezados, datos) if formato == 'xlsx' else csv_stream(encabezados, datos)
+
+    response = StreamingHttpResponse(stream, content_type=CONTENT_TYPES[formato])
+    fecha = timezone.localdate().isoformat()
+    response['Content-Disposition'] = f'attachment; filename="{nombre}-{fecha}.{formato}"'
+    return response
@@ -0,0 +1,25 @@
+from rest_framework.filters import BaseFilterBackend, SearchFilter
+
+from .models import normalizar
+
+
+class IsOwnerOrStaffFilter(BaseFilterBackend):
+    """
+    Limita el queryset a las filas del socio vinculado al usuario.
+
+    Complementa a IsOwnerOrStaff: el filtro se resuelve en SQL usando el
+    campo `owner_field` de la vista (p. ej. 'socio__user'), de modo que los
+    listados de un socio no cargan filas ajenas. El personal ve todo.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if request.user.is_staff:
+            return queryset
+        return queryset.filter(**{view.owner_field: request.user.pk})
+
+
+class NormalizedSearchFilter(SearchFilter):
+    """SearchFilter que normaliza los términos para buscar en columnas `*_normalizado`"""
+
+    def get_search_terms(self, request):
+        return [normalizar(term) for term in super().get_search_terms(request) if normalizar(term)]
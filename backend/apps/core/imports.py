@@ -0,0 +1,267 @@
+import csv
+import io
+from abc import ABC, abstractmethod
+from datetime import datetime
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from .models import Equipo, Membresia, Socio, normalizar
+
+# Filas validadas juntas (una consulta por bloque) y filas por INSERT
+CHUNK_SIZE = getattr(settings, 'IMPORT_CHUNK_SIZE', 1000)
+BATCH_SIZE = getattr(settings, 'IMPORT_BATCH_SIZE', 500)
+MAX_ERRORES = getattr(settings, 'IMPORT_MAX_ERRORES', 1000)
+
+REQUERIDO = 'Este campo es requerido.'
+FORMATOS_FECHA = ('%Y-%m-%d', '%d/%m/%Y')
+
+
+class ArchivoInvalido(ValueError):
+    """El archivo no se puede leer como CSV o le faltan columnas"""
+
+
+class Importador(ABC):
+    """
+    Importa un CSV por bloques: cada bloque se valida con las consultas que
+    necesite en conjunto y se inserta con bulk_create en lotes, cada uno en
+    su propia transacción. Las filas inválidas se omiten y quedan en el reporte.
+    """
+    model = None
+    # Encabezado normalizado -> campo del modelo
+    columnas = {}
+    requeridos = ()
+
+    def __init__(self):
+        self.filas = 0
+        self.creados = 0
+        self.errores = []
+        self.errores_omitidos = 0
+
+    def error(self, linea, errores):
+        if len(self.errores) < MAX_ERRORES:
+            self.errores.append({'fila': linea, 'errores': errores})
+        else:
+            self.errores_omitidos += 1
+
+    def leer(self, archivo):
+        """Filas (línea, {campo: valor}) leídas del archivo sin cargarlo entero"""
+        texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+        try:
+            muestra = texto.read(4096)
+            texto.seek(0)
+            try:
+                dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+            except csv.Error:
+                dialecto = csv.excel
+            lector = csv.reader(texto, dialecto)
+
+            encabezados = [self.columnas.get(normalizar(nombre)) for nombre in next(lector, [])]
+            faltan = [campo for campo in self.requeridos if campo not in encabezados]
+            if faltan:
+                raise ArchivoInvalido(f'Faltan columnas requeridas: {", ".join(faltan)}')
+
+            for fila in lector:
+                if not any(valor.strip() for valor in fila):
+                    continue
+                datos = {campo: valor.strip() for campo, valor in zip(encabezados, fila) if campo}
+                yield lector.line_num, datos
+        except UnicodeDecodeError:
+            raise ArchivoInvalido('El archivo debe estar codificado en UTF-8.')
+        except csv.Error as exc:
+            raise ArchivoInvalido(f'CSV mal formado: {exc}')
+        finally:
+            texto.detach()
+
+    def validar_campos(self, datos):
+        """Requeridos y longitud máxima según el modelo"""
+        errores = {}
+        for campo in self.requeridos:
+            if not datos.get(campo):
+                errores[campo] = REQUERIDO
+        for campo, valor in datos.items():
+            max_length = self.model._meta.get_field(campo).max_length
+            if max_length and len(valor) > max_length and campo not in errores:
+                errores[campo] = f'Asegúrese de que este campo no tenga más de {max_length} caracteres.'
+        return errores
+
+    @abstractmethod
+    def validar_bloque(self, bloque):
+        """Devuelve [(línea, instancia)] de las filas válidas y registra el resto"""
+
+    def insertar(self, validas):
+        for inicio in range(0, len(validas), BATCH_SIZE):
+            lote = validas[inicio:inicio + BATCH_SIZE]
+            try:
+                with transaction.atomic():
+                    self.model.objects.bulk_create([obj for _, obj in lote])
+                self.creados += len(lote)
+            except IntegrityError:
+                # Se reintenta fila a fila para señalar solo las que fallan
+                for linea, obj in lote:
+                    try:
+                        with transaction.atomic():
+                            self.model.objects.bulk_create([obj])
+                        self.creados += 1
+                    except IntegrityError as exc:
+                        self.error(linea, {'non_field_errors': str(exc)})
+
+    def verificar(self, archivo):
+        """Lee el archivo completo sin tocar la base de datos; lanza ArchivoInvalido si no se puede leer"""
+        for _ in self.leer(archivo):
+            pass
+        archivo.seek(0)
+
+    def ejecutar(self, archivo):
+        # Un archivo ilegible se rechaza antes de escribir nada, sin mantener
+        # abierta una transacción durante toda la importación
+        self.verificar(archivo)
+        filas = self.leer(archivo)
+        while True:
+            bloque = list(islice(filas, CHUNK_SIZE))
+            if not bloque:
+                break
+            self.filas += len(bloque)
+            self.insertar(self.validar_bloque(bloque))
+        return self.reporte()
+
+    def reporte(self):
+        return {
+            'filas': self.filas,
+            'creados': self.creados,
+            'con_errores': self.filas - self.creados,
+            'errores': self.errores,
+            'errores_omitidos': self.errores_omitidos,
+        }
+
+
+def parse_fecha(valor):
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            continue
+    raise ValueError(valor)
+
+
+class SocioImportador(Importador):
+    model = Socio
+    columnas = {
+        'nombre': 'nombre',
+        'telefono': 'telefono',
+        'correo': 'correo',
+        'email': 'correo',
+        'membresia': 'membresia',
+    }
+    requeridos = ('nombre', 'telefono', 'correo', 'membresia')
+
+    def __init__(self):
+        super().__init__()
+        self.membresias = None
+        self.correos = set()
+
+    def membresia_id(self, valor):
+        """Membresía por id o por tipo sin distinguir acentos; se consultan una sola vez"""
+        if self.membresias is None:
+            self.membresias = {}
+            for membresia_id, tipo in Membresia.objects.values_list('membresia_id', 'tipo'):
+                self.membresias[str(membresia_id)] = membresia_id
+                self.membresias[normalizar(tipo)] = membresia_id
+        # Se guarda también el valor tal cual para no normalizar repetidos
+        if valor not in self.membresias:
+            self.membresias[valor] = self.membresias.get(normalizar(valor))
+        return self.membresias[valor]
+
+    def validar_bloque(self, bloque):
+        correos = [normalizar(datos.get('correo', '')) for _, datos in bloque]
+        existentes = set(
+            Socio.objects.filter(correo_normalizado__in=set(correos)).values_list('correo_normalizado', flat=True)
+        )
+
+        validas = []
+        for (linea, datos), correo in zip(bloque, correos):
+            errores = self.validar_campos(datos)
+            if correo and 'correo' not in errores:
+                try:
+                    validate_email(datos['correo'])
+                except DjangoValidationError:
+                    errores['correo'] = 'Introduzca una dirección de correo electrónico válida.'
+                else:
+                    if correo in existentes:
+                        errores['correo'] = 'Ya existe un socio con este correo.'
+                    elif correo in self.correos:
+                        errores['correo'] = 'Correo duplicado en el archivo.'
+
+            membresia_id = self.membresia_id(datos.get('membresia', ''))
+            if datos.get('membresia') and membresia_id is None:
+                errores['membresia'] = 'Membresía no encontrada.'
+
+            if errores:
+                self.error(linea, errores)
+                continue
+
+            self.correos.add(correo)
+            # bulk_create no llama a save(), así que los campos normalizados se asignan aquí
+            validas.append((linea, Socio(
+                nombre=datos['nombre'],
+                telefono=datos['telefono'],
+                correo=datos['correo'],
+                membresia_id=membresia_id,
+                nombre_normalizado=normalizar(datos['nombre']),
+                correo_normalizado=correo,
+            )))
+        return validas
+
+
+class EquipoImportador(Importador):
+    model = Equipo
+    columnas = {
+        'nombre': 'nombre',
+        'descripcion': 'descripcion',
+        'estado': 'estado',
+        'fecha_adquisicion': 'fecha_adquisicion',
+        'fecha de adquisicion': 'fecha_adquisicion',
+        'ultima_mantenimiento': 'ultima_mantenimiento',
+        'ultimo mantenimiento': 'ultima_mantenimiento',
+    }
+    requeridos = ('nombre', 'estado', 'fecha_adquisicion')
+
+    # Se acepta tanto la clave como la etiqueta del estado
+    estados = {
+        normalizar(texto): clave
+        for clave, etiqueta in Equipo.ESTADO_CHOICES
+        for texto in (clave, etiqueta)
+    }
+
+    def validar_bloque(self, bloque):
+        validas = []
+        for linea, datos in bloque:
+            errores = self.validar_campos(datos)
+            valores = {}
+
+            estado = self.estados.get(normalizar(datos.get('estado', '')))
+            if datos.get('estado') and estado is None:
+                errores['estado'] = 'Estado no válido.'
+
+            for campo in ('fecha_adquisicion', 'ultima_mantenimiento'):
+                if datos.get(campo) and campo not in errores:
+                    try:
+                        valores[campo] = parse_fecha(datos[campo])
+                    except ValueError:
+                        errores[campo] = 'Fecha inválida. Use AAAA-MM-DD o DD/MM/AAAA.'
+
+            if errores:
+                self.error(linea, errores)
+                continue
+
+            validas.append((linea, Equipo(
+                nombre=datos['nombre'],
+                descripcion=datos.get('descripcion', ''),
+                estado=estado,
+                fecha_adquisicion=valores['fecha_adquisicion'],
+                ultima_mantenimiento=valores.get('ultima_mantenimiento'),
+            )))
+        return validas
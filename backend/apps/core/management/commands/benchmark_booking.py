@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.models import Clase, Entrenador, Membresia, Socio, SocioClase
+from apps.core.profiling import percentil
+
+User = get_user_model()
+
+# Respuestas esperadas: inscripción creada o rechazada por falta de cupo
+CREADA, SIN_CUPO = 201, 400
+
+
+@contextmanager
+def silenciar(*nombres):
+    """Sube a CRITICAL los loggers indicados mientras dura el bloque"""
+    loggers = [logging.getLogger(nombre) for nombre in nombres]
+    niveles = [logger.level for logger in loggers]
+    for logger in loggers:
+        logger.setLevel(logging.CRITICAL)
+    try:
+        yield
+    finally:
+        for logger, nivel in zip(loggers, niveles):
+            logger.setLevel(nivel)
+
+
+class Command(BaseCommand):
+    help = 'Lanza inscripciones concurrentes contra una misma clase y mide latencia, errores y sobreventa'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Inscripciones a lanzar')
+        parser.add_argument('--threads', type=int, default=32, help='Peticiones simultáneas')
+        parser.add_argument('--capacidad', type=int, default=25, help='capacidad_max de la clase')
+        parser.add_argument('--output', help='Ruta donde escribir el reporte JSON')
+
+    def handle(self, *args, **options):
+        # Los 400 esperados y las peticiones lentas se cuentan en el resumen, no en el log
+        with silenciar('django.request', 'apps.core.middleware'), self.base_temporal():
+            reporte = self.run_benchmark(options['requests'], options['threads'], options['capacidad'])
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as archivo:
+                json.dump(reporte, archivo, indent=2, sort_keys=True, ensure_ascii=False)
+                archivo.write('\n')
+            self.stdout.write(self.style.SUCCESS(f'Reporte escrito en {options["output"]}'))
+
+        if reporte['errores'] or reporte['sobreventa']:
+            raise CommandError(
+                f'{reporte["errores"]} respuestas con error'
+                + (', sobreventa o contador inconsistente' if reporte['sobreventa'] else '')
+            )
+
+    @contextmanager
+    def base_temporal(self):
+        """
+        Base de datos de prueba para el benchmark. En SQLite se usa un archivo
+        en modo WAL con busy_timeout y transacciones IMMEDIATE: la base en
+        memoria compartida falla con "database table is locked" en lugar de
+        esperar cuando varios hilos escriben a la vez.
+        """
+        with ExitStack() as stack:
+            if connection.vendor == 'sqlite':
+                ajustes = connection.settings_dict
+                originales = {clave: ajustes.get(clave, {}) for clave in ('TEST', 'OPTIONS')}
+                directorio = tempfile.mkdtemp(prefix='benchmark-booking-')
+                ajustes['TEST'] = {**originales['TEST'], 'NAME': os.path.join(directorio, 'booking.sqlite3')}
+                ajustes['OPTIONS'] = {**originales['OPTIONS'], 'timeout': 30, 'transaction_mode': 'IMMEDIATE'}
+                stack.callback(shutil.rmtree, directorio, ignore_errors=True)
+                stack.callback(ajustes.update, originales)
+
+            old_config = setup_databases(verbosity=0, interactive=False)
+            stack.callback(teardown_databases, old_config, verbosity=0)
+            if connection.vendor == 'sqlite':
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode=WAL')
+            yield
+
+    def run_benchmark(self, total, threads, capacidad):
+        staff = User.objects.create_superuser(email='bench@gimnasio.test', password='bench', first_name='Bench',
+                                              last_name='Admin')
+        membresia = Membresia.objects.create(tipo='Bench', descripcion='', precio_mensual=10, duracion_meses=1)
+        entrenador = Entrenador.objects.create(nombre='Bench', especialidad='Spinning', telefono='0',
+                                               correo='bench@gimnasio.test')
+        clase = Clase.objects.create(nombre='Spinning Intenso', entrenador=entrenador,
+                                     horario=timezone.now() + timedelta(days=1), capacidad_max=capacidad)
+        Socio.objects.bulk_create(
+            [Socio(nombre=f'Bench {i}', telefono='0', correo=f'socio{i}@gimnasio.test', membresia=membresia)
+             for i in range(total)],
+            batch_size=1000,
+        )
+        socio_ids = list(Socio.objects.values_list('socio_id', flat=True))
+        self.stdout.write(
+            f'{connection.vendor}: {total} inscripciones, {threads} hilos, capacidad {capacidad}'
+        )
+
+        local = threading.local()
+        resultados = []
+        lock = threading.Lock()
+
+        def medir_contador(execute, sql, params, many, context):
+            # En PostgreSQL incluye la espera por el bloqueo de la fila; en SQLite
+            # la espera ocurre al abrir la transacción y solo se ve en la latencia
+            if not sql.startswith('UPDATE "core_clase"'):
+                return execute(sql, params, many, context)
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                local.contador += time.perf_counter() - inicio
+
+        def inscribir(socio_id):
+            if not hasattr(local, 'client'):
+                local.client = APIClient(raise_request_exception=False)
+                local.client.force_authenticate(staff)
+            local.contador = 0.0
+            inicio = time.perf_counter()
+            try:
+                with connection.execute_wrapper(medir_contador):
+                    status = local.client.post(
+                        '/api/v1/socio-clases/', {'socio': socio_id, 'clase': clase.pk}
+                    ).status_code
+            except Exception:
+                status = 'error'
+            finally:
+                connection.close()
+            with lock:
+                resultados.append((status, time.perf_counter() - inicio, local.contador))
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(inscribir, socio_ids))
+        total_s = time.perf_counter() - inicio
+
+        # Las latencias se calculan solo sobre respuestas válidas: los errores se informan aparte
+        validas = [(latencia, contador) for status, latencia, contador in resultados if status in (CREADA, SIN_CUPO)]
+        latencias = [latencia * 1000 for latencia, _ in validas]
+        contadores = [contador * 1000 for _, contador in validas]
+        por_estado = {}
+        for status, _, _ in resultados:
+            por_estado[str(status)] = por_estado.get(str(status), 0) + 1
+        errores = len(resultados) - len(validas)
+
+        clase.refresh_from_db()
+        inscripciones = SocioClase.objects.filter(clase=clase).count()
+        sobreventa = inscripciones > clase.capacidad_max or inscripciones != clase.inscritos
+
+        self.stdout.write(f'Duración: {total_s:.2f} s ({len(resultados) / total_s:,.0f} peticiones/s)')
+        self.stdout.write(f'Respuestas: {", ".join(f"{k}={v}" for k, v in sorted(por_estado.items()))}')
+        if errores:
+            self.stdout.write(self.style.ERROR(f'Errores: {errores} de {len(resultados)} peticiones'))
+        self.stdout.write(
+            f'Latencia: p50 {percentil(latencias, 50):.1f} ms, p99 {percentil(latencias, 99):.1f} ms, '
+            f'máx {max(latencias, default=0):.1f} ms'
+        )
+        self.stdout.write(
+            f'UPDATE del contador: p50 {percentil(contadores, 50):.1f} ms, '
+            f'p99 {percentil(contadores, 99):.1f} ms, total {sum(contadores):.0f} ms'
+        )
+        resumen = f'Inscritos: {clase.inscritos} (SocioClase: {inscripciones}) / capacidad {clase.capacidad_max}'
+        if sobreventa:
+            self.stdout.write(self.style.ERROR(f'{resumen} -- sobreventa o contador inconsistente'))
+        else:
+            self.stdout.write(self.style.SUCCESS(resumen))
+
+        return {
+            'meta': {
+                'fecha': timezone.now().isoformat(timespec='seconds'),
+                'vendor': connection.vendor,
+                'requests': total,
+                'threads': threads,
+                'capacidad': capacidad,
+            },
+            'duracion_s': round(total_s, 3),
+            'respuestas': por_estado,
+            'errores': errores,
+            'latencia_ms': {
+                'p50': round(percentil(latencias, 50), 3),
+                'p99': round(percentil(latencias, 99), 3),
+                'max': round(max(latencias, default=0), 3),
+            },
+            'update_contador_ms': {
+                'p50': round(percentil(contadores, 50), 3),
+                'p99': round(percentil(contadores, 99), 3),
+                'total': round(sum(contadores), 3),
+            },
+            'inscritos': clase.inscritos,
+            'inscripciones': inscripciones,
+            'sobreventa': sobreventa,
+        }
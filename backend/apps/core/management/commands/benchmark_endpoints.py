@@ -0,0 +1,301 @@
+import json
+import logging
+import platform
+import subprocess
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import timedelta
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.test import APIClient
+
+from apps.core.dataset import GeneradorDataset
+from apps.core.models import Clase, Equipo, Pago, Socio
+from apps.core.profiling import QueryStats, percentil
+
+User = get_user_model()
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera un dataset en una base de datos temporal y mide latencia, consultas SQL, tiempo SQL y '
+        'memoria de cada endpoint de /api/v1/; escribe un reporte JSON comparable entre commits'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=2000, help='Socios del dataset (ver generate_dataset)')
+        parser.add_argument('--seed', type=int, default=0, help='Semilla del dataset')
+        parser.add_argument('--until', help='Fecha de referencia del dataset AAAA-MM-DD (por defecto hoy)')
+        parser.add_argument('--iterations', type=int, default=30, help='Peticiones medidas por endpoint')
+        parser.add_argument('--warmup', type=int, default=3, help='Peticiones previas sin medir (cachés, índices)')
+        parser.add_argument('--only', help='Medir solo los endpoints cuyo nombre contenga este texto')
+        parser.add_argument('--output', default='benchmark_endpoints.json', help='Ruta del reporte JSON')
+        parser.add_argument('--baseline', help='Reporte anterior con el que comparar')
+        parser.add_argument('--threshold', type=float, default=1.25,
+                            help='Regresión si la mediana supera la del baseline por este factor')
+
+    def handle(self, *args, **options):
+        hasta = timezone.localdate()
+        if options['until']:
+            try:
+                hasta = parse_date(options['until'])
+            except ValueError:
+                hasta = None
+            if hasta is None:
+                raise CommandError('--until debe tener el formato AAAA-MM-DD')
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as archivo:
+                baseline = json.load(archivo)
+
+        # Los 4xx esperados (p. ej. validaciones) se reflejan en el reporte, no en el log
+        request_logger = logging.getLogger('django.request')
+        nivel = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            with self.base_temporal():
+                reporte = self.run_benchmark(options, hasta)
+        finally:
+            request_logger.setLevel(nivel)
+
+        with open(options['output'], 'w', encoding='utf-8') as archivo:
+            json.dump(reporte, archivo, indent=2, sort_keys=True, ensure_ascii=False)
+            archivo.write('\n')
+        self.stdout.write(self.style.SUCCESS(f'Reporte escrito en {options["output"]}'))
+
+        if baseline is not None:
+            regresiones = self.comparar(baseline, reporte, options['threshold'])
+            if regresiones:
+                raise CommandError(f'{len(regresiones)} endpoints con regresión: {", ".join(regresiones)}')
+
+    @contextmanager
+    def base_temporal(self):
+        """Entorno y base de datos de prueba donde se genera el dataset"""
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            yield
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def run_benchmark(self, options, hasta):
+        inicio = time.perf_counter()
+        dataset = GeneradorDataset(options['scale'], seed=options['seed'], hasta=hasta).generar()
+        self.stdout.write(
+            f'{connection.vendor}: dataset de {sum(dataset.values())} filas en {time.perf_counter() - inicio:.1f}s'
+        )
+
+        clientes = self.clientes()
+        resultados = {}
+        for endpoint in self.endpoints(options['iterations'] + options['warmup'] + 1):
+            if options['only'] and options['only'] not in endpoint['nombre']:
+                continue
+            cliente = clientes[endpoint.get('user', 'staff')]
+            resultado = self.medir(cliente, endpoint, options['iterations'], options['warmup'])
+            resultados[endpoint['nombre']] = resultado
+            self.stdout.write(
+                f'{endpoint["nombre"]:<32} {resultado["status"]:>3}  p50 {resultado["p50_ms"]:>8.2f} ms  '
+                f'p99 {resultado["p99_ms"]:>8.2f} ms  {resultado["queries"]:>3} consultas  '
+                f'{resultado["peak_kb"]:>8.0f} KB'
+            )
+
+        return {
+            'meta': {
+                'commit': git_commit(),
+                'fecha': timezone.now().isoformat(timespec='seconds'),
+                'vendor': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'scale': options['scale'],
+                'seed': options['seed'],
+                'until': hasta.isoformat(),
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+            },
+            'dataset': dataset,
+            'endpoints': resultados,
+        }
+
+    def clientes(self):
+        staff = User.objects.create_superuser(
+            email='bench@gimnasio.test', password='bench', first_name='Bench', last_name='Admin'
+        )
+        socio_user = User.objects.create_user(
+            email='socio@gimnasio.test', password='bench', first_name='Bench', last_name='Socio'
+        )
+        Socio.objects.filter(pk=self.socios_vigentes()[0]).update(user=socio_user)
+        clientes = {}
+        for nombre, user in (('staff', staff), ('socio', socio_user)):
+            clientes[nombre] = APIClient(raise_request_exception=False)
+            clientes[nombre].force_authenticate(user)
+        return clientes
+
+    def socios_vigentes(self):
+        if not hasattr(self, '_vigentes'):
+            self._vigentes = list(
+                Socio.objects.con_vigencia()
+                .filter(suspendido=False, vigente_hasta__gt=timezone.now())
+                .order_by('pk')
+                .values_list('pk', flat=True)
+            )
+        return self._vigentes
+
+    def endpoints(self, llamadas):
+        """Endpoints a medir; `data` recibe el número de llamada para no repetir altas"""
+        vigentes = self.socios_vigentes()
+        socio = vigentes[0]
+        pago = Pago.objects.filter(socio_id=socio).values_list('pk', flat=True).first()
+        clase = Clase.objects.filter(horario__gt=timezone.now()).order_by('horario').values_list('pk', flat=True)[0]
+        equipo = Equipo.objects.values_list('pk', flat=True).first()
+        membresia = Socio.objects.filter(pk=socio).values_list('membresia_id', flat=True)[0]
+        # Clase propia para inscribir un socio distinto en cada llamada sin llenarla
+        entrenador = Clase.objects.filter(pk=clase).values_list('entrenador_id', flat=True)[0]
+        clase_bench = Clase.objects.create(
+            nombre='Benchmark', entrenador_id=entrenador, horario=timezone.now() + timedelta(days=1),
+            capacidad_max=llamadas * 2,
+        ).pk
+
+        def socio_n(n):
+            return vigentes[n % len(vigentes)]
+
+        api = '/api/v1'
+        return [
+            # Listados
+            {'nombre': 'membresias-list', 'url': f'{api}/membresias/'},
+            {'nombre': 'socios-list', 'url': f'{api}/socios/'},
+            {'nombre': 'socios-list-search', 'url': f'{api}/socios/?search=garcia'},
+            {'nombre': 'pagos-list', 'url': f'{api}/pagos/'},
+            {'nombre': 'pagos-list-socio', 'url': f'{api}/pagos/', 'user': 'socio'},
+            {'nombre': 'entrenadores-list', 'url': f'{api}/entrenadores/'},
+            {'nombre': 'clases-list', 'url': f'{api}/clases/'},
+            {'nombre': 'socio-clases-list', 'url': f'{api}/socio-clases/'},
+            {'nombre': 'asistencias-list', 'url': f'{api}/asistencias/'},
+            {'nombre': 'asistencias-list-socio', 'url': f'{api}/asistencias/', 'user': 'socio'},
+            {'nombre': 'equipos-list', 'url': f'{api}/equipos/'},
+            {'nombre': 'notifications-list', 'url': f'{api}/api/notifications/'},
+            # Detalle
+            {'nombre': 'socios-detail', 'url': f'{api}/socios/{socio}/'},
+            {'nombre': 'pagos-detail', 'url': f'{api}/pagos/{pago}/'},
+            {'nombre': 'clases-detail', 'url': f'{api}/clases/{clase}/'},
+            {'nombre': 'equipos-detail', 'url': f'{api}/equipos/{equipo}/'},
+            # Acciones
+            {'nombre': 'socios-buscar', 'url': f'{api}/socios/buscar/?q=garcia ra'},
+            {'nombre': 'socios-verificar-acceso', 'url': f'{api}/socios/{socio}/verificar-acceso/'},
+            {'nombre': 'socios-exportar', 'url': f'{api}/socios/exportar/?format=csv'},
+            {'nombre': 'pagos-exportar', 'url': f'{api}/pagos/exportar/?format=csv'},
+            {'nombre': 'clases-disponibilidad', 'url': f'{api}/clases/{clase}/disponibilidad/'},
+            {'nombre': 'asistencias-estadisticas', 'url': f'{api}/asistencias/estadisticas/'},
+            {'nombre': 'asistencias-ocupacion-actual', 'url': f'{api}/asistencias/ocupacion-actual/'},
+            {'nombre': 'reportes-dashboard', 'url': f'{api}/reportes/dashboard/'},
+            {'nombre': 'reportes-ingresos', 'url': f'{api}/reportes/ingresos/'},
+            {'nombre': 'reportes-retencion', 'url': f'{api}/reportes/retencion/'},
+            {'nombre': 'notifications-unread-count', 'url': f'{api}/api/notifications/unread_count/'},
+            # Altas
+            {'nombre': 'socios-create', 'method': 'post', 'url': f'{api}/socios/', 'data': lambda n: {
+                'nombre': f'Bench {n}', 'telefono': '555', 'correo': f'bench{n}@gimnasio.test', 'membresia': membresia,
+            }},
+            {'nombre': 'pagos-create', 'method': 'post', 'url': f'{api}/pagos/', 'data': lambda n: {
+                'socio': socio_n(n), 'monto': '599.00', 'metodo': 'tarjeta',
+            }},
+            {'nombre': 'socio-clases-create', 'method': 'post', 'url': f'{api}/socio-clases/', 'data': lambda n: {
+                'socio': socio_n(n), 'clase': clase_bench,
+            }},
+            {'nombre': 'asistencias-check-in', 'method': 'post', 'url': f'{api}/asistencias/check-in/',
+             'data': lambda n: {'socio': socio_n(n)}},
+        ]
+
+    def llamar(self, client, endpoint, n):
+        method = endpoint.get('method', 'get')
+        if method == 'get':
+            response = client.get(endpoint['url'])
+        else:
+            response = getattr(client, method)(endpoint['url'], endpoint['data'](n), format='json')
+        if response.streaming:
+            # Las exportaciones se miden hasta el último byte
+            for _ in response.streaming_content:
+                pass
+        return response.status_code
+
+    def medir(self, client, endpoint, iteraciones, warmup):
+        n = 0
+        for _ in range(warmup):
+            self.llamar(client, endpoint, n)
+            n += 1
+
+        tiempos, consultas, tiempos_sql, estados = [], [], [], set()
+        for _ in range(iteraciones):
+            stats = QueryStats()
+            inicio = time.perf_counter()
+            with connection.execute_wrapper(stats):
+                estados.add(self.llamar(client, endpoint, n))
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            consultas.append(stats.count)
+            tiempos_sql.append(stats.tiempo * 1000)
+            n += 1
+
+        # tracemalloc ralentiza cada asignación: la memoria se mide en una llamada aparte
+        tracemalloc.start()
+        try:
+            self.llamar(client, endpoint, n)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        resultado = {
+            'method': endpoint.get('method', 'get').upper(),
+            'url': endpoint['url'],
+            'user': endpoint.get('user', 'staff'),
+            'status': max(estados),
+            'mean_ms': round(sum(tiempos) / len(tiempos), 3),
+            'max_ms': round(max(tiempos), 3),
+            'queries': percentil(consultas, 50),
+            'queries_max': max(consultas),
+            'sql_ms': round(percentil(tiempos_sql, 50), 3),
+            'peak_kb': round(pico / 1024, 1),
+        }
+        for p in PERCENTILES:
+            resultado[f'p{p}_ms'] = round(percentil(tiempos, p), 3)
+        return resultado
+
+    def comparar(self, baseline, reporte, threshold):
+        """Imprime la variación frente al baseline y devuelve los endpoints con regresión"""
+        self.stdout.write(f'\nComparación con {baseline["meta"].get("commit") or "baseline"}:')
+        regresiones = []
+        for nombre, actual in reporte['endpoints'].items():
+            anterior = baseline.get('endpoints', {}).get(nombre)
+            if anterior is None:
+                continue
+            ratio = actual['p50_ms'] / anterior['p50_ms'] if anterior['p50_ms'] else 1
+            delta_consultas = actual['queries'] - anterior['queries']
+            # Por debajo de 1 ms la variación es sobre todo ruido
+            lenta = ratio > threshold and actual['p50_ms'] - anterior['p50_ms'] > 1
+            regresion = lenta or delta_consultas > 0
+            linea = (
+                f'{nombre:<32} p50 {anterior["p50_ms"]:>8.2f} -> {actual["p50_ms"]:>8.2f} ms ({ratio:>5.2f}x)  '
+                f'consultas {anterior["queries"]:>3} -> {actual["queries"]:>3}'
+            )
+            if regresion:
+                regresiones.append(nombre)
+                self.stdout.write(self.style.ERROR(linea))
+            else:
+                self.stdout.write(linea)
+        return regresiones
@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import DateTimeField, ExpressionWrapper, F
+from django.utils import timezone
+
+from apps.core.models import Asistencia
+from apps.core.occupancy import invalidar_ocupacion
+
+
+def cerrar_visitas(horas):
+    """Cierra las visitas abiertas hace más de `horas`, con salida en entrada + `horas`"""
+    duracion = timedelta(hours=horas)
+    cerradas = Asistencia.objects.filter(
+        fecha_salida__isnull=True, fecha_entrada__lt=timezone.now() - duracion
+    ).update(fecha_salida=ExpressionWrapper(F('fecha_entrada') + duracion, output_field=DateTimeField()))
+    if cerradas:
+        invalidar_ocupacion()
+    return cerradas
+
+
+class Command(BaseCommand):
+    help = 'Cierra las visitas que quedaron abiertas (socios que no hicieron check-out)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=12, help='Horas tras las que una visita se da por cerrada')
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Repetir cada N segundos (0 para ejecutar una sola vez)')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            cerradas = cerrar_visitas(options['hours'])
+            self.stdout.write(f'{cerradas} visitas cerradas')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.models import Clase
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el contador de inscritos de cada clase desde SocioClase'
+
+    def handle(self, *args, **options):
+        actualizadas = Clase.objects.recalcular_inscritos()
+        self.stdout.write(self.style.SUCCESS(f'Inscritos recalculados para {actualizadas} clases'))
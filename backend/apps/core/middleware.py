@@ -0,0 +1,92 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .profiling import QueryStats
+
+logger = logging.getLogger(__name__)
+
+ENABLED = getattr(settings, 'INSTRUMENTATION_ENABLED', True)
+# La cabecera expone tiempos y consultas internas: por defecto solo en desarrollo
+SERVER_TIMING = getattr(settings, 'INSTRUMENTATION_SERVER_TIMING', settings.DEBUG)
+# Milisegundos a partir de los cuales se registra la petición como lenta
+SLOW_MS = getattr(settings, 'INSTRUMENTATION_SLOW_MS', 500)
+SLOWEST = getattr(settings, 'INSTRUMENTATION_SLOWEST', 3)
+# Veces que debe repetirse una misma consulta para marcarla como N+1
+DUPLICATES = getattr(settings, 'INSTRUMENTATION_DUPLICATES', 3)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Mide cada petición: consultas, tiempo en la base de datos, tiempo de
+    render de la respuesta y consultas repetidas (N+1). Lo agrega en la
+    cabecera Server-Timing (solo con SERVER_TIMING) y registra las
+    peticiones que superan SLOW_MS con sus consultas más lentas. Las
+    consultas de respuestas streaming se ejecutan después de salir del
+    middleware y no se cuentan.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not ENABLED:
+            return self.get_response(request)
+
+        stats = QueryStats(detalle=True, lentas=SLOWEST)
+        request._instrumentacion = {'stats': stats, 'render': 0.0}
+        inicio = time.perf_counter()
+        with ExitStack() as stack:
+            for conexion in connections.all():
+                stack.enter_context(conexion.execute_wrapper(stats))
+            response = self.get_response(request)
+        total = time.perf_counter() - inicio
+
+        self.reportar(request, response, stats, total, request._instrumentacion['render'])
+        return response
+
+    def process_template_response(self, request, response):
+        # Las respuestas de DRF se renderizan después de la vista: se mide aparte
+        medicion = getattr(request, '_instrumentacion', None)
+        if medicion is not None:
+            stats = medicion['stats']
+            inicio, sql_inicio = time.perf_counter(), stats.tiempo
+
+            def fin_render(response):
+                # El SQL de un queryset perezoso evaluado al renderizar ya cuenta como db
+                medicion['render'] = time.perf_counter() - inicio - (stats.tiempo - sql_inicio)
+
+            response.add_post_render_callback(fin_render)
+        return response
+
+    def reportar(self, request, response, stats, total, render):
+        duplicadas = stats.duplicadas(DUPLICATES)
+        if SERVER_TIMING:
+            app = max(total - stats.tiempo - render, 0)
+            descripcion = f'{stats.count} consultas'
+            if duplicadas:
+                descripcion += f', N+1: {len(duplicadas)}'
+            response['Server-Timing'] = (
+                f'db;dur={stats.tiempo * 1000:.1f};desc="{descripcion}", '
+                f'app;dur={app * 1000:.1f}, '
+                f'render;dur={render * 1000:.1f}, '
+                f'total;dur={total * 1000:.1f}'
+            )
+
+        if total * 1000 >= SLOW_MS:
+            logger.warning(
+                'Petición lenta %s %s -> %s: %.1f ms, %s consultas en %.1f ms, render %.1f ms%s%s',
+                request.method, request.path, response.status_code, total * 1000,
+                stats.count, stats.tiempo * 1000, render * 1000,
+                ''.join(f'\n  {duracion * 1000:.1f} ms: {sql}' for duracion, sql in stats.mas_lentas()),
+                ''.join(f'\n  repetida {veces}x: {sql}' for sql, veces in duplicadas),
+            )
+        elif duplicadas:
+            logger.info(
+                'Consultas repetidas en %s %s: %s',
+                request.method, request.path,
+                '; '.join(f'{veces}x {sql}' for sql, veces in duplicadas),
+            )
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['fecha_entrada'], name='core_asiste_fecha_e_7e63fa_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:49
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def contar_inscritos(apps, schema_editor):
+    Clase = apps.get_model('core', 'Clase')
+    SocioClase = apps.get_model('core', 'SocioClase')
+    conteo = SocioClase.objects.filter(clase=OuterRef('pk')).order_by().values('clase').annotate(
+        total=Count('id')
+    ).values('total')
+    Clase.objects.update(inscritos=Coalesce(Subquery(conteo), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_pago_fecha_pago_metodo_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clase',
+            name='inscritos',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(contar_inscritos, migrations.RunPython.noop),
+    ]
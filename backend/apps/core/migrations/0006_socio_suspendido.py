@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_clase_inscritos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='socio',
+            name='suspendido',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_socio_suspendido'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(condition=models.Q(('fecha_salida__isnull', True)), fields=['socio'], name='core_asistencia_abierta_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_asistencia_abierta_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['socio', 'fecha_entrada'], name='core_asiste_socio_i_2380b0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clase',
+            index=models.Index(fields=['horario'], name='core_clase_horario_1d1b67_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clase',
+            index=models.Index(fields=['entrenador', 'horario'], name='core_clase_entrena_d9ca9f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipo',
+            index=models.Index(fields=['fecha_adquisicion'], name='core_equipo_fecha_a_bee359_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipo',
+            index=models.Index(fields=['estado', 'fecha_adquisicion'], name='core_equipo_estado_ef3237_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['fecha_pago'], name='core_pago_fecha_p_c214d3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['socio', 'fecha_pago'], name='core_pago_socio_i_33aa44_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='socio',
+            index=models.Index(fields=['fecha_registro'], name='core_socio_fecha_r_571fa6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='socio',
+            index=models.Index(fields=['membresia', 'fecha_registro'], name='core_socio_membres_76bb6c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='socio',
+            index=models.Index(fields=['correo'], name='core_socio_correo_b58de9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='socioclase',
+            index=models.Index(fields=['fecha_inscripcion'], name='core_socioc_fecha_i_2c8366_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='socioclase',
+            index=models.Index(fields=['socio', 'fecha_inscripcion'], name='core_socioc_socio_i_127a78_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='socioclase',
+            index=models.Index(fields=['clase', 'fecha_inscripcion'], name='core_socioc_clase_i_9a3d5e_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:54
+
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def normalizar(texto):
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    sin_acentos = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_acentos.casefold().split())
+
+
+def normalizar_socios(apps, schema_editor):
+    Socio = apps.get_model('core', 'Socio')
+    lote = []
+    for socio in Socio.objects.only('socio_id', 'nombre', 'correo').iterator(chunk_size=2000):
+        socio.nombre_normalizado = normalizar(socio.nombre)
+        socio.correo_normalizado = normalizar(socio.correo)
+        lote.append(socio)
+        if len(lote) >= 2000:
+            Socio.objects.bulk_update(lote, ['nombre_normalizado', 'correo_normalizado'])
+            lote = []
+    Socio.objects.bulk_update(lote, ['nombre_normalizado', 'correo_normalizado'])
+
+
+def crear_indice_trigramas(apps, schema_editor):
+    # Búsqueda por subcadena (LIKE '%texto%') con índice; solo existe en PostgreSQL
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS core_socio_nombre_trgm_idx '
+        'ON core_socio USING gin (nombre_normalizado gin_trgm_ops)'
+    )
+
+
+def borrar_indice_trigramas(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS core_socio_nombre_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_indices_consultas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='socio',
+            name='actualizado_en',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='socio',
+            name='correo_normalizado',
+            field=models.CharField(blank=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='socio',
+            name='nombre_normalizado',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='socio',
+            index=models.Index(fields=['actualizado_en'], name='core_socio_actuali_4f4c87_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='socio',
+            index=models.Index(fields=['nombre_normalizado'], name='core_socio_nombre_norm_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='socio',
+            index=models.Index(fields=['correo_normalizado'], name='core_socio_correo_norm_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(normalizar_socios, migrations.RunPython.noop),
+        migrations.RunPython(crear_indice_trigramas, borrar_indice_trigramas),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:57
+
+from django.db import migrations, models
+
+
+def cerrar_visitas_duplicadas(apps, schema_editor):
+    # Deja abierta solo la visita más reciente de cada socio; las demás se cierran en su entrada
+    Asistencia = apps.get_model('core', 'Asistencia')
+    mas_reciente = Asistencia.objects.filter(
+        socio=models.OuterRef('socio'), fecha_salida__isnull=True
+    ).order_by('-fecha_entrada', '-asistencia_id').values('asistencia_id')[:1]
+    Asistencia.objects.filter(fecha_salida__isnull=True).exclude(
+        asistencia_id=models.Subquery(mas_reciente)
+    ).update(fecha_salida=models.F('fecha_entrada'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_socio_busqueda'),
+    ]
+
+    operations = [
+        migrations.RunPython(cerrar_visitas_duplicadas, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='asistencia',
+            name='core_asistencia_abierta_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='asistencia',
+            constraint=models.UniqueConstraint(condition=models.Q(('fecha_salida__isnull', True)), fields=('socio',), name='core_asistencia_abierta_unica'),
+        ),
+    ]
@@ -0,0 +1,131 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_asistencia_abierta_unica'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='asistencia',
+            name='core_asiste_fecha_e_7e63fa_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='asistencia',
+            name='core_asiste_socio_i_2380b0_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='clase',
+            name='core_clase_horario_1d1b67_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='clase',
+            name='core_clase_entrena_d9ca9f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='equipo',
+            name='core_equipo_fecha_a_bee359_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='equipo',
+            name='core_equipo_estado_ef3237_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='pago',
+            name='core_pago_fecha_p_d119f3_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='pago',
+            name='core_pago_fecha_p_c214d3_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='pago',
+            name='core_pago_socio_i_33aa44_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='socio',
+            name='core_socio_fecha_r_571fa6_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='socio',
+            name='core_socio_membres_76bb6c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='socioclase',
+            name='core_socioc_fecha_i_2c8366_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='socioclase',
+            name='core_socioc_socio_i_127a78_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='socioclase',
+            name='core_socioc_clase_i_9a3d5e_idx',
+        ),
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['fecha_entrada', 'asistencia_id'], name='core_asiste_fecha_e_e07b77_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['socio', 'fecha_entrada', 'asistencia_id'], name='core_asiste_socio_i_33f72a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clase',
+            index=models.Index(fields=['horario', 'clase_id'], name='core_clase_horario_996a78_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clase',
+            index=models.Index(fields=['entrenador', 'horario', 'clase_id'], name='core_clase_entrena_4154c8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipo',
+            index=models.Index(fields=['fecha_adquisicion', 'equipo_id'], name='core_equipo_fecha_a_116d83_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipo',
+            index=models.Index(fields=['ultima_mantenimiento', 'equipo_id'], name='core_equipo_ultima__d2f735_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipo',
+            index=models.Index(fields=['estado', 'fecha_adquisicion', 'equipo_id'], name='core_equipo_estado_1b3bef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['fecha_pago', 'pago_id'], name='core_pago_fecha_p_773d31_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['monto', 'pago_id'], name='core_pago_monto_865edd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['socio', 'fecha_pago', 'pago_id'], name='core_pago_socio_i_b10ab5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='socio',
+            index=models.Index(fields=['fecha_registro', 'socio_id'], name='core_socio_fecha_r_ee8e75_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='socio',
+            index=models.Index(fields=['membresia', 'fecha_registro', 'socio_id'], name='core_socio_membres_2f91d5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='socioclase',
+            index=models.Index(fields=['fecha_inscripcion', 'id'], name='core_socioc_fecha_i_823ff1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='socioclase',
+            index=models.Index(fields=['socio', 'fecha_inscripcion', 'id'], name='core_socioc_socio_i_e005cc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='socioclase',
+            index=models.Index(fields=['clase', 'fecha_inscripcion', 'id'], name='core_socioc_clase_i_438e35_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_indices_keyset'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['fecha_pago', 'metodo'], name='core_pago_fecha_p_d119f3_idx'),
+        ),
+    ]
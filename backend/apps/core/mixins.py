@@ -0,0 +1,107 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+class QueryPlan:
+    """Relaciones y columnas que un serializer lee de un modelo"""
+
+    def __init__(self):
+        self.select_related = set()
+        self.prefetch_related = set()
+        self.only = set()
+        self.deferrable = True
+
+    def apply(self, queryset, defer=True):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*sorted(self.prefetch_related))
+        if defer and self.deferrable and self.only:
+            queryset = queryset.only(*sorted(self.only))
+        return queryset
+
+
+def build_query_plan(serializer, model, prefix='', plan=None):
+    """
+    Recorre los campos del serializer (incluidos los anidados) y traduce cada
+    `source` con puntos a select_related/prefetch_related y a la lista de
+    columnas para only().
+    """
+    plan = plan or QueryPlan()
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField) or field.source == '*':
+            # No se puede saber qué atributos lee, así que no se difieren columnas
+            plan.deferrable = False
+            continue
+
+        current_model, path = model, prefix
+        attrs = field.source_attrs
+        for index, attr in enumerate(attrs):
+            try:
+                model_field = current_model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                plan.deferrable = False
+                break
+
+            lookup = f'{path}__{attr}' if path else attr
+            is_last = index == len(attrs) - 1
+            nested = isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField))
+
+            if model_field.is_relation and (model_field.many_to_many or model_field.one_to_many):
+                plan.prefetch_related.add(lookup)
+                plan.deferrable = False
+                break
+
+            if model_field.is_relation:
+                if model_field.concrete:
+                    plan.only.add(lookup)
+                if is_last and not nested:
+                    break
+                plan.select_related.add(lookup)
+                if is_last:
+                    build_query_plan(field, model_field.related_model, lookup, plan)
+                current_model, path = model_field.related_model, lookup
+                continue
+
+            plan.only.add(lookup)
+            break
+
+    return plan
+
+
+class QueryPlannerMixin:
+    """
+    Aplica automáticamente select_related/prefetch_related/only() al queryset
+    según lo que lee el serializer de la acción, evitando consultas N+1.
+    """
+    _query_plans = {}
+
+    def get_query_plan(self):
+        serializer_class = self.get_serializer_class()
+        key = (type(self), serializer_class)
+        plan = self._query_plans.get(key)
+        if plan is None:
+            serializer = serializer_class(context=self.get_serializer_context())
+            plan = build_query_plan(serializer, serializer.Meta.model)
+            # La columna de propietario la lee IsOwnerOrStaff en cada objeto
+            owner_field = getattr(self, 'owner_field', None)
+            if owner_field:
+                plan.only.add(owner_field)
+                relation = owner_field.rpartition('__')[0]
+                if relation:
+                    plan.select_related.add(relation)
+            self._query_plans[key] = plan
+        return plan
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not hasattr(self.get_serializer_class(), 'Meta'):
+            return queryset
+        # Las columnas solo se difieren en lecturas para no afectar a save()
+        return self.get_query_plan().apply(queryset, defer=self.request.method in SAFE_METHODS)
@@ -1,4 +1,22 @@
+import unicodedata
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.db.models import DateTimeField, DurationField, ExpressionWrapper, F, Max, Value
+from django.db.models.functions import Coalesce
+
+# Duración de un mes de membresía al calcular vigencias en SQL
+DIAS_POR_MES = 30
+
+def normalizar(texto):
+    """Minúsculas, sin acentos y con espacios simples: 'José  García' -> 'jose garcia'"""
+    texto = texto or ''
+    if texto.isascii():
+        return ' '.join(texto.casefold().split())
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    sin_acentos = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_acentos.casefold().split())
 
 class Membresia(models.Model):
     membresia_id = models.AutoField(primary_key=True)
@@ -20,16 +38,58 @@ class Entrenador(models.Model):
     def __str__(self):
         return self.nombre
 
+class ClaseQuerySet(models.QuerySet):
+    def reservar_cupo(self, clase_id):
+        """
+        Suma un inscrito solo si queda cupo, en un único UPDATE condicional.
+        Debe ejecutarse en la misma transacción que crea la inscripción.
+        """
+        return bool(
+            self.filter(pk=clase_id, inscritos__lt=F('capacidad_max')).update(inscritos=F('inscritos') + 1)
+        )
+
+    def liberar_cupo(self, clase_id):
+        return bool(self.filter(pk=clase_id, inscritos__gt=0).update(inscritos=F('inscritos') - 1))
+
+    def recalcular_inscritos(self):
+        """Corrige el contador desde SocioClase (p. ej. tras borrados en cascada)"""
+        conteo = SocioClase.objects.filter(clase=models.OuterRef('pk')).order_by().values('clase').annotate(
+            total=models.Count('id')
+        ).values('total')
+        return self.update(inscritos=Coalesce(models.Subquery(conteo), 0))
+
 class Clase(models.Model):
     clase_id = models.AutoField(primary_key=True)
     nombre = models.CharField(max_length=50)
     entrenador = models.ForeignKey(Entrenador, on_delete=models.CASCADE)
     horario = models.DateTimeField()
     capacidad_max = models.IntegerField()
+    # Contador de SocioClase mantenido por reservar_cupo/liberar_cupo
+    inscritos = models.PositiveIntegerField(default=0)
+
+    objects = ClaseQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # La paginación keyset desempata por la clave primaria: va al final del índice
+            models.Index(fields=['horario', 'clase_id']),
+            models.Index(fields=['entrenador', 'horario', 'clase_id']),
+        ]
 
     def __str__(self):
         return self.nombre
 
+class SocioQuerySet(models.QuerySet):
+    def con_vigencia(self):
+        """Anota `ultimo_pago` y `vigente_hasta` (último pago + meses de la membresía)"""
+        duracion = ExpressionWrapper(
+            F('membresia__duracion_meses') * Value(timedelta(days=DIAS_POR_MES)),
+            output_field=DurationField(),
+        )
+        return self.annotate(ultimo_pago=Max('pago__fecha_pago')).annotate(
+            vigente_hasta=ExpressionWrapper(F('ultimo_pago') + duracion, output_field=DateTimeField())
+        )
+
 class Socio(models.Model):
     socio_id = models.AutoField(primary_key=True)
     nombre = models.CharField(max_length=100)
@@ -37,10 +97,44 @@ class Socio(models.Model):
     correo = models.EmailField()
     membresia = models.ForeignKey(Membresia, on_delete=models.PROTECT)
     fecha_registro = models.DateTimeField(auto_now_add=True)
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='socio'
+    )
+    suspendido = models.BooleanField(default=False)
+    # Copias normalizadas para búsquedas sin distinguir acentos ni mayúsculas
+    nombre_normalizado = models.CharField(max_length=100, blank=True, default='', editable=False)
+    correo_normalizado = models.CharField(max_length=254, blank=True, default='', editable=False)
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    objects = SocioQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['fecha_registro', 'socio_id']),
+            models.Index(fields=['membresia', 'fecha_registro', 'socio_id']),
+            models.Index(fields=['correo']),
+            models.Index(fields=['actualizado_en']),
+            # varchar_pattern_ops permite usar el índice en LIKE 'prefijo%' en PostgreSQL
+            models.Index(fields=['nombre_normalizado'], opclasses=['varchar_pattern_ops'],
+                         name='core_socio_nombre_norm_idx'),
+            models.Index(fields=['correo_normalizado'], opclasses=['varchar_pattern_ops'],
+                         name='core_socio_correo_norm_idx'),
+        ]
 
     def __str__(self):
         return self.nombre
 
+    def normalizar_campos(self):
+        self.nombre_normalizado = normalizar(self.nombre)
+        self.correo_normalizado = normalizar(self.correo)
+
+    def save(self, *args, **kwargs):
+        self.normalizar_campos()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'nombre_normalizado', 'correo_normalizado', 'actualizado_en'}
+        super().save(*args, **kwargs)
+
 class Pago(models.Model):
     METODOS_PAGO = [
         ('efectivo', 'Efectivo'),
@@ -54,6 +148,16 @@ class Pago(models.Model):
     fecha_pago = models.DateTimeField(auto_now_add=True)
     metodo = models.CharField(max_length=20, choices=METODOS_PAGO)
 
+    class Meta:
+        indexes = [
+            # La paginación keyset ordena por (fecha_pago, pago_id) o (monto, pago_id)
+            models.Index(fields=['fecha_pago', 'pago_id']),
+            # /reportes/ingresos/ agrupa por método dentro del rango de fechas
+            models.Index(fields=['fecha_pago', 'metodo']),
+            models.Index(fields=['monto', 'pago_id']),
+            models.Index(fields=['socio', 'fecha_pago', 'pago_id']),
+        ]
+
     def __str__(self):
         return f'Pago {self.pago_id} - {self.socio.nombre}'
 
@@ -63,6 +167,19 @@ class Asistencia(models.Model):
     fecha_entrada = models.DateTimeField(auto_now_add=True)
     fecha_salida = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['fecha_entrada', 'asistencia_id']),
+            models.Index(fields=['socio', 'fecha_entrada', 'asistencia_id']),
+        ]
+        constraints = [
+            # Una sola visita abierta por socio; el índice parcial se mantiene
+            # pequeño aunque el histórico crezca
+            models.UniqueConstraint(
+                fields=['socio'], condition=models.Q(fecha_salida__isnull=True), name='core_asistencia_abierta_unica'
+            ),
+        ]
+
     def __str__(self):
         return f'Asistencia {self.asistencia_id} - {self.socio.nombre}'
 
@@ -73,6 +190,11 @@ class SocioClase(models.Model):
 
     class Meta:
         unique_together = ('socio', 'clase')
+        indexes = [
+            models.Index(fields=['fecha_inscripcion', 'id']),
+            models.Index(fields=['socio', 'fecha_inscripcion', 'id']),
+            models.Index(fields=['clase', 'fecha_inscripcion', 'id']),
+        ]
 
     def __str__(self):
         return f'{self.socio.nombre} - {self.clase.nombre}'
@@ -92,5 +214,12 @@ class Equipo(models.Model):
     estado = models.CharField(max_length=20, choices=ESTADO_CHOICES)
     ultima_mantenimiento = models.DateField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['fecha_adquisicion', 'equipo_id']),
+            models.Index(fields=['ultima_mantenimiento', 'equipo_id']),
+            models.Index(fields=['estado', 'fecha_adquisicion', 'equipo_id']),
+        ]
+
     def __str__(self):
         return self.nombre
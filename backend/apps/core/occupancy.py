@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Asistencia
+
+OCUPACION_KEY = 'core:ocupacion'
+OCUPACION_TIMEOUT = getattr(settings, 'OCUPACION_CACHE_TIMEOUT', 60 * 60)
+
+
+def contar_ocupacion():
+    """Visitas abiertas en la base de datos (usa el índice parcial de visitas abiertas)"""
+    return Asistencia.objects.filter(fecha_salida__isnull=True).count()
+
+
+def get_ocupacion():
+    """Socios dentro del gimnasio desde la caché; si no está, se cuenta y se guarda"""
+    ocupacion = cache.get(OCUPACION_KEY)
+    if ocupacion is None:
+        ocupacion = contar_ocupacion()
+        cache.add(OCUPACION_KEY, ocupacion, OCUPACION_TIMEOUT)
+    return ocupacion
+
+
+def ajustar_ocupacion(delta):
+    """
+    Suma `delta` al contador al confirmarse la transacción. Si no está en
+    caché no se hace nada: la próxima lectura lo recalcula.
+    """
+    if not delta:
+        return
+
+    def apply():
+        try:
+            if delta > 0:
+                cache.incr(OCUPACION_KEY, delta)
+            else:
+                cache.decr(OCUPACION_KEY, -delta)
+        except ValueError:
+            pass
+
+    transaction.on_commit(apply)
+
+
+def invalidar_ocupacion():
+    transaction.on_commit(lambda: cache.delete(OCUPACION_KEY))
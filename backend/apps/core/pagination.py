@@ -0,0 +1,163 @@
+import json
+from base64 import b64decode, b64encode
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Paginación por cursor sobre una clave compuesta (columna de orden + pk).
+
+    El cursor guarda los valores de la clave de la última fila entregada y la
+    siguiente página se obtiene con un WHERE sobre esa clave, por lo que una
+    página profunda cuesta lo mismo que la primera y nunca se ejecuta COUNT(*).
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.keys = self.get_keys(request, queryset, view)
+        position, reverse = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.get_order_by(reverse))
+        if position is not None:
+            queryset = queryset.filter(self.get_filter(position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        self.has_next = position is not None if reverse else has_more
+        self.has_previous = has_more if reverse else position is not None
+        return self.page
+
+    def get_keys(self, request, queryset, view):
+        """Devuelve la clave de orden como [(campo, descendente, admite_nulos)]"""
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+        if not ordering:
+            ordering = getattr(view, 'ordering', None) or queryset.model._meta.ordering
+        if isinstance(ordering, str):
+            ordering = [ordering]
+
+        opts = queryset.model._meta
+        keys = []
+        for item in ordering or []:
+            descending = item.startswith('-')
+            name = item.lstrip('-')
+            field = opts.pk if name == 'pk' else opts.get_field(name)
+            keys.append((field, descending))
+
+        # La pk desempata filas con el mismo valor en la columna de orden
+        if not any(field.primary_key for field, _ in keys):
+            keys.append((opts.pk, keys[0][1] if keys else False))
+        return [(field, descending, field.null) for field, descending in keys]
+
+    def get_order_by(self, reverse):
+        order_by = []
+        for field, descending, nullable in self.keys:
+            if reverse:
+                descending = not descending
+            expression = F(field.attname)
+            if nullable:
+                # Los nulos van siempre al final en el sentido de avance
+                nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+                order_by.append(expression.desc(**nulls) if descending else expression.asc(**nulls))
+            else:
+                order_by.append(expression.desc() if descending else expression.asc())
+        return order_by
+
+    def get_filter(self, position, reverse):
+        """Construye (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... para la posición dada"""
+        conditions = []
+        equal = Q()
+        for (field, descending, nullable), value in zip(self.keys, position):
+            name = field.attname
+            if reverse:
+                descending = not descending
+            if value is None:
+                beyond = None if not reverse else Q(**{f'{name}__isnull': False})
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                beyond = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+                if nullable and not reverse:
+                    beyond |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            if beyond is not None:
+                conditions.append(equal & beyond)
+            equal &= same
+
+        if not conditions:
+            return Q(pk__in=[])
+        keyset = reduce(or_, conditions)
+
+        # Cota redundante sobre la primera columna para que el índice acote el rango
+        field, descending, nullable = self.keys[0]
+        if not nullable and position[0] is not None:
+            if reverse:
+                descending = not descending
+            keyset &= Q(**{f'{field.attname}__{"lte" if descending else "gte"}': position[0]})
+        return keyset
+
+    def get_position(self, instance):
+        return [
+            None if getattr(instance, field.attname) is None else field.value_to_string(instance)
+            for field, _, _ in self.keys
+        ]
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            data = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position, reverse = data['p'], bool(data.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.keys):
+            raise NotFound(self.invalid_cursor_message)
+
+        # Un cursor de otro orden o manipulado no debe llegar al WHERE
+        try:
+            position = [
+                None if value is None else field.to_python(value)
+                for (field, _, _), value in zip(self.keys, position)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse):
+        data = {'p': position}
+        if reverse:
+            data['r'] = 1
+        encoded = b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
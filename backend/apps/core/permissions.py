@@ -11,9 +11,10 @@ class IsOwnerOrStaff(permissions.BasePermission):
         if request.user.is_staff:
             return True
         
-        if hasattr(obj, 'socio'):
-            return obj.socio.user == request.user
-        elif hasattr(obj, 'user'):
-            return obj.user == request.user
+        # Se comparan ids para no cargar el usuario relacionado
+        if hasattr(obj, 'user_id'):
+            return obj.user_id == request.user.id
+        elif hasattr(obj, 'socio'):
+            return obj.socio.user_id == request.user.id
         
         return False
\ No newline at end of file
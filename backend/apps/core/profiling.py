@@ -0,0 +1,64 @@
+import heapq
+import re
+import time
+
+# Listas IN (...) y VALUES de largo variable se agrupan como una misma consulta
+LISTA_PARAMS = re.compile(r'\((?:%s, )+%s\)')
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+def forma(sql):
+    return LISTA_PARAMS.sub('(...)', sql)
+
+
+class QueryStats:
+    """
+    Wrapper para `connection.execute_wrapper` que cuenta las consultas y
+    suma su tiempo de ejecución. Con `detalle` también cuenta cuántas veces
+    se repite cada SQL y guarda las `lentas` más lentas.
+    """
+
+    def __init__(self, detalle=False, lentas=3):
+        self.count = 0
+        self.tiempo = 0.0
+        self.detalle = detalle
+        self.lentas = lentas
+        self.sqls = {}
+        self._lentas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.tiempo += duracion
+            self.count += 1
+            if self.detalle:
+                # Django pasa los parámetros aparte, así que el SQL ya es la forma de la consulta
+                self.sqls[sql] = self.sqls.get(sql, 0) + 1
+                if len(self._lentas) < self.lentas:
+                    heapq.heappush(self._lentas, (duracion, self.count, sql))
+                elif duracion > self._lentas[0][0]:
+                    heapq.heapreplace(self._lentas, (duracion, self.count, sql))
+
+    def duplicadas(self, minimo=2):
+        """[(forma, veces)] de las consultas ejecutadas al menos `minimo` veces"""
+        formas = {}
+        for sql, veces in self.sqls.items():
+            clave = forma(sql)
+            formas[clave] = formas.get(clave, 0) + veces
+        return sorted(
+            ((clave, veces) for clave, veces in formas.items() if veces >= minimo),
+            key=lambda item: -item[1],
+        )
+
+    def mas_lentas(self):
+        """[(segundos, sql)] de mayor a menor"""
+        return [(duracion, sql) for duracion, _, sql in sorted(self._lentas, reverse=True)]
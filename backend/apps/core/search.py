@@ -0,0 +1,234 @@
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Max
+
+from .models import Socio, normalizar
+
+logger = logging.getLogger(__name__)
+
+# Cada cuánto se consultan los socios modificados y cada cuánto se reconstruye todo
+REFRESH_INTERVAL = getattr(settings, 'SEARCH_REFRESH_INTERVAL', 2)
+REBUILD_INTERVAL = getattr(settings, 'SEARCH_REBUILD_INTERVAL', 60 * 10)
+MAX_RESULTADOS = 10
+
+# Borrados publicados en la caché compartida como lápidas numeradas para que los
+# apliquen todos los procesos; una lápida solo hace falta hasta que cada proceso la
+# lee o reconstruye su índice
+BORRADOS_KEY = 'search:borrados'
+BORRADO_KEY = 'search:borrado:{}'
+BORRADO_TIMEOUT = REBUILD_INTERVAL * 2
+
+CAMPOS = ('socio_id', 'nombre', 'correo', 'nombre_normalizado', 'correo_normalizado', 'actualizado_en')
+
+
+def tokens_de(nombre_normalizado, correo_normalizado):
+    """Palabras del nombre más el correo completo y su parte local"""
+    tokens = set(nombre_normalizado.split())
+    if correo_normalizado:
+        tokens.add(correo_normalizado)
+        tokens.add(correo_normalizado.split('@', 1)[0])
+    return tokens
+
+
+class PrefixIndex:
+    """
+    Índice en memoria de prefijos sobre los socios activos (no suspendidos).
+
+    Guarda una lista ordenada de pares (token, socio_id) y resuelve cada
+    prefijo con bisect. Se actualiza de forma incremental con los socios cuyo
+    `actualizado_en` cambió desde la última lectura y con las lápidas de los
+    socios borrados en cualquier proceso. La reconstrucción periódica se hace
+    en un hilo aparte mientras se sigue respondiendo con el índice anterior.
+
+    Desfase máximo: REFRESH_INTERVAL para altas, cambios y borrados hechos por
+    el ORM (también el cambio de tipo de una membresía). Lo que no pasa por
+    save() ni delete(), como QuerySet.update(), y los borrados de otros procesos
+    cuando la caché es local (core.W001) esperan a la reconstrucción, hasta
+    REBUILD_INTERVAL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = []
+        self._socios = {}
+        self._marca = None
+        self._ultimo_refresco = 0.0
+        self._ultima_reconstruccion = 0.0
+        self._hilo = None
+        # Socios quitados mientras se reconstruye: la lista nueva pudo leerlos antes
+        self._quitados = None
+        # Última lápida de borrado aplicada
+        self._borrados = 0
+
+    def _activos(self):
+        return Socio.objects.filter(suspendido=False).values(*CAMPOS, membresia_tipo=F('membresia__tipo'))
+
+    def _agregar(self, row, socios):
+        tokens = tokens_de(row['nombre_normalizado'], row['correo_normalizado'])
+        socios[row['socio_id']] = {
+            'socio_id': row['socio_id'],
+            'nombre': row['nombre'],
+            'correo': row['correo'],
+            'membresia_tipo': row['membresia_tipo'],
+            'tokens': tokens,
+        }
+        return [(token, row['socio_id']) for token in tokens]
+
+    def _quitar(self, socio_id):
+        socio = self._socios.pop(socio_id, None)
+        if socio is None:
+            return
+        for token in socio['tokens']:
+            posicion = bisect_left(self._entries, (token, socio_id))
+            if posicion < len(self._entries) and self._entries[posicion] == (token, socio_id):
+                del self._entries[posicion]
+
+    def rebuild(self):
+        # Las lápidas se leen antes que los socios: las posteriores se vuelven a aplicar
+        borrados = cache.get(BORRADOS_KEY, 0)
+        marca = Socio.objects.aggregate(marca=Max('actualizado_en'))['marca']
+        socios, entries = {}, []
+        for row in self._activos().iterator(chunk_size=5000):
+            entries.extend(self._agregar(row, socios))
+        entries.sort()
+        with self._lock:
+            self._entries = entries
+            self._socios = socios
+            for socio_id in self._quitados or ():
+                self._quitar(socio_id)
+            # Sin socios la marca queda vacía; se usa una fecha mínima para seguir refrescando
+            self._marca = marca or datetime.min.replace(tzinfo=dt_timezone.utc)
+            self._borrados = borrados
+            self._ultimo_refresco = self._ultima_reconstruccion = time.monotonic()
+
+    def refresh(self):
+        """Aplica los socios modificados desde la última marca"""
+        if self._marca is None:
+            return self.rebuild()
+        cambios = list(
+            Socio.objects.filter(actualizado_en__gte=self._marca)
+            .values(*CAMPOS, 'suspendido', membresia_tipo=F('membresia__tipo'))
+        )
+        with self._lock:
+            for row in cambios:
+                self._quitar(row['socio_id'])
+                if not row['suspendido']:
+                    for entry in self._agregar(row, self._socios):
+                        insort(self._entries, entry)
+                if row['actualizado_en'] > self._marca:
+                    self._marca = row['actualizado_en']
+            self._ultimo_refresco = time.monotonic()
+        self._aplicar_borrados()
+
+    def _aplicar_borrados(self):
+        """Quita los socios de las lápidas publicadas desde la última leída"""
+        ultimo = cache.get(BORRADOS_KEY, 0)
+        if ultimo == self._borrados:
+            return
+        claves = [BORRADO_KEY.format(numero) for numero in range(self._borrados + 1, ultimo + 1)]
+        borrados = cache.get_many(claves)
+        if ultimo < self._borrados or len(borrados) < len(claves):
+            # Contador reiniciado o lápidas caducadas (o todavía sin escribir): no se
+            # sabe qué socios faltan y solo una reconstrucción es fiable
+            self.rebuild_in_background()
+            return
+        with self._lock:
+            for socio_id in borrados.values():
+                self._quitar(socio_id)
+                if self._quitados is not None:
+                    self._quitados.add(socio_id)
+            self._borrados = ultimo
+
+    def rebuild_in_background(self):
+        """Reconstruye en un hilo y cambia el índice al terminar; no hace nada si ya hay una en curso"""
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._quitados = set()
+            self._hilo = threading.Thread(target=self._reconstruir, name='search-rebuild', daemon=True)
+            self._hilo.start()
+
+    def _reconstruir(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception('Error reconstruyendo el índice de búsqueda de socios')
+            with self._lock:
+                # Se reintenta en el siguiente intervalo, no en cada petición
+                self._ultima_reconstruccion = time.monotonic()
+        finally:
+            with self._lock:
+                self._quitados = None
+            connection.close()
+
+    def ensure_fresh(self):
+        if self._marca is None:
+            # Sin índice todavía no hay nada con qué responder: la primera carga espera
+            return self.rebuild()
+        ahora = time.monotonic()
+        if ahora - self._ultima_reconstruccion > REBUILD_INTERVAL:
+            self.rebuild_in_background()
+        if ahora - self._ultimo_refresco > REFRESH_INTERVAL:
+            self.refresh()
+
+    def remove(self, socio_id):
+        with self._lock:
+            self._quitar(socio_id)
+            if self._quitados is not None:
+                self._quitados.add(socio_id)
+
+    def _rango(self, prefijo):
+        inicio = bisect_left(self._entries, (prefijo,))
+        fin = bisect_left(self._entries, (prefijo + '\U0010ffff',))
+        return inicio, fin
+
+    def search(self, texto, limite=MAX_RESULTADOS):
+        terminos = normalizar(texto).split()
+        if not terminos:
+            return []
+        with self._lock:
+            # Se recorre el rango del término más selectivo y se filtra por el resto
+            rangos = {termino: self._rango(termino) for termino in terminos}
+            principal = min(rangos, key=lambda termino: rangos[termino][1] - rangos[termino][0])
+            otros = [termino for termino in terminos if termino != principal]
+
+            resultados, vistos = [], set()
+            inicio, fin = rangos[principal]
+            for posicion in range(inicio, fin):
+                socio_id = self._entries[posicion][1]
+                if socio_id in vistos:
+                    continue
+                vistos.add(socio_id)
+                socio = self._socios[socio_id]
+                if all(any(token.startswith(termino) for token in socio['tokens']) for termino in otros):
+                    resultados.append({k: v for k, v in socio.items() if k != 'tokens'})
+                    if len(resultados) >= limite:
+                        break
+        return resultados
+
+
+_index = PrefixIndex()
+
+
+def buscar_socios(texto, limite=MAX_RESULTADOS):
+    _index.ensure_fresh()
+    return _index.search(texto, limite)
+
+
+def quitar_socio(socio_id):
+    """Quita al socio del índice de este proceso y publica la lápida para el resto"""
+    _index.remove(socio_id)
+    cache.add(BORRADOS_KEY, 0, None)
+    try:
+        numero = cache.incr(BORRADOS_KEY)
+    except ValueError:
+        # El contador se desalojó entre add e incr: los demás lo notan al verlo reiniciado
+        return
+    cache.set(BORRADO_KEY.format(numero), socio_id, BORRADO_TIMEOUT)
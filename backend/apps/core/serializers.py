@@ -26,7 +26,8 @@ class ClaseSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Clase
-        fields = ['clase_id', 'nombre', 'entrenador', 'entrenador_nombre', 'horario', 'capacidad_max']
+        fields = ['clase_id', 'nombre', 'entrenador', 'entrenador_nombre', 'horario', 'capacidad_max', 'inscritos']
+        read_only_fields = ['inscritos']
     
     def validate_capacidad_max(self, value):
         if value <= 0:
@@ -38,7 +39,20 @@ class SocioSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Socio
-        fields = ['socio_id', 'nombre', 'telefono', 'correo', 'membresia', 'membresia_tipo', 'fecha_registro']
+        fields = ['socio_id', 'nombre', 'telefono', 'correo', 'membresia', 'membresia_tipo', 'fecha_registro', 'user',
+                  'suspendido']
+
+    def validate_suspendido(self, value):
+        request = self.context.get('request')
+        if request and not request.user.is_staff and value != getattr(self.instance, 'suspendido', False):
+            raise serializers.ValidationError("Solo el personal puede suspender o reactivar socios.")
+        return value
+
+    def validate_user(self, value):
+        request = self.context.get('request')
+        if request and not request.user.is_staff and value != getattr(self.instance, 'user', None):
+            raise serializers.ValidationError("Solo el personal puede vincular socios a cuentas de usuario.")
+        return value
 
 class PagoSerializer(serializers.ModelSerializer):
     socio_nombre = serializers.CharField(source='socio.nombre', read_only=True)
@@ -59,6 +73,17 @@ class AsistenciaSerializer(serializers.ModelSerializer):
         model = Asistencia
         fields = ['asistencia_id', 'socio', 'socio_nombre', 'fecha_entrada', 'fecha_salida']
 
+    def validate(self, attrs):
+        socio = attrs.get('socio', getattr(self.instance, 'socio', None))
+        fecha_salida = attrs.get('fecha_salida', getattr(self.instance, 'fecha_salida', None))
+        if socio is not None and fecha_salida is None:
+            abiertas = Asistencia.objects.filter(socio=socio, fecha_salida__isnull=True)
+            if self.instance is not None:
+                abiertas = abiertas.exclude(pk=self.instance.pk)
+            if abiertas.exists():
+                raise serializers.ValidationError({'socio': ["El socio ya tiene una visita abierta."]})
+        return attrs
+
 class SocioClaseSerializer(serializers.ModelSerializer):
     socio_nombre = serializers.CharField(source='socio.nombre', read_only=True)
     clase_nombre = serializers.CharField(source='clase.nombre', read_only=True)
@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .access import invalidate_access, invalidate_access_many
+from .models import Clase, Membresia, Pago, Socio, SocioClase
+from .search import quitar_socio
+
+
+@receiver(pre_delete, sender=Socio)
+def guardar_clases_del_socio(sender, instance, **kwargs):
+    # Las inscripciones se borran en cascada sin pasar por liberar_cupo
+    instance._clases_inscritas = list(
+        SocioClase.objects.filter(socio=instance).values_list('clase_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Socio)
+def recalcular_clases_del_socio(sender, instance, **kwargs):
+    clases = getattr(instance, '_clases_inscritas', None)
+    if clases:
+        Clase.objects.filter(pk__in=clases).recalcular_inscritos()
+
+
+# Registro de acceso en caché: se invalida con cualquier escritura por el ORM,
+# no solo desde las vistas (admin, scripts, populate_db)
+
+@receiver(pre_save, sender=Pago)
+def guardar_socio_anterior_del_pago(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance._socio_anterior = Pago.objects.filter(pk=instance.pk).values_list('socio_id', flat=True).first()
+
+
+@receiver(post_save, sender=Pago)
+@receiver(post_delete, sender=Pago)
+def invalidar_acceso_del_pago(sender, instance, **kwargs):
+    anterior = getattr(instance, '_socio_anterior', None)
+    invalidate_access_many({instance.socio_id} | ({anterior} if anterior else set()))
+
+
+@receiver(post_save, sender=Socio)
+@receiver(post_delete, sender=Socio)
+def invalidar_acceso_del_socio(sender, instance, **kwargs):
+    invalidate_access(instance.pk)
+
+
+@receiver(post_save, sender=Membresia)
+def invalidar_acceso_de_la_membresia(sender, instance, created=False, **kwargs):
+    # El tipo y la duración forman parte del registro de cada socio del plan
+    if not created:
+        invalidate_access_many(Socio.objects.filter(membresia=instance).values_list('socio_id', flat=True))
+
+
+# Índice de búsqueda de socios: los borrados se publican a todos los procesos y el
+# cambio de tipo de una membresía marca a sus socios para el refresco incremental
+
+@receiver(post_delete, sender=Socio)
+def quitar_socio_de_la_busqueda(sender, instance, **kwargs):
+    socio_id = instance.pk
+    transaction.on_commit(lambda: quitar_socio(socio_id))
+
+
+@receiver(pre_save, sender=Membresia)
+def guardar_tipo_anterior(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance._tipo_anterior = Membresia.objects.filter(pk=instance.pk).values_list('tipo', flat=True).first()
+
+
+@receiver(post_save, sender=Membresia)
+def marcar_socios_de_la_membresia(sender, instance, created=False, **kwargs):
+    if not created and getattr(instance, '_tipo_anterior', instance.tipo) != instance.tipo:
+        Socio.objects.filter(membresia=instance).update(actualizado_en=timezone.now())
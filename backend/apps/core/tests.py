@@ -1,3 +1,1213 @@
-from django.test import TestCase
+import csv
+import hashlib
+import json
+import random
+import re
+import tempfile
+import threading
+import zipfile
+from base64 import b64encode
+from concurrent.futures import Future
+from contextlib import nullcontext
+from io import BytesIO, StringIO
+from datetime import timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Q
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.Users.models import UserAccount
+from notifications.models import Notification
+
+from . import access, checkin, imports, middleware
+from .access import check_access, get_access_record
+from .checkin import WriteBuffer, registrar_entrada
+from .checks import check_cache_compartida
+from .management.commands import benchmark_booking, benchmark_endpoints
+from .imports import Importador, SocioImportador
+from .models import Asistencia, Clase, Entrenador, Equipo, Membresia, Pago, Socio, SocioClase
+from .search import BORRADO_KEY, PrefixIndex
+from .views import AsistenciaViewSet
+
+SOCIOS = 2000
+PAGOS_POR_SOCIO = 5
+ASISTENCIAS_POR_SOCIO = 10
+
+
+class QueryPlanTests(TestCase):
+    """
+    Ejecuta EXPLAIN sobre las consultas reales de los endpoints con volumen y
+    falla si alguna tabla grande se recorre completa en lugar de usar un índice
+    o si el orden de la paginación keyset necesita ordenar las filas aparte.
+    """
+
+    # Tablas con volumen suficiente para que un recorrido completo sea una regresión
+    TABLAS = ['core_socio', 'core_pago', 'core_asistencia', 'core_socioclase', 'core_clase', 'core_equipo']
+
+    @classmethod
+    def setUpTestData(cls):
+        random.seed(0)
+        ahora = timezone.now()
+        cls.staff = UserAccount.objects.create_superuser(
+            email='planes@gimnasio.test', password='planes', first_name='Planes', last_name='Test'
+        )
+        membresias = Membresia.objects.bulk_create([
+            Membresia(tipo=f'Plan {i}', descripcion='', precio_mensual=10 * (i + 1), duracion_meses=i + 1)
+            for i in range(4)
+        ])
+        entrenadores = Entrenador.objects.bulk_create([
+            Entrenador(nombre=f'Entrenador {i}', especialidad='General', telefono='0', correo=f'e{i}@gimnasio.test')
+            for i in range(20)
+        ])
+        socios = Socio.objects.bulk_create([
+            Socio(nombre=f'Socio {i}', telefono='0', correo=f'socio{i}@gimnasio.test',
+                  membresia=random.choice(membresias))
+            for i in range(SOCIOS)
+        ], batch_size=500)
+        clases = Clase.objects.bulk_create([
+            Clase(nombre=f'Clase {i}', entrenador=random.choice(entrenadores),
+                  horario=ahora + timedelta(hours=i), capacidad_max=30)
+            for i in range(500)
+        ], batch_size=500)
+        Pago.objects.bulk_create([
+            Pago(socio=socio, monto=random.randint(10, 100), metodo=random.choice(['efectivo', 'tarjeta']))
+            for socio in socios for _ in range(PAGOS_POR_SOCIO)
+        ], batch_size=1000)
+        Asistencia.objects.bulk_create([
+            Asistencia(socio=socio, fecha_salida=ahora)
+            for socio in socios for _ in range(ASISTENCIAS_POR_SOCIO)
+        ], batch_size=1000)
+        SocioClase.objects.bulk_create([
+            SocioClase(socio=socio, clase=clase)
+            for socio in socios for clase in random.sample(clases, 3)
+        ], batch_size=1000)
+        Equipo.objects.bulk_create([
+            Equipo(nombre=f'Equipo {i}', descripcion='', fecha_adquisicion=ahora.date() - timedelta(days=i),
+                   estado=random.choice(['disponible', 'mantenimiento', 'reparacion', 'baja']))
+            for i in range(2000)
+        ], batch_size=1000)
+
+        # Estadísticas al día para el planificador
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        cls.socio = socios[0]
+        cls.clase = clases[0]
+        cls.entrenador = entrenadores[0]
+        cls.membresia = membresias[0]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                return '\n'.join(row[-1] for row in cursor.fetchall())
+            cursor.execute(f'EXPLAIN {sql}')
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def full_scans(self, plan):
+        """Tablas grandes recorridas completas según el plan"""
+        if connection.vendor == 'sqlite':
+            # "SCAN tabla" sin índice; "SCAN tabla USING INDEX" recorre el índice en orden
+            patron = r'^\s*SCAN (\w+)(?: AS \w+)?\s*$'
+        elif connection.vendor == 'postgresql':
+            patron = r'Seq Scan on (\w+)'
+        else:
+            self.skipTest(f'Sin reglas de plan para {connection.vendor}')
+        return [tabla for tabla in re.findall(patron, plan, re.MULTILINE) if tabla in self.TABLAS]
+
+    def sorts(self, plan):
+        """Pasos del plan que ordenan filas en lugar de leerlas en orden del índice"""
+        if connection.vendor == 'sqlite':
+            return re.findall(r'USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY', plan)
+        return re.findall(r'^\s*(?:->\s*)?(?:Incremental )?Sort\b', plan, re.MULTILINE)
+
+    def assertIndexedEndpoint(self, url, sin_ordenar=True):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            plan = self.explain(sql)
+            self.assertEqual(self.full_scans(plan), [], f'{url}\n{sql}\n{plan}')
+            if sin_ordenar:
+                self.assertEqual(self.sorts(plan), [], f'{url}\n{sql}\n{plan}')
+
+    def test_socios(self):
+        self.assertIndexedEndpoint('/api/v1/socios/')
+        self.assertIndexedEndpoint(f'/api/v1/socios/?membresia={self.membresia.pk}')
+
+    def test_pagos(self):
+        self.assertIndexedEndpoint('/api/v1/pagos/')
+        self.assertIndexedEndpoint(f'/api/v1/pagos/?socio={self.socio.pk}')
+        self.assertIndexedEndpoint('/api/v1/pagos/?ordering=monto')
+        # Segunda página: el cursor se resuelve con un rango sobre el mismo índice
+        self.assertIndexedEndpoint(self.client.get('/api/v1/pagos/').data['next'])
+
+    def test_ingresos(self):
+        # El GROUP BY por período y método ordena sus grupos: solo se exige el rango por índice
+        self.assertIndexedEndpoint('/api/v1/reportes/ingresos/?agrupar_por=month', sin_ordenar=False)
+
+    def test_asistencias(self):
+        self.assertIndexedEndpoint('/api/v1/asistencias/')
+        self.assertIndexedEndpoint(f'/api/v1/asistencias/?socio={self.socio.pk}')
+        self.assertIndexedEndpoint('/api/v1/asistencias/ocupacion-actual/')
+
+    def test_clases(self):
+        self.assertIndexedEndpoint('/api/v1/clases/')
+        self.assertIndexedEndpoint(f'/api/v1/clases/?entrenador={self.entrenador.pk}')
+        self.assertIndexedEndpoint(f'/api/v1/clases/{self.clase.pk}/disponibilidad/')
+
+    def test_socio_clases(self):
+        self.assertIndexedEndpoint('/api/v1/socio-clases/')
+        self.assertIndexedEndpoint(f'/api/v1/socio-clases/?socio={self.socio.pk}')
+        self.assertIndexedEndpoint(f'/api/v1/socio-clases/?clase={self.clase.pk}')
+
+    def test_equipos(self):
+        self.assertIndexedEndpoint('/api/v1/equipos/')
+        self.assertIndexedEndpoint('/api/v1/equipos/?estado=baja')
+        self.assertIndexedEndpoint('/api/v1/equipos/?ordering=-ultima_mantenimiento')
+
+    def test_verificar_acceso(self):
+        # El GROUP BY de un solo socio devuelve una fila: ordenarla no cuesta nada
+        self.assertIndexedEndpoint(f'/api/v1/socios/{self.socio.pk}/verificar-acceso/', sin_ordenar=False)
+
+
+class KeysetPaginationTests(TestCase):
+    """Recorre listas completas hacia delante y hacia atrás siguiendo los cursores"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = UserAccount.objects.create_superuser(
+            email='cursores@gimnasio.test', password='cursores', first_name='Cursores', last_name='Test'
+        )
+        membresia = Membresia.objects.create(tipo='Plan', descripcion='', precio_mensual=10, duracion_meses=1)
+        socio = Socio.objects.create(nombre='Socio', telefono='0', correo='cursor@gimnasio.test', membresia=membresia)
+        inicio = timezone.now() - timedelta(days=10)
+        # Fechas repetidas para que la pk tenga que desempatar
+        for i, dias in enumerate([0, 1, 1, 2, 3, 3, 3, 5, 8]):
+            pago = Pago.objects.create(socio=socio, monto=10 + i % 4, metodo='efectivo')
+            Pago.objects.filter(pk=pago.pk).update(fecha_pago=inicio + timedelta(days=dias))
+        hoy = timezone.now().date()
+        for i, mantenimiento in enumerate([None, 3, None, 1, 3, None, 2]):
+            Equipo.objects.create(
+                nombre=f'Equipo {i}', descripcion='', estado='disponible', fecha_adquisicion=hoy,
+                ultima_mantenimiento=None if mantenimiento is None else hoy - timedelta(days=mantenimiento),
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def recorrer(self, url, pk):
+        """Devuelve las pks recorriendo hacia delante y luego de vuelta hacia atrás"""
+        adelante, paginas = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            paginas.append([fila[pk] for fila in response.data['results']])
+            adelante += paginas[-1]
+            url, anterior = response.data['next'], response.data['previous']
+
+        atras = []
+        while anterior:
+            response = self.client.get(anterior)
+            self.assertEqual(response.status_code, 200, anterior)
+            atras = [fila[pk] for fila in response.data['results']] + atras
+            anterior = response.data['previous']
+        return adelante, atras + paginas[-1]
+
+    def assertRecorrido(self, url, pk, esperado):
+        adelante, atras = self.recorrer(url, pk)
+        self.assertEqual(adelante, esperado)
+        self.assertEqual(atras, esperado)
+
+    def test_orden_por_defecto(self):
+        esperado = list(Pago.objects.order_by('-fecha_pago', '-pago_id').values_list('pago_id', flat=True))
+        self.assertRecorrido('/api/v1/pagos/?page_size=2', 'pago_id', esperado)
+
+    def test_orden_con_empates(self):
+        esperado = list(Pago.objects.order_by('monto', 'pago_id').values_list('pago_id', flat=True))
+        self.assertRecorrido('/api/v1/pagos/?page_size=2&ordering=monto', 'pago_id', esperado)
+
+    def test_orden_nulable(self):
+        ascendente = list(Equipo.objects.order_by(
+            F('ultima_mantenimiento').asc(nulls_last=True), 'equipo_id'
+        ).values_list('equipo_id', flat=True))
+        self.assertRecorrido('/api/v1/equipos/?page_size=2&ordering=ultima_mantenimiento', 'equipo_id', ascendente)
+
+        descendente = list(Equipo.objects.order_by(
+            F('ultima_mantenimiento').desc(nulls_last=True), '-equipo_id'
+        ).values_list('equipo_id', flat=True))
+        self.assertRecorrido('/api/v1/equipos/?page_size=2&ordering=-ultima_mantenimiento', 'equipo_id', descendente)
+
+    def cursor(self, data):
+        return b64encode(json.dumps(data).encode()).decode()
+
+    def test_cursor_invalido(self):
+        for cursor in ['no-es-base64', self.cursor({'x': 1}), self.cursor({'p': [1]}),
+                       self.cursor({'p': ['notadate', 1]}), self.cursor({'p': [{'a': 1}, 1]}),
+                       self.cursor({'p': ['2024-01-01T00:00:00+00:00', 'uno']})]:
+            response = self.client.get('/api/v1/pagos/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+    def test_cursor_de_otro_orden(self):
+        siguiente = self.client.get('/api/v1/pagos/?page_size=2&ordering=monto').data['next']
+        response = self.client.get(siguiente.replace('ordering=monto', 'ordering=fecha_pago'))
+        self.assertEqual(response.status_code, 404)
+
+
+class QueryPlannerTests(TestCase):
+    """Las listas ejecutan las mismas consultas sea cual sea el tamaño de página"""
+
+    FILAS = 25
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = UserAccount.objects.create_superuser(
+            email='planner@gimnasio.test', password='planner', first_name='Planner', last_name='Test'
+        )
+        membresia = Membresia.objects.create(tipo='Plan', descripcion='', precio_mensual=10, duracion_meses=1)
+        entrenador = Entrenador.objects.create(nombre='Entrenador', especialidad='General', telefono='0',
+                                               correo='planner-e@gimnasio.test')
+        # Cada fila apunta a un socio y una clase distintos para que un N+1 se note
+        socios = Socio.objects.bulk_create([
+            Socio(nombre=f'Socio {i}', telefono='0', correo=f'planner{i}@gimnasio.test', membresia=membresia)
+            for i in range(cls.FILAS)
+        ])
+        clases = Clase.objects.bulk_create([
+            Clase(nombre=f'Clase {i}', entrenador=entrenador, horario=timezone.now(), capacidad_max=30)
+            for i in range(cls.FILAS)
+        ])
+        Pago.objects.bulk_create([Pago(socio=socio, monto=10, metodo='efectivo') for socio in socios])
+        SocioClase.objects.bulk_create([SocioClase(socio=socio, clase=clase) for socio, clase in zip(socios, clases)])
+        Notification.objects.bulk_create([
+            Notification(user=cls.staff, title='Aviso', message='', socio=socio) for socio in socios
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def assertConsultasFijas(self, url, consultas):
+        for page_size in (2, self.FILAS):
+            with self.assertNumQueries(consultas):
+                response = self.client.get(url, {'page_size': page_size})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), page_size)
+
+    def test_pagos(self):
+        self.assertConsultasFijas('/api/v1/pagos/', 1)
+
+    def test_socio_clases(self):
+        self.assertConsultasFijas('/api/v1/socio-clases/', 1)
+
+    def test_notificaciones(self):
+        self.assertConsultasFijas('/api/v1/api/notifications/', 1)
+
+
+class PropietarioTests(TestCase):
+    """Un socio solo ve y modifica sus propias filas; el personal ve todas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = UserAccount.objects.create_superuser(
+            email='staff-prop@gimnasio.test', password='staff', first_name='Staff', last_name='Test'
+        )
+        cls.miembro = UserAccount.objects.create_user(
+            email='miembro@gimnasio.test', password='miembro', first_name='Miembro', last_name='Test'
+        )
+        cls.otro = UserAccount.objects.create_user(
+            email='otro@gimnasio.test', password='otro', first_name='Otro', last_name='Test'
+        )
+        # Cuenta sin socio: la unicidad de Socio.user no bloquearía vincularla
+        cls.libre = UserAccount.objects.create_user(
+            email='libre@gimnasio.test', password='libre', first_name='Libre', last_name='Test'
+        )
+        cls.membresia = Membresia.objects.create(tipo='Plan', descripcion='', precio_mensual=10, duracion_meses=1)
+        entrenador = Entrenador.objects.create(nombre='Entrenador', especialidad='General', telefono='0',
+                                               correo='prop-e@gimnasio.test')
+        clase = Clase.objects.create(nombre='Clase', entrenador=entrenador, horario=timezone.now(), capacidad_max=30)
+        cls.propio = Socio.objects.create(nombre='Propio', telefono='0', correo='propio@gimnasio.test',
+                                          membresia=cls.membresia, user=cls.miembro)
+        cls.ajeno = Socio.objects.create(nombre='Ajeno', telefono='0', correo='ajeno@gimnasio.test',
+                                         membresia=cls.membresia, user=cls.otro)
+        for socio in (cls.propio, cls.ajeno):
+            Pago.objects.create(socio=socio, monto=10, metodo='efectivo')
+            Asistencia.objects.create(socio=socio)
+            SocioClase.objects.create(socio=socio, clase=clase)
+
+    def cliente(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_listas_del_miembro(self):
+        client = self.cliente(self.miembro)
+        for url in ['/api/v1/socios/', '/api/v1/pagos/', '/api/v1/asistencias/', '/api/v1/socio-clases/']:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            socios = {fila.get('socio', fila.get('socio_id')) for fila in response.data['results']}
+            self.assertEqual(socios, {self.propio.socio_id}, url)
+
+    def test_listas_del_personal(self):
+        client = self.cliente(self.staff)
+        for url in ['/api/v1/socios/', '/api/v1/pagos/', '/api/v1/asistencias/', '/api/v1/socio-clases/']:
+            self.assertEqual(len(client.get(url).data['results']), 2, url)
+
+    def test_detalle_ajeno(self):
+        client = self.cliente(self.miembro)
+        self.assertEqual(client.get(f'/api/v1/socios/{self.propio.socio_id}/').status_code, 200)
+        self.assertEqual(client.get(f'/api/v1/socios/{self.ajeno.socio_id}/').status_code, 404)
+        pago = Pago.objects.get(socio=self.ajeno)
+        self.assertEqual(client.get(f'/api/v1/pagos/{pago.pk}/').status_code, 404)
+
+    def test_miembro_no_cambia_la_cuenta(self):
+        client = self.cliente(self.miembro)
+        response = client.patch(f'/api/v1/socios/{self.propio.socio_id}/', {'user': self.libre.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('user', response.data)
+        self.propio.refresh_from_db()
+        self.assertEqual(self.propio.user_id, self.miembro.pk)
+
+        # Sin cambiar la cuenta el resto del socio se puede editar
+        response = client.patch(f'/api/v1/socios/{self.propio.socio_id}/', {'telefono': '1'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_miembro_no_crea_socios_de_otra_cuenta(self):
+        response = self.cliente(self.miembro).post('/api/v1/socios/', {
+            'nombre': 'Nuevo', 'telefono': '0', 'correo': 'nuevo@gimnasio.test',
+            'membresia': self.membresia.pk, 'user': self.libre.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Socio.objects.filter(correo='nuevo@gimnasio.test').exists())
+
+    def test_personal_vincula_cuentas(self):
+        response = self.cliente(self.staff).patch(
+            f'/api/v1/socios/{self.ajeno.socio_id}/', {'user': self.libre.pk}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.ajeno.refresh_from_db()
+        self.assertEqual(self.ajeno.user_id, self.libre.pk)
+
+
+class CupoTests(TestCase):
+    """El contador `inscritos` sigue a SocioClase al inscribir, mover y borrar"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = UserAccount.objects.create_superuser(
+            email='staff-cupo@gimnasio.test', password='staff', first_name='Staff', last_name='Test'
+        )
+        membresia = Membresia.objects.create(tipo='Plan', descripcion='', precio_mensual=10, duracion_meses=1)
+        entrenador = Entrenador.objects.create(nombre='Entrenador', especialidad='General', telefono='0',
+                                               correo='cupo-e@gimnasio.test')
+        cls.llena = Clase.objects.create(nombre='Llena', entrenador=entrenador, horario=timezone.now(),
+                                         capacidad_max=1)
+        cls.libre = Clase.objects.create(nombre='Libre', entrenador=entrenador, horario=timezone.now(),
+                                         capacidad_max=5)
+        cls.socios = [
+            Socio.objects.create(nombre=f'Socio {i}', telefono='0', correo=f'cupo{i}@gimnasio.test',
+                                 membresia=membresia)
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def inscribir(self, socio, clase):
+        return self.client.post('/api/v1/socio-clases/', {'socio': socio.pk, 'clase': clase.pk}, format='json')
+
+    def inscritos(self, clase):
+        return Clase.objects.values_list('inscritos', flat=True).get(pk=clase.pk)
+
+    def test_clase_llena(self):
+        self.assertEqual(self.inscribir(self.socios[0], self.llena).status_code, 201)
+        response = self.inscribir(self.socios[1], self.llena)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('clase', response.data)
+        self.assertEqual(self.inscritos(self.llena), 1)
+        self.assertEqual(SocioClase.objects.filter(clase=self.llena).count(), 1)
+
+    def test_borrar_libera_el_cupo(self):
+        self.inscribir(self.socios[0], self.llena)
+        inscripcion = SocioClase.objects.get(socio=self.socios[0], clase=self.llena)
+        self.assertEqual(self.client.delete(f'/api/v1/socio-clases/{inscripcion.pk}/').status_code, 204)
+        self.assertEqual(self.inscritos(self.llena), 0)
+        self.assertEqual(self.inscribir(self.socios[1], self.llena).status_code, 201)
+
+    def test_mover_de_clase(self):
+        self.inscribir(self.socios[0], self.libre)
+        inscripcion = SocioClase.objects.get(socio=self.socios[0], clase=self.libre)
+        response = self.client.patch(f'/api/v1/socio-clases/{inscripcion.pk}/', {'clase': self.llena.pk},
+                                     format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((self.inscritos(self.libre), self.inscritos(self.llena)), (0, 1))
+
+        # Sin cupo en el destino la inscripción se queda donde estaba
+        self.inscribir(self.socios[1], self.libre)
+        otra = SocioClase.objects.get(socio=self.socios[1], clase=self.libre)
+        response = self.client.patch(f'/api/v1/socio-clases/{otra.pk}/', {'clase': self.llena.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual((self.inscritos(self.libre), self.inscritos(self.llena)), (1, 1))
+
+    def test_borrado_en_cascada_del_socio(self):
+        for clase in (self.llena, self.libre):
+            self.inscribir(self.socios[0], clase)
+        self.inscribir(self.socios[1], self.libre)
+
+        self.socios[0].delete()
+        self.assertEqual((self.inscritos(self.llena), self.inscritos(self.libre)), (0, 1))
+
+
+class CacheCompartidaCheckTests(SimpleTestCase):
+    def test_cache_local(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([aviso.id for aviso in check_cache_compartida(None)], ['core.W001'])
+
+    def test_cache_compartida(self):
+        cache = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379/1'}
+        with override_settings(CACHES={'default': cache}):
+            self.assertEqual(check_cache_compartida(None), [])
+
+
+@patch.object(checkin, 'BATCH_WINDOW', 0)
+class CheckInTests(TestCase):
+    """Una sola visita abierta por socio, también con entradas concurrentes o en lote"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = UserAccount.objects.create_superuser(
+            email='staff-checkin@gimnasio.test', password='staff', first_name='Staff', last_name='Test'
+        )
+        membresia = Membresia.objects.create(tipo='Plan', descripcion='', precio_mensual=10, duracion_meses=1)
+        cls.socios = [
+            Socio.objects.create(nombre=f'Socio {i}', telefono='0', correo=f'checkin{i}@gimnasio.test',
+                                 membresia=membresia)
+            for i in range(2)
+        ]
+        for socio in cls.socios:
+            Pago.objects.create(socio=socio, monto=10, metodo='efectivo')
+
+    def setUp(self):
+        cache.clear()
+        access._local.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def check_in(self, socio):
+        return self.client.post('/api/v1/asistencias/check-in/', {'socio': socio.pk}, format='json')
+
+    def abiertas(self, socio):
+        return Asistencia.objects.filter(socio=socio, fecha_salida__isnull=True).count()
+
+    def test_una_visita_abierta_por_socio(self):
+        Asistencia.objects.create(socio=self.socios[0])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Asistencia.objects.create(socio=self.socios[0])
+        Asistencia.objects.create(socio=self.socios[0], fecha_salida=timezone.now())
+
+    def test_check_in_repetido(self):
+        primera = self.check_in(self.socios[0])
+        self.assertEqual(primera.status_code, 201)
+        segunda = self.check_in(self.socios[0])
+        self.assertEqual(segunda.status_code, 200)
+        self.assertTrue(segunda.data['ya_dentro'])
+        self.assertEqual(segunda.data['asistencia_id'], primera.data['asistencia_id'])
+
+    def test_check_in_concurrente(self):
+        # La otra petición abre la visita después de la comprobación previa
+        original = AsistenciaViewSet.visita_abierta
+        llamadas = []
+
+        def visita_abierta(view, socio_id):
+            llamadas.append(socio_id)
+            if len(llamadas) == 1:
+                Asistencia.objects.create(socio_id=socio_id)
+                return None
+            return original(view, socio_id)
+
+        with patch.object(AsistenciaViewSet, 'visita_abierta', visita_abierta):
+            response = self.check_in(self.socios[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['ya_dentro'])
+        self.assertEqual(self.abiertas(self.socios[0]), 1)
+
+    def test_crear_segunda_visita_abierta(self):
+        Asistencia.objects.create(socio=self.socios[0])
+        response = self.client.post('/api/v1/asistencias/', {'socio': self.socios[0].pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.abiertas(self.socios[0]), 1)
+
+    def test_lote_con_una_fila_invalida(self):
+        Asistencia.objects.create(socio=self.socios[0])
+        lote = [(Asistencia(socio=socio), Future()) for socio in self.socios]
+        with self.assertLogs('apps.core.checkin', 'WARNING'):
+            WriteBuffer(Asistencia, 1, 10)._escribir(lote)
+
+        (_, duplicada), (_, valida) = lote
+        self.assertIsInstance(duplicada.exception(), IntegrityError)
+        self.assertIsNotNone(valida.result().asistencia_id)
+        self.assertEqual([self.abiertas(socio) for socio in self.socios], [1, 1])
+
+    def test_entrada_que_nadie_espera(self):
+        buffer = WriteBuffer(Asistencia, 1, 10)
+        with patch.object(buffer, '_ensure_started'), patch.object(checkin, '_buffer', buffer), \
+                patch.object(checkin, 'BATCH_WINDOW', 0.005), patch.object(checkin, 'RESULT_TIMEOUT', 0.01):
+            response = self.check_in(self.socios[0])
+        self.assertEqual(response.status_code, 503)
+
+        # La petición ya respondió: el hilo descarta la fila en vez de escribirla tarde
+        buffer._escribir([buffer._queue.get_nowait()])
+        self.assertEqual(self.abiertas(self.socios[0]), 0)
+
+    def test_entrada_en_curso_al_agotar_la_espera(self):
+        buffer = WriteBuffer(Asistencia, 1, 10)
+
+        def submit(obj):
+            future = Future()
+            future.set_running_or_notify_cancel()
+            threading.Timer(0.05, future.set_result, [obj]).start()
+            return future
+
+        with patch.object(buffer, 'submit', submit), patch.object(checkin, '_buffer', buffer), \
+                patch.object(checkin, 'BATCH_WINDOW', 0.005), patch.object(checkin, 'RESULT_TIMEOUT', 0.01):
+            asistencia = registrar_entrada(self.socios[0].pk)
+        self.assertEqual(asistencia.socio_id, self.socios[0].pk)
+
+
+class EstadisticasAsistenciaTests(TestCase):
+    """Ocupación y estadísticas de todo el gimnasio: solo personal y consultas fijas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = UserAccount.objects.create_superuser(
+            email='stats@gimnasio.test', password='stats', first_name='Stats', last_name='Test'
+        )
+        cls.usuario = UserAccount.objects.create_user(
+            email='stats-socio@gimnasio.test', password='stats', first_name='Socio', last_name='Test'
+        )
+        membresia = Membresia.objects.create(tipo='Mensual', descripcion='', precio_mensual=10, duracion_meses=1)
+        cls.socios = Socio.objects.bulk_create([
+            Socio(nombre=f'Socio {i}', telefono='0', correo=f'stats{i}@gimnasio.test', membresia=membresia)
+            for i in range(20)
+        ])
+        cls.socios[0].user = cls.usuario
+        cls.socios[0].save()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def crear_visitas(self, socios):
+        # Entradas repartidas en varias horas de hoy, todas cerradas salvo la última
+        ahora = timezone.now()
+        Asistencia.objects.bulk_create([
+            Asistencia(socio=socio, fecha_entrada=ahora - timedelta(minutes=40 * i),
+                       fecha_salida=None if i == len(socios) - 1 else ahora - timedelta(minutes=40 * i - 30))
+            for i, socio in enumerate(socios)
+        ])
+
+    def test_solo_personal(self):
+        self.client.force_authenticate(self.usuario)
+        for url in ('/api/v1/asistencias/ocupacion-actual/', '/api/v1/asistencias/estadisticas/'):
+            self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_perfil_indica_si_es_personal(self):
+        self.client.force_authenticate(self.usuario)
+        response = self.client.patch('/auth/users/me/', {'is_staff': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(response.data['is_staff'], False)
+        self.client.force_authenticate(self.staff)
+        self.assertIs(self.client.get('/auth/users/me/').data['is_staff'], True)
+
+    def test_consultas_fijas(self):
+        for socios in (self.socios[:2], self.socios[2:]):
+            self.crear_visitas(socios)
+            cache.clear()
+            # Agregado del día, entradas por hora, por día de la semana y ocupación
+            with self.assertNumQueries(4):
+                response = self.client.get('/api/v1/asistencias/estadisticas/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(sum(response.data['por_hora']), response.data['total_dia'])
+            with self.assertNumQueries(0):
+                response = self.client.get('/api/v1/asistencias/ocupacion-actual/')
+            self.assertEqual(response.data['ocupacion'], Asistencia.objects.filter(fecha_salida__isnull=True).count())
+
+
+class BusquedaSociosTests(TestCase):
+    """Autocompletado por prefijo sin acentos ni mayúsculas, con refresco incremental"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.membresia = Membresia.objects.create(tipo='Plan', descripcion='', precio_mensual=10, duracion_meses=1)
+        cls.jose = Socio.objects.create(nombre='José Pérez Núñez', telefono='0', correo='Jose.Perez@Gimnasio.test',
+                                        membresia=cls.membresia)
+        cls.maria = Socio.objects.create(nombre='María Ibáñez', telefono='0', correo='maria@gimnasio.test',
+                                         membresia=cls.membresia)
+
+    def setUp(self):
+        cache.clear()
+        self.index = PrefixIndex()
+        self.index.rebuild()
+
+    def ids(self, texto):
+        return [socio['socio_id'] for socio in self.index.search(texto)]
+
+    def test_sin_acentos_ni_mayusculas(self):
+        for texto in ['jose', 'JOSÉ', 'pere', 'nunez', 'Núñ', 'jose.perez@', 'JOSE PER']:
+            self.assertEqual(self.ids(texto), [self.jose.pk], texto)
+        self.assertEqual(self.ids('ibanez'), [self.maria.pk])
+        self.assertEqual(self.ids('jose ibanez'), [])
+        self.assertEqual(self.ids('   '), [])
+
+    def test_refresco_incremental(self):
+        nuevo = Socio.objects.create(nombre='Íñigo Álvarez', telefono='0', correo='inigo@gimnasio.test',
+                                     membresia=self.membresia)
+        self.assertEqual(self.ids('inigo'), [])
+        with self.assertNumQueries(1):
+            self.index.refresh()
+        self.assertEqual(self.ids('alva'), [nuevo.pk])
+
+        self.jose.nombre = 'Josefina Pérez'
+        self.jose.save()
+        self.maria.suspendido = True
+        self.maria.save()
+        self.index.refresh()
+        self.assertEqual(self.ids('josef'), [self.jose.pk])
+        self.assertEqual(self.ids('nunez'), [])
+        self.assertEqual(self.ids('maria'), [])
+
+    def test_quitado_durante_la_reconstruccion(self):
+        # La reconstrucción leyó al socio antes de que se borrara: no debe reaparecer
+        self.index._quitados = set()
+        self.index.remove(self.jose.pk)
+        self.index.rebuild()
+        self.assertEqual(self.ids('jose'), [])
+        self.assertEqual(self.ids('maria'), [self.maria.pk])
+
+    def test_borrado_en_otro_proceso(self):
+        # self.index hace de otro worker: solo se entera por la lápida en la caché compartida
+        socio_id = self.jose.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jose.delete()
+        self.assertEqual(self.ids('jose'), [socio_id])
+        with self.assertNumQueries(1):
+            self.index.refresh()
+        self.assertEqual(self.ids('jose'), [])
+        self.assertEqual(self.ids('maria'), [self.maria.pk])
+
+    def test_lapidas_perdidas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jose.delete()
+            self.maria.delete()
+        cache.delete(BORRADO_KEY.format(1))
+        with patch.object(self.index, 'rebuild_in_background') as reconstruir:
+            self.index.refresh()
+        reconstruir.assert_called_once_with()
+
+    def test_cambio_de_tipo_de_membresia(self):
+        self.membresia.tipo = 'Premium'
+        self.membresia.save()
+        self.index.refresh()
+        # José no es el último modificado: solo entra en el refresco si se marca
+        self.assertEqual([socio['membresia_tipo'] for socio in self.index.search('jose')], ['Premium'])
+
+
+class ReconstruccionBusquedaTests(TransactionTestCase):
+    """La reconstrucción periódica corre en un hilo y no bloquea la petición"""
+
+    def test_reconstruccion_en_segundo_plano(self):
+        membresia = Membresia.objects.create(tipo='Plan', descripcion='', precio_mensual=10, duracion_meses=1)
+        Socio.objects.create(nombre='Ana', telefono='0', correo='ana@gimnasio.test', membresia=membresia)
+        index = PrefixIndex()
+        index.rebuild()
+        nueva = Socio.objects.create(nombre='Beatriz', telefono='0', correo='bea@gimnasio.test', membresia=membresia)
+
+        hilos, original = [], index.rebuild
+
+        def rebuild():
+            hilos.append(threading.current_thread())
+            original()
+
+        with patch('apps.core.search.REBUILD_INTERVAL', 0), patch('apps.core.search.REFRESH_INTERVAL', 3600), \
+                patch.object(index, 'rebuild', rebuild):
+            index.ensure_fresh()
+            hilo = index._hilo
+            hilo.join(timeout=10)
+        self.assertFalse(hilo.is_alive())
+        self.assertEqual(hilos, [hilo])
+        self.assertIsNot(hilo, threading.current_thread())
+        self.assertEqual([socio['socio_id'] for socio in index.search('bea')], [nueva.pk])
+        self.assertIsNone(index._quitados)
+
+
+class ImportacionTests(TestCase):
+    """Importación por bloques con reporte de errores por fila"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = UserAccount.objects.create_superuser(
+            email='staff-import@gimnasio.test', password='staff', first_name='Staff', last_name='Test'
+        )
+        cls.membresia = Membresia.objects.create(tipo='Básica', descripcion='', precio_mensual=10, duracion_meses=1)
+        Socio.objects.create(nombre='Existente', telefono='0', correo='existente@gimnasio.test',
+                             membresia=cls.membresia)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def archivo(self, contenido, nombre='datos.csv'):
+        if isinstance(contenido, str):
+            contenido = contenido.encode()
+        return SimpleUploadedFile(nombre, contenido, content_type='text/csv')
+
+    def importar(self, url, contenido):
+        return self.client.post(url, {'file': self.archivo(contenido)}, format='multipart')
+
+    def test_reporte_de_errores(self):
+        response = self.importar('/api/v1/socios/importar/', (
+            'Nombre;Teléfono;Email;Membresía\n'
+            'Ana;1;ana@gimnasio.test;basica\n'
+            'Beto;2;no-es-correo;Básica\n'
+            'Ana bis;3;ANA@gimnasio.test;Básica\n'
+            'Caro;4;existente@gimnasio.test;Básica\n'
+            'Dani;5;dani@gimnasio.test;Premium\n'
+            ';6;eva@gimnasio.test;Básica\n'
+            '\n'
+            f'Fede;7;fede@gimnasio.test;{self.membresia.pk}\n'
+        ))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            {k: response.data[k] for k in ('filas', 'creados', 'con_errores', 'errores_omitidos')},
+            {'filas': 7, 'creados': 2, 'con_errores': 5, 'errores_omitidos': 0},
+        )
+        self.assertEqual({error['fila']: set(error['errores']) for error in response.data['errores']}, {
+            3: {'correo'}, 4: {'correo'}, 5: {'correo'}, 6: {'membresia'}, 7: {'nombre'},
+        })
+        correos = {error['fila']: error['errores'].get('correo') for error in response.data['errores']}
+        self.assertEqual(correos[4], 'Correo duplicado en el archivo.')
+        self.assertEqual(correos[5], 'Ya existe un socio con este correo.')
+        ana = Socio.objects.get(correo='ana@gimnasio.test')
+        self.assertEqual((ana.membresia_id, ana.nombre_normalizado), (self.membresia.pk, 'ana'))
+        self.assertTrue(Socio.objects.filter(correo='fede@gimnasio.test').exists())
+
+    def test_duplicados_entre_bloques(self):
+        with patch.object(imports, 'CHUNK_SIZE', 2):
+            response = self.importar('/api/v1/socios/importar/', (
+                'nombre,telefono,correo,membresia\n'
+                'Ana,1,ana@gimnasio.test,Básica\n'
+                'Beto,2,beto@gimnasio.test,Básica\n'
+                'Ana otra vez,3,ana@gimnasio.test,Básica\n'
+            ))
+        self.assertEqual(response.data['creados'], 2)
+        self.assertEqual([error['fila'] for error in response.data['errores']], [4])
+
+    def test_equipos(self):
+        response = self.importar('/api/v1/equipos/importar/', (
+            'nombre,estado,fecha de adquisicion,ultimo mantenimiento\n'
+            'Cinta,Disponible,2024-01-15,15/02/2024\n'
+            'Banco,rota,2024-01-15,\n'
+            'Remo,mantenimiento,15-01-2024,\n'
+        ))
+        self.assertEqual(response.data['creados'], 1)
+        self.assertEqual({error['fila']: set(error['errores']) for error in response.data['errores']},
+                         {3: {'estado'}, 4: {'fecha_adquisicion'}})
+        cinta = Equipo.objects.get(nombre='Cinta')
+        self.assertEqual((cinta.estado, str(cinta.ultima_mantenimiento)), ('disponible', '2024-02-15'))
+
+    def test_archivo_invalido(self):
+        response = self.importar('/api/v1/socios/importar/', 'nombre,correo\nAna,ana@gimnasio.test\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('membresia', response.data['file'])
+
+        # Un byte inválido al final rechaza el archivo sin crear las filas anteriores
+        with patch.object(imports, 'CHUNK_SIZE', 1):
+            response = self.importar('/api/v1/socios/importar/', (
+                'nombre,telefono,correo,membresia\n'
+                'Ana,1,ana@gimnasio.test,Básica\n'
+                'Beto,2,beto@gimnasio.test,Básica\n'
+            ).encode() + b'Caro,3,caro@gimnasio.test,B\xe1sica\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Socio.objects.filter(correo__in=['ana@gimnasio.test', 'beto@gimnasio.test']).exists())
+
+    def test_bloques_confirmados_por_separado(self):
+        # Sin una transacción exterior, un fallo en un bloque no deshace los anteriores
+        importador = SocioImportador()
+        original = importador.validar_bloque
+        bloques = []
+
+        def validar_bloque(bloque):
+            bloques.append(bloque)
+            if len(bloques) == 2:
+                raise RuntimeError('fallo del bloque')
+            return original(bloque)
+
+        contenido = 'nombre,telefono,correo,membresia\nAna,1,ana@gimnasio.test,Básica\nBeto,2,beto@gimnasio.test,Básica\n'
+        with patch.object(imports, 'CHUNK_SIZE', 1), patch.object(importador, 'validar_bloque', validar_bloque):
+            with self.assertRaises(RuntimeError):
+                importador.ejecutar(self.archivo(contenido))
+        self.assertTrue(Socio.objects.filter(correo='ana@gimnasio.test').exists())
+
+    def test_importador_abstracto(self):
+        with self.assertRaises(TypeError):
+            Importador()
+
+
+class ExportacionTests(TestCase):
+    """Exportaciones en streaming a CSV y XLSX sobre el queryset filtrado"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = UserAccount.objects.create_superuser(
+            email='staff-export@gimnasio.test', password='staff', first_name='Staff', last_name='Test'
+        )
+        cls.miembro = UserAccount.objects.create_user(
+            email='miembro-export@gimnasio.test', password='miembro', first_name='Miembro', last_name='Test'
+        )
+        cls.basica = Membresia.objects.create(tipo='Básica', descripcion='', precio_mensual=10, duracion_meses=1)
+        premium = Membresia.objects.create(tipo='Premium', descripcion='', precio_mensual=30, duracion_meses=1)
+        cls.ana = Socio.objects.create(nombre='Ana "La" Núñez', telefono='1', correo='ana@gimnasio.test',
+                                       membresia=cls.basica)
+        cls.beto = Socio.objects.create(nombre='Beto & <Co>\x01', telefono='2', correo='beto@gimnasio.test',
+                                        membresia=premium, suspendido=True)
+        Pago.objects.create(socio=cls.ana, monto='12.50', metodo='tarjeta')
+        Pago.objects.create(socio=cls.beto, monto=30, metodo='efectivo')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def descargar(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv(self):
+        with self.assertNumQueries(1):
+            response, contenido = self.descargar('/api/v1/socios/exportar/?ordering=fecha_registro')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertRegex(response['Content-Disposition'], r'^attachment; filename="socios-\d{4}-\d{2}-\d{2}\.csv"$')
+        self.assertTrue(contenido.startswith('\ufeff'.encode()))
+
+        filas = list(csv.reader(contenido.decode('utf-8-sig').splitlines()))
+        self.assertEqual(filas[0], ['ID', 'Nombre', 'Teléfono', 'Correo', 'Membresía', 'Fecha de registro',
+                                    'Suspendido'])
+        self.assertEqual([fila[1:5] + fila[6:] for fila in filas[1:]], [
+            ['Ana "La" Núñez', '1', 'ana@gimnasio.test', 'Básica', 'No'],
+            ['Beto & <Co>\x01', '2', 'beto@gimnasio.test', 'Premium', 'Sí'],
+        ])
+
+    def test_csv_filtrado(self):
+        _, contenido = self.descargar(f'/api/v1/socios/exportar/?membresia={self.basica.pk}')
+        self.assertEqual(len(contenido.decode('utf-8-sig').splitlines()), 2)
+        self.assertIn('ana@gimnasio.test', contenido.decode())
+
+    def test_xlsx(self):
+        response, contenido = self.descargar('/api/v1/pagos/exportar/?format=xlsx&ordering=monto')
+        self.assertEqual(response['Content-Type'],
+                         'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        self.assertTrue(response['Content-Disposition'].endswith('.xlsx"'))
+
+        with zipfile.ZipFile(BytesIO(contenido)) as libro:
+            self.assertIsNone(libro.testzip())
+            self.assertIn('xl/workbook.xml', libro.namelist())
+            hoja = libro.read('xl/worksheets/sheet1.xml').decode()
+        filas = re.findall(r'<row>(.*?)</row>', hoja)
+        self.assertEqual(len(filas), 3)
+        self.assertIn('<t xml:space="preserve">Método</t>', filas[0])
+        # Números como valores; texto escapado y sin caracteres de control
+        self.assertIn('<c><v>12.50</v></c>', filas[1])
+        self.assertIn('<c><v>30.00</v></c>', filas[2])
+        self.assertIn('Beto &amp; &lt;Co&gt;</t>', filas[2])
+
+    def test_formulas_neutralizadas(self):
+        Socio.objects.create(nombre='=HYPERLINK("http://malo.test","clic")', telefono='+34 600', correo='f@gimnasio.test',
+                             membresia=self.basica)
+        _, contenido = self.descargar('/api/v1/socios/exportar/?ordering=-fecha_registro')
+        fila = next(csv.reader(contenido.decode('utf-8-sig').splitlines()[1:]))
+        self.assertEqual(fila[1:3], ['\'=HYPERLINK("http://malo.test","clic")', "'+34 600"])
+
+        _, contenido = self.descargar('/api/v1/socios/exportar/?format=xlsx&ordering=-fecha_registro')
+        with zipfile.ZipFile(BytesIO(contenido)) as libro:
+            hoja = libro.read('xl/worksheets/sheet1.xml').decode()
+        self.assertIn('<t xml:space="preserve">\'=HYPERLINK(', hoja)
+        self.assertNotIn('<t xml:space="preserve">=', hoja)
+
+        # Los números negativos siguen siendo números
+        Pago.objects.create(socio=self.ana, monto=-5, metodo='efectivo')
+        _, contenido = self.descargar('/api/v1/pagos/exportar/?ordering=monto')
+        self.assertIn(',-5.00,', contenido.decode())
+
+    def test_formato_y_permisos(self):
+        response = self.client.get('/api/v1/pagos/exportar/?format=pdf')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('format', response.data)
+
+        self.client.force_authenticate(self.miembro)
+        self.assertEqual(self.client.get('/api/v1/socios/exportar/').status_code, 403)
+
+
+class ServerTimingTests(TestCase):
+    """La cabecera Server-Timing solo se envía si está activada"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = UserAccount.objects.create_superuser(
+            email='staff-timing@gimnasio.test', password='staff', first_name='Staff', last_name='Test'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_desactivada(self):
+        with patch.object(middleware, 'SERVER_TIMING', False):
+            response = self.client.get('/api/v1/membresias/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Server-Timing', response)
+
+    def test_activada(self):
+        with patch.object(middleware, 'SERVER_TIMING', True):
+            response = self.client.get('/api/v1/membresias/')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ consultas", app;dur=')
+
+
+class InvalidacionAccesoTests(TestCase):
+    """El registro de acceso en caché se descarta con cualquier escritura por el ORM"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.membresia = Membresia.objects.create(tipo='Mensual', descripcion='', precio_mensual=10, duracion_meses=1)
+        cls.socio = Socio.objects.create(nombre='Socio', telefono='0', correo='acceso@gimnasio.test',
+                                         membresia=cls.membresia)
+        cls.otro = Socio.objects.create(nombre='Otro', telefono='0', correo='acceso-otro@gimnasio.test',
+                                        membresia=cls.membresia)
+
+    def setUp(self):
+        cache.clear()
+        access._local.clear()
+
+    def acceso(self, socio):
+        return check_access(get_access_record(socio.pk))
+
+    def escribir(self, funcion):
+        with self.captureOnCommitCallbacks(execute=True):
+            return funcion()
+
+    def test_pago_por_el_orm(self):
+        self.assertEqual(self.acceso(self.socio), (False, 'sin_pago'))
+        pago = self.escribir(lambda: Pago.objects.create(socio=self.socio, monto=10, metodo='efectivo'))
+        self.assertEqual(self.acceso(self.socio), (True, None))
+
+        # El pago pasa a otro socio: se invalidan los dos registros
+        self.assertEqual(self.acceso(self.otro), (False, 'sin_pago'))
+        pago.socio = self.otro
+        self.escribir(pago.save)
+        self.assertEqual((self.acceso(self.socio), self.acceso(self.otro)), ((False, 'sin_pago'), (True, None)))
+
+        self.escribir(pago.delete)
+        self.assertEqual(self.acceso(self.otro), (False, 'sin_pago'))
+
+    def test_socio_suspendido_por_el_orm(self):
+        Pago.objects.create(socio=self.socio, monto=10, metodo='efectivo')
+        self.assertEqual(self.acceso(self.socio), (True, None))
+        self.socio.suspendido = True
+        self.escribir(self.socio.save)
+        self.assertEqual(self.acceso(self.socio), (False, 'suspendido'))
+
+    def test_cambio_de_duracion_de_la_membresia(self):
+        pago = Pago.objects.create(socio=self.socio, monto=10, metodo='efectivo')
+        Pago.objects.filter(pk=pago.pk).update(fecha_pago=timezone.now() - timedelta(days=45))
+        self.assertEqual(self.acceso(self.socio), (False, 'vencida'))
+
+        self.membresia.duracion_meses = 2
+        self.escribir(self.membresia.save)
+        self.assertEqual(self.acceso(self.socio), (True, None))
+        self.assertEqual(get_access_record(self.socio.pk)['membresia_tipo'], 'Mensual')
+
+
+@patch.object(benchmark_booking.Command, 'base_temporal', lambda self: nullcontext())
+class BenchmarkBookingTests(TransactionTestCase):
+    """Prueba de humo del benchmark de inscripciones sobre la base de los tests"""
+
+    def ejecutar(self, **opciones):
+        with tempfile.NamedTemporaryFile(suffix='.json') as salida:
+            call_command('benchmark_booking', output=salida.name, stdout=StringIO(), **opciones)
+            with open(salida.name, encoding='utf-8') as archivo:
+                return json.load(archivo)
+
+    def test_reporte(self):
+        # Un solo hilo: la base en memoria de los tests no admite escrituras concurrentes
+        reporte = self.ejecutar(requests=8, threads=1, capacidad=3)
+        self.assertEqual(reporte['respuestas'], {'201': 3, '400': 5})
+        self.assertEqual(reporte['errores'], 0)
+        self.assertEqual((reporte['inscritos'], reporte['inscripciones'], reporte['sobreventa']), (3, 3, False))
+        self.assertGreater(reporte['latencia_ms']['p50'], 0)
+
+    def test_errores_hacen_fallar_el_comando(self):
+        with patch('apps.core.views.SocioClaseViewSet.perform_create', side_effect=RuntimeError('fallo')):
+            with self.assertRaisesMessage(CommandError, '4 respuestas con error'):
+                call_command('benchmark_booking', requests=4, threads=1, capacidad=2, stdout=StringIO())
+
+
+class GenerarDatasetTests(TestCase):
+    """generate_dataset: misma semilla y fecha dan los mismos datos, y las filas son coherentes"""
+    MODELOS = [Membresia, Entrenador, Socio, Pago, Asistencia, Clase, SocioClase, Equipo]
+
+    def generar(self, seed=7):
+        call_command('generate_dataset', scale=40, seed=seed, until='2026-03-15', stdout=StringIO())
+
+    def huella(self):
+        """Filas y checksum de cada tabla generada"""
+        huella = {}
+        for model in self.MODELOS:
+            filas = list(model.objects.order_by('pk').values_list())
+            huella[model.__name__] = (len(filas), hashlib.sha256(repr(filas).encode()).hexdigest())
+        return huella
+
+    def generar_y_deshacer(self, seed=7):
+        with transaction.atomic():
+            self.generar(seed)
+            huella = self.huella()
+            transaction.set_rollback(True)
+        return huella
+
+    def test_determinista(self):
+        primera = self.generar_y_deshacer()
+        self.assertGreater(primera['Socio'][0], 0)
+        self.assertEqual(self.generar_y_deshacer(), primera)
+        self.assertNotEqual(self.generar_y_deshacer(seed=8), primera)
+
+    def test_filas_coherentes(self):
+        self.generar()
+        self.assertFalse(
+            Clase.objects.annotate(reales=Count('socioclase')).exclude(inscritos=F('reales')).exists()
+        )
+        self.assertFalse(
+            Socio.objects.annotate(abiertas=Count('asistencia', filter=Q(asistencia__fecha_salida__isnull=True)))
+            .filter(abiertas__gt=1).exists()
+        )
+        # Cada socio se inscribe una vez por clase y antes de que empiece
+        self.assertFalse(SocioClase.objects.values('socio', 'clase').annotate(n=Count('id')).filter(n__gt=1).exists())
+        self.assertFalse(SocioClase.objects.filter(fecha_inscripcion__gt=F('clase__horario')).exists())
+
+
+class CerrarVisitasTests(TestCase):
+    """close_stale_visits cierra solo las visitas abiertas más allá de --hours"""
+
+    @classmethod
+    def setUpTestData(cls):
+        membresia = Membresia.objects.create(tipo='Mensual', descripcion='', precio_mensual=10, duracion_meses=1)
+        cls.socios = Socio.objects.bulk_create([
+            Socio(nombre=f'Socio {i}', telefono='0', correo=f'cierre{i}@gimnasio.test', membresia=membresia)
+            for i in range(4)
+        ])
+
+    def visita(self, socio, horas, salida=None):
+        # fecha_entrada es auto_now_add: se retrasa después de crear la visita
+        asistencia = Asistencia.objects.create(socio=socio, fecha_salida=salida)
+        Asistencia.objects.filter(pk=asistencia.pk).update(fecha_entrada=timezone.now() - timedelta(hours=horas))
+        asistencia.refresh_from_db()
+        return asistencia
+
+    def test_corte_por_horas(self):
+        vieja = self.visita(self.socios[0], 30)
+        pasada = self.visita(self.socios[1], 7)
+        reciente = self.visita(self.socios[2], 5)
+        cerrada_antes = self.visita(self.socios[3], 40, salida=timezone.now() - timedelta(hours=39))
+        salida = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('close_stale_visits', hours=6, stdout=salida)
+        self.assertEqual(salida.getvalue().strip(), '2 visitas cerradas')
+
+        # La salida se fija en la entrada más las horas de corte, no en el momento de la ejecución
+        for visita in (vieja, pasada):
+            visita.refresh_from_db()
+            self.assertEqual(visita.fecha_salida, visita.fecha_entrada + timedelta(hours=6))
+        reciente.refresh_from_db()
+        self.assertIsNone(reciente.fecha_salida)
+        salida_anterior = cerrada_antes.fecha_salida
+        cerrada_antes.refresh_from_db()
+        self.assertEqual(cerrada_antes.fecha_salida, salida_anterior)
+
+        # Con un corte mayor ya no queda nada por cerrar dentro de la ventana
+        call_command('close_stale_visits', hours=12, stdout=salida)
+        self.assertTrue(salida.getvalue().endswith('0 visitas cerradas\n'))
+        self.assertEqual(Asistencia.objects.filter(fecha_salida__isnull=True).count(), 1)
+
+    def test_invalida_la_ocupacion(self):
+        self.visita(self.socios[0], 30)
+        with patch('apps.core.management.commands.close_stale_visits.invalidar_ocupacion') as invalidar:
+            call_command('close_stale_visits', hours=12, stdout=StringIO())
+            invalidar.assert_called_once_with()
+            invalidar.reset_mock()
+            call_command('close_stale_visits', hours=12, stdout=StringIO())
+            invalidar.assert_not_called()
+
+
+@patch.object(benchmark_endpoints.Command, 'base_temporal', lambda self: nullcontext())
+class BenchmarkEndpointsTests(TestCase):
+    """Prueba de humo de benchmark_endpoints con --baseline sobre la base de los tests"""
+
+    def ejecutar(self, baseline):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta_baseline = f'{directorio}/baseline.json'
+            with open(ruta_baseline, 'w', encoding='utf-8') as archivo:
+                json.dump(baseline, archivo)
+            salida = StringIO()
+            try:
+                call_command('benchmark_endpoints', scale=30, iterations=2, warmup=0, only='membresias-list',
+                             output=f'{directorio}/reporte.json', baseline=ruta_baseline, threshold=1.25,
+                             stdout=salida)
+            finally:
+                self.salida = salida.getvalue()
+            with open(f'{directorio}/reporte.json', encoding='utf-8') as archivo:
+                return json.load(archivo)
+
+    def baseline(self, p50_ms, queries):
+        return {'meta': {'commit': 'abc1234'}, 'endpoints': {
+            'membresias-list': {'p50_ms': p50_ms, 'queries': queries},
+            'endpoint-retirado': {'p50_ms': 1, 'queries': 1},
+        }}
+
+    def test_sin_regresion(self):
+        reporte = self.ejecutar(self.baseline(p50_ms=10 ** 6, queries=100))
+        self.assertEqual(list(reporte['endpoints']), ['membresias-list'])
+        self.assertEqual(reporte['endpoints']['membresias-list']['status'], 200)
+        self.assertIn('Comparación con abc1234', self.salida)
+
+    def test_regresion(self):
+        # Un baseline con menos consultas marca regresión sin depender de los tiempos
+        with self.assertRaisesMessage(CommandError, '1 endpoints con regresión: membresias-list'):
+            self.ejecutar(self.baseline(p50_ms=10 ** 6, queries=0))
+        self.assertRegex(self.salida, r'membresias-list .* consultas   0 -> +\d+')
+
+    def test_umbral_de_latencia(self):
+        comando = benchmark_endpoints.Command(stdout=StringIO())
+        baseline = {'meta': {}, 'endpoints': {
+            'lento': {'p50_ms': 10, 'queries': 2}, 'ruido': {'p50_ms': 0.2, 'queries': 2},
+            'dentro': {'p50_ms': 10, 'queries': 2},
+        }}
+        reporte = {'endpoints': {
+            # 1.5x y +5 ms; 3x pero solo +0.4 ms; 1.2x por debajo del umbral
+            'lento': {'p50_ms': 15, 'queries': 2}, 'ruido': {'p50_ms': 0.6, 'queries': 2},
+            'dentro': {'p50_ms': 12, 'queries': 2},
+        }}
+        self.assertEqual(comando.comparar(baseline, reporte, 1.25), ['lento'])
@@ -1,11 +1,76 @@
-from rest_framework import viewsets, filters
-from rest_framework.permissions import IsAuthenticated
+from datetime import datetime, time, timedelta
+
+from rest_framework import filters, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, F, Q
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import *
 from .serializers import *
+from .access import check_access, get_access_record
+from .checkin import registrar_entrada
+from .exports import FORMATOS, ExportNegotiation, exportar
+from .filters import IsOwnerOrStaffFilter, NormalizedSearchFilter
+from .imports import ArchivoInvalido, EquipoImportador, SocioImportador
+from .mixins import QueryPlannerMixin
+from .occupancy import ajustar_ocupacion, get_ocupacion, invalidar_ocupacion
 from .permissions import IsAdminOrReadOnly, IsOwnerOrStaff
+from .search import buscar_socios
+
+
+def get_access_for_request(request, socio_id):
+    """Registro de acceso del socio; un socio que no es personal solo ve el suyo"""
+    try:
+        record = get_access_record(int(socio_id))
+    except (TypeError, ValueError):
+        record = None
+    if record is None or not (request.user.is_staff or record['user_id'] == request.user.id):
+        raise NotFound()
+    return record
+
+
+def export_response(viewset, request, columnas, nombre):
+    """Exporta el queryset filtrado de la vista en el formato pedido con ?format="""
+    formato = request.query_params.get('format', 'csv').lower()
+    if formato not in FORMATOS:
+        raise ValidationError({'format': f'Formato no soportado. Use uno de: {", ".join(FORMATOS)}'})
+    queryset = viewset.filter_queryset(viewset.get_queryset())
+    return exportar(queryset, columnas, formato, nombre)
 
-class MembresiaViewSet(viewsets.ModelViewSet):
+
+def import_response(request, importador):
+    """Importa el CSV subido en el campo `file` y devuelve el reporte por fila"""
+    archivo = request.FILES.get('file')
+    if archivo is None:
+        raise ValidationError({'file': 'Debe adjuntar un archivo CSV.'})
+    try:
+        reporte = importador.ejecutar(archivo)
+    except ArchivoInvalido as exc:
+        raise ValidationError({'file': str(exc)})
+    return Response(reporte, status=status.HTTP_201_CREATED if reporte['creados'] else status.HTTP_200_OK)
+
+# Columnas (encabezado, campo) de cada exportación
+COLUMNAS_SOCIOS = [
+    ('ID', 'socio_id'), ('Nombre', 'nombre'), ('Teléfono', 'telefono'), ('Correo', 'correo'),
+    ('Membresía', 'membresia__tipo'), ('Fecha de registro', 'fecha_registro'), ('Suspendido', 'suspendido'),
+]
+COLUMNAS_PAGOS = [
+    ('ID', 'pago_id'), ('Socio', 'socio__nombre'), ('Correo', 'socio__correo'),
+    ('Monto', 'monto'), ('Método', 'metodo'), ('Fecha de pago', 'fecha_pago'),
+]
+COLUMNAS_EQUIPOS = [
+    ('ID', 'equipo_id'), ('Nombre', 'nombre'), ('Descripción', 'descripcion'), ('Estado', 'estado'),
+    ('Fecha de adquisición', 'fecha_adquisicion'), ('Último mantenimiento', 'ultima_mantenimiento'),
+]
+
+class MembresiaViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     queryset = Membresia.objects.all()
     serializer_class = MembresiaSerializer
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
@@ -13,25 +78,66 @@ class MembresiaViewSet(viewsets.ModelViewSet):
     filterset_fields = ['tipo', 'duracion_meses']
     search_fields = ['tipo']
     ordering_fields = ['precio_mensual', 'duracion_meses']
+    ordering = ['membresia_id']
 
-class SocioViewSet(viewsets.ModelViewSet):
+class SocioViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     queryset = Socio.objects.all()
     serializer_class = SocioSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrStaff]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, NormalizedSearchFilter, filters.OrderingFilter, IsOwnerOrStaffFilter]
+    owner_field = 'user'
     filterset_fields = ['membresia', 'fecha_registro']
-    search_fields = ['nombre', 'correo']
+    search_fields = ['nombre_normalizado', 'correo_normalizado']
     ordering_fields = ['fecha_registro']
+    ordering = ['-fecha_registro']
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser])
+    def buscar(self, request):
+        """Autocompletado de socios activos por prefijo, sin distinguir acentos"""
+        return Response(buscar_socios(request.query_params.get('q', '')))
 
-class PagoViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser],
+            content_negotiation_class=ExportNegotiation)
+    def exportar(self, request):
+        """Listado de socios en CSV o XLSX, generado en streaming"""
+        return export_response(self, request, COLUMNAS_SOCIOS, 'socios')
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsAdminUser],
+            parser_classes=[MultiPartParser, FormParser])
+    def importar(self, request):
+        """Alta masiva de socios desde CSV (nombre, telefono, correo, membresia)"""
+        return import_response(request, SocioImportador())
+
+    @action(detail=True, methods=['get'], url_path='verificar-acceso')
+    def verificar_acceso(self, request, pk=None):
+        """Acceso del socio resuelto desde caché, sin consultas en un acierto"""
+        record = get_access_for_request(request, pk)
+        acceso, motivo = check_access(record)
+        return Response({
+            'socio_id': record['socio_id'],
+            'acceso': acceso,
+            'motivo': motivo,
+            'membresia': record['membresia_tipo'],
+            'vigente_hasta': record['vigente_hasta'],
+        })
+
+class PagoViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     queryset = Pago.objects.all()
     serializer_class = PagoSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrStaff]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, IsOwnerOrStaffFilter]
+    owner_field = 'socio__user'
     filterset_fields = ['socio', 'fecha_pago', 'metodo']
     ordering_fields = ['fecha_pago', 'monto']
+    ordering = ['-fecha_pago']
 
-class EntrenadorViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser],
+            content_negotiation_class=ExportNegotiation)
+    def exportar(self, request):
+        """Pagos filtrados en CSV o XLSX, generados en streaming"""
+        return export_response(self, request, COLUMNAS_PAGOS, 'pagos')
+
+class EntrenadorViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     queryset = Entrenador.objects.all()
     serializer_class = EntrenadorSerializer
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
@@ -39,7 +145,7 @@ class EntrenadorViewSet(viewsets.ModelViewSet):
     filterset_fields = ['especialidad']
     search_fields = ['nombre', 'especialidad']
 
-class ClaseViewSet(viewsets.ModelViewSet):
+class ClaseViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     queryset = Clase.objects.all()
     serializer_class = ClaseSerializer
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
@@ -47,28 +153,210 @@ class ClaseViewSet(viewsets.ModelViewSet):
     filterset_fields = ['entrenador', 'horario']
     search_fields = ['nombre']
     ordering_fields = ['horario']
+    ordering = ['horario']
+
+    @action(detail=True, methods=['get'])
+    def disponibilidad(self, request, pk=None):
+        """Cupos de la clase leídos del contador, sin contar inscripciones"""
+        clase = Clase.objects.filter(pk=pk).values('clase_id', 'capacidad_max', 'inscritos').first()
+        if clase is None:
+            raise NotFound()
+        disponibles = max(clase['capacidad_max'] - clase['inscritos'], 0)
+        return Response({**clase, 'disponibles': disponibles, 'llena': disponibles == 0})
 
-class SocioClaseViewSet(viewsets.ModelViewSet):
+class SocioClaseViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     queryset = SocioClase.objects.all()
     serializer_class = SocioClaseSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrStaff]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, IsOwnerOrStaffFilter]
+    owner_field = 'socio__user'
     filterset_fields = ['socio', 'clase', 'fecha_inscripcion']
     ordering_fields = ['fecha_inscripcion']
+    ordering = ['-fecha_inscripcion']
+
+    def guardar_con_cupo(self, serializer, clase_anterior=None):
+        """Reserva el cupo y guarda la inscripción en la misma transacción"""
+        clase = serializer.validated_data.get('clase')
+        try:
+            with transaction.atomic():
+                if clase is not None and clase.pk != clase_anterior:
+                    if not Clase.objects.reservar_cupo(clase.pk):
+                        raise ValidationError({'clase': ['La clase no tiene cupos disponibles.']})
+                    if clase_anterior is not None:
+                        Clase.objects.liberar_cupo(clase_anterior)
+                serializer.save()
+        except IntegrityError:
+            # Inscripción duplicada creada por una petición concurrente
+            raise ValidationError({'non_field_errors': ['El socio ya está inscrito en esta clase.']})
+
+    def perform_create(self, serializer):
+        self.guardar_con_cupo(serializer)
+
+    def perform_update(self, serializer):
+        self.guardar_con_cupo(serializer, clase_anterior=serializer.instance.clase_id)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            Clase.objects.liberar_cupo(instance.clase_id)
 
-class AsistenciaViewSet(viewsets.ModelViewSet):
+class AsistenciaViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     queryset = Asistencia.objects.all()
     serializer_class = AsistenciaSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrStaff]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, IsOwnerOrStaffFilter]
+    owner_field = 'socio__user'
     filterset_fields = ['socio', 'fecha_entrada', 'fecha_salida']
     ordering_fields = ['fecha_entrada']
+    ordering = ['-fecha_entrada']
 
-class EquipoViewSet(viewsets.ModelViewSet):
+    def guardar(self, serializer):
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError({'socio': ['El socio ya tiene una visita abierta.']})
+        invalidar_ocupacion()
+
+    def perform_create(self, serializer):
+        self.guardar(serializer)
+
+    def perform_update(self, serializer):
+        self.guardar(serializer)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        invalidar_ocupacion()
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser],
+            url_path='ocupacion-actual')
+    def ocupacion_actual(self, request):
+        """Socios dentro del gimnasio ahora, desde el contador en caché"""
+        return Response({'ocupacion': get_ocupacion(), 'fecha': timezone.now()})
+
+    def visita_abierta(self, socio_id):
+        return Asistencia.objects.filter(socio_id=socio_id, fecha_salida__isnull=True).values(
+            'asistencia_id', 'fecha_entrada'
+        ).first()
+
+    @action(detail=False, methods=['post'], url_path='check-in')
+    def check_in(self, request):
+        """Verifica el acceso y registra la entrada en una sola petición"""
+        record = get_access_for_request(request, request.data.get('socio'))
+        acceso, motivo = check_access(record)
+        if not acceso:
+            return Response(
+                {'socio': record['socio_id'], 'acceso': False, 'motivo': motivo},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        abierta = self.visita_abierta(record['socio_id'])
+        if abierta:
+            return Response({'socio': record['socio_id'], 'acceso': True, 'ya_dentro': True, **abierta})
+
+        try:
+            asistencia = registrar_entrada(record['socio_id'])
+        except IntegrityError:
+            # Otra petición abrió la visita entre la consulta y el INSERT
+            abierta = self.visita_abierta(record['socio_id'])
+            return Response({'socio': record['socio_id'], 'acceso': True, 'ya_dentro': True, **(abierta or {})})
+        except TimeoutError:
+            return Response(
+                {'detail': 'No se pudo registrar la entrada a tiempo; inténtalo de nuevo.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        ajustar_ocupacion(1)
+        return Response({
+            'socio': record['socio_id'],
+            'acceso': True,
+            'ya_dentro': False,
+            'asistencia_id': asistencia.asistencia_id,
+            'fecha_entrada': asistencia.fecha_entrada,
+            'membresia': record['membresia_tipo'],
+            'vigente_hasta': record['vigente_hasta'],
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='check-out')
+    def check_out(self, request):
+        """Cierra la visita abierta del socio"""
+        record = get_access_for_request(request, request.data.get('socio'))
+        fecha_salida = timezone.now()
+        cerradas = Asistencia.objects.filter(
+            socio_id=record['socio_id'], fecha_salida__isnull=True
+        ).update(fecha_salida=fecha_salida)
+        if not cerradas:
+            raise NotFound('El socio no tiene una visita abierta.')
+        ajustar_ocupacion(-cerradas)
+        return Response({'socio': record['socio_id'], 'fecha_salida': fecha_salida, 'cerradas': cerradas})
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser])
+    def estadisticas(self, request):
+        """Estadísticas de asistencia de todo el gimnasio en un día, solo para el personal"""
+        fecha = request.query_params.get('fecha')
+        if fecha:
+            dia = parse_date(fecha)
+            if dia is None:
+                raise ValidationError({'fecha': ['Formato de fecha inválido, use AAAA-MM-DD.']})
+        else:
+            dia = timezone.localdate()
+
+        inicio = timezone.make_aware(datetime.combine(dia, time.min))
+        fin = inicio + timedelta(days=1)
+        asistencias_dia = Asistencia.objects.filter(fecha_entrada__gte=inicio, fecha_entrada__lt=fin)
+
+        resumen = asistencias_dia.aggregate(
+            total=Count('asistencia_id'),
+            activos=Count('asistencia_id', filter=Q(fecha_salida__isnull=True)),
+            promedio=Avg(F('fecha_salida') - F('fecha_entrada')),
+        )
+
+        # Entradas agrupadas por hora del día
+        por_hora = [0] * 24
+        for item in asistencias_dia.annotate(hora=ExtractHour('fecha_entrada')).values('hora').annotate(
+            total=Count('asistencia_id')
+        ).order_by():
+            por_hora[item['hora']] = item['total']
+
+        # Entradas de los últimos 7 días agrupadas por día de la semana (Lunes a Domingo)
+        por_dia_semana = [0] * 7
+        for item in Asistencia.objects.filter(
+            fecha_entrada__gte=fin - timedelta(days=7), fecha_entrada__lt=fin
+        ).annotate(dia=ExtractIsoWeekDay('fecha_entrada')).values('dia').annotate(
+            total=Count('asistencia_id')
+        ).order_by():
+            por_dia_semana[item['dia'] - 1] = item['total']
+
+        promedio = resumen['promedio']
+        return Response({
+            'fecha': dia.isoformat(),
+            'total_dia': resumen['total'],
+            # Para hoy se usa el contador en vivo, que incluye visitas abiertas de días anteriores
+            'activos_ahora': get_ocupacion() if dia == timezone.localdate() else resumen['activos'],
+            'tiempo_promedio_minutos': round(promedio.total_seconds() / 60) if promedio else 0,
+            'hora_pico': max(range(24), key=por_hora.__getitem__) if resumen['total'] else None,
+            'por_hora': por_hora,
+            'por_dia_semana': por_dia_semana,
+        })
+
+class EquipoViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     queryset = Equipo.objects.all()
     serializer_class = EquipoSerializer
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['fecha_adquisicion', 'ultima_mantenimiento']
+    filterset_fields = ['estado', 'fecha_adquisicion', 'ultima_mantenimiento']
     search_fields = ['nombre']
-    ordering_fields = ['fecha_adquisicion', 'ultima_mantenimiento']
\ No newline at end of file
+    ordering_fields = ['fecha_adquisicion', 'ultima_mantenimiento']
+    ordering = ['-fecha_adquisicion']
+
+    @action(detail=False, methods=['get'], url_path='exportar-inventario',
+            permission_classes=[IsAuthenticated, IsAdminUser],
+            content_negotiation_class=ExportNegotiation)
+    def exportar_inventario(self, request):
+        """Inventario de equipos en CSV o XLSX, generado en streaming"""
+        return export_response(self, request, COLUMNAS_EQUIPOS, 'inventario')
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsAdminUser],
+            parser_classes=[MultiPartParser, FormParser])
+    def importar(self, request):
+        """Alta masiva de equipos desde CSV (nombre, descripcion, estado, fecha_adquisicion)"""
+        return import_response(request, EquipoImportador())
\ No newline at end of file
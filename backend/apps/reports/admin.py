@@ -0,0 +1,16 @@
+from django.contrib import admin
+from .models import IngresoDiario, AsistenciaHoraria, InscripcionDiaria
+
+@admin.register(IngresoDiario)
+class IngresoDiarioAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'metodo', 'membresia', 'total', 'cantidad')
+    list_filter = ('metodo', 'membresia')
+
+@admin.register(AsistenciaHoraria)
+class AsistenciaHorariaAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'hora', 'entradas')
+
+@admin.register(InscripcionDiaria)
+class InscripcionDiariaAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'clase', 'inscripciones')
+    list_filter = ('clase',)
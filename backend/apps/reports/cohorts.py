@@ -0,0 +1,112 @@
+from datetime import date, datetime, time
+from itertools import chain
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from apps.core.models import Asistencia, Pago, Socio
+
+CACHE_TIMEOUT = getattr(settings, 'REPORTS_RETENTION_CACHE_TIMEOUT', 60 * 15)
+# La matriz es cohortes x cohortes: el rango se limita para acotar la memoria
+MAX_MESES = getattr(settings, 'REPORTS_RETENTION_MAX_MESES', 120)
+
+# metrica -> (modelo de actividad, columna de fecha)
+METRICAS = {
+    'asistencia': (Asistencia, 'fecha_entrada'),
+    'pago': (Pago, 'fecha_pago'),
+}
+
+
+def indice_mes(value):
+    """Meses transcurridos desde el año 0: permite restar meses como enteros"""
+    return value.year * 12 + value.month - 1
+
+
+def mes_desde_indice(indice):
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def inicio_mes(indice):
+    return timezone.make_aware(datetime.combine(mes_desde_indice(indice), time.min))
+
+
+def expresion_mes(campo):
+    return ExtractYear(campo) * 12 + ExtractMonth(campo) - 1
+
+
+def _pares(queryset):
+    """Pares (id, mes) de una consulta como un array int64 de dos columnas"""
+    valores = np.fromiter(chain.from_iterable(queryset.iterator(chunk_size=5000)), dtype=np.int64)
+    return valores.reshape(-1, 2)
+
+
+def matriz_retencion(desde, hasta, metrica):
+    """
+    Socios por cohorte (mes de registro) y cuántos de ellos tuvieron actividad
+    N meses después. `desde`/`hasta` son índices de mes (ver `indice_mes`).
+    """
+    modelo, campo = METRICAS[metrica]
+    registro = {'fecha_registro__gte': inicio_mes(desde), 'fecha_registro__lt': inicio_mes(hasta + 1)}
+
+    socios = _pares(
+        Socio.objects.filter(**registro)
+        .annotate(mes=expresion_mes('fecha_registro'))
+        .values_list('socio_id', 'mes')
+        .order_by('socio_id')
+    )
+    actividad = _pares(
+        modelo.objects.filter(**{f'{campo}__gte': inicio_mes(desde)})
+        .filter(**{f'socio__{filtro}': valor for filtro, valor in registro.items()})
+        .annotate(mes=expresion_mes(campo))
+        .values_list('socio_id', 'mes')
+        .distinct()
+        .order_by()
+    )
+
+    cohortes = hasta - desde + 1
+    tamanos = np.bincount(socios[:, 1] - desde, minlength=cohortes)
+    activos = np.zeros((cohortes, cohortes), dtype=np.int64)
+    if len(actividad) and len(socios):
+        # El mes de registro de cada actividad se busca en los ids ordenados
+        posicion = np.searchsorted(socios[:, 0], actividad[:, 0]).clip(max=max(len(socios) - 1, 0))
+        cohorte = socios[posicion, 1] - desde
+        desfase = actividad[:, 1] - socios[posicion, 1]
+        # Descarta socios registrados entre las dos consultas
+        validos = (socios[posicion, 0] == actividad[:, 0]) & (desfase >= 0) & (desfase < cohortes)
+        np.add.at(activos, (cohorte[validos], desfase[validos]), 1)
+    return tamanos, activos
+
+
+def reporte_retencion(desde, hasta, metrica, actual):
+    """Tabla de retención cacheada por (rango de meses, métrica)"""
+    clave = f'reports:retencion:{desde}:{hasta}:{metrica}:{actual}'
+    reporte = cache.get(clave)
+    if reporte is not None:
+        return reporte
+
+    tamanos, activos = matriz_retencion(desde, hasta, metrica)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tasas = np.where(tamanos[:, None] > 0, activos * 100 / tamanos[:, None], 0).round(2)
+
+    cohortes = []
+    for fila, tamano in enumerate(tamanos.tolist()):
+        # Solo los meses que ya transcurrieron para la cohorte
+        meses = max(0, min(actual - (desde + fila) + 1, len(tamanos)))
+        cohortes.append({
+            'cohorte': mes_desde_indice(desde + fila).strftime('%Y-%m'),
+            'socios': tamano,
+            'activos': activos[fila, :meses].tolist(),
+            'retencion': tasas[fila, :meses].tolist(),
+        })
+
+    reporte = {
+        'desde': mes_desde_indice(desde).strftime('%Y-%m'),
+        'hasta': mes_desde_indice(hasta).strftime('%Y-%m'),
+        'metrica': metrica,
+        'cohortes': cohortes,
+    }
+    cache.set(clave, reporte, CACHE_TIMEOUT)
+    return reporte
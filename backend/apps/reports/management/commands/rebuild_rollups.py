@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.reports.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recalcula desde cero las tablas de rollup de los reportes'
+
+    def handle(self, *args, **options):
+        for nombre, filas in rebuild_rollups().items():
+            self.stdout.write(f'{nombre}: {filas} filas')
+        self.stdout.write(self.style.SUCCESS('Rollups reconstruidos'))
@@ -0,0 +1,50 @@
+from django.db import models
+
+from apps.core.models import Clase, Membresia
+
+
+class IngresoDiario(models.Model):
+    """Total cobrado por día, método de pago y membresía"""
+    fecha = models.DateField()
+    metodo = models.CharField(max_length=20)
+    membresia = models.ForeignKey(Membresia, on_delete=models.CASCADE)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cantidad = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('fecha', 'metodo', 'membresia')
+
+    def __str__(self):
+        return f'{self.fecha} {self.metodo} {self.membresia_id}: {self.total}'
+
+class AsistenciaHoraria(models.Model):
+    """Entradas por día y hora"""
+    fecha = models.DateField()
+    hora = models.PositiveSmallIntegerField()
+    entradas = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('fecha', 'hora')
+
+    def __str__(self):
+        return f'{self.fecha} {self.hora:02d}h: {self.entradas}'
+
+class InscripcionDiaria(models.Model):
+    """Inscripciones por día y clase"""
+    fecha = models.DateField()
+    clase = models.ForeignKey(Clase, on_delete=models.CASCADE)
+    inscripciones = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('fecha', 'clase')
+
+    def __str__(self):
+        return f'{self.fecha} {self.clase_id}: {self.inscripciones}'
+
+class RollupWatermark(models.Model):
+    """Último id de la tabla de origen ya sumado a cada rollup"""
+    nombre = models.CharField(max_length=50, unique=True)
+    ultimo_id = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.nombre}: {self.ultimo_id}'
@@ -0,0 +1,146 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+from apps.core.models import Asistencia, Pago, SocioClase
+
+from .models import AsistenciaHoraria, IngresoDiario, InscripcionDiaria, RollupWatermark
+
+# Segundos que una fila debe tener antes de sumarse (más que la transacción más larga)
+LAG_SECONDS = getattr(settings, 'REPORTS_ROLLUP_LAG', 60)
+
+
+class Rollup:
+    """
+    Tabla de totales diarios alimentada de forma incremental.
+
+    Cada actualización agrega en SQL solo las filas de origen con id mayor que
+    la marca de agua y suma el resultado a las filas del rollup. Las filas de
+    origen modificadas o borradas después de agregarse no se reflejan hasta
+    ejecutar `rebuild_rollups`.
+
+    Los ids se asignan al insertar pero se ven al confirmar, así que una fila
+    con id menor puede aparecer después de otra mayor. Por eso la marca solo
+    avanza sobre filas con más de LAG_SECONDS según `fecha` y se detiene antes
+    de la primera fila reciente.
+    """
+
+    def __init__(self, nombre, source, model, fecha, keys, values):
+        self.nombre = nombre
+        self.source = source
+        self.model = model
+        self.fecha = fecha
+        # campo del rollup -> expresión sobre la tabla de origen
+        self.keys = keys
+        self.values = values
+
+    def aggregate(self, desde, hasta):
+        pk = self.source._meta.pk.name
+        aliases = {f'r_{field}': expression for field, expression in self.keys.items()}
+        rows = (
+            self.source.objects.filter(**{f'{pk}__gt': desde, f'{pk}__lte': hasta})
+            .annotate(**aliases)
+            .values(*aliases)
+            .annotate(**self.values)
+            .order_by()
+        )
+        for row in rows:
+            key = tuple(row[f'r_{field}'] for field in self.keys)
+            yield key, {field: row[field] for field in self.values}
+
+    def limite(self, lag):
+        """Id más alto que ya no puede tener por debajo filas sin confirmar"""
+        pk = self.source._meta.pk.name
+        filas = self.source.objects.all()
+        if lag is not None:
+            corte = timezone.now() - timedelta(seconds=lag)
+            reciente = self.source.objects.filter(**{f'{self.fecha}__gt': corte}).aggregate(primera=Min(pk))
+            if reciente['primera'] is not None:
+                filas = filas.filter(**{f'{pk}__lt': reciente['primera']})
+        return filas.aggregate(ultimo=Max(pk))['ultimo'] or 0
+
+    def refresh(self, lag=LAG_SECONDS):
+        """
+        Suma al rollup las filas nuevas; devuelve cuántas filas del rollup
+        cambiaron. Con `lag=None` suma todo lo visible (solo sin escrituras en curso).
+        """
+        watermark, _ = RollupWatermark.objects.get_or_create(nombre=self.nombre)
+        hasta = self.limite(lag)
+        if hasta <= watermark.ultimo_id:
+            return 0
+
+        with transaction.atomic():
+            # Avanzar la marca solo si nadie lo hizo antes evita sumar dos veces
+            avanzada = RollupWatermark.objects.filter(
+                pk=watermark.pk, ultimo_id=watermark.ultimo_id
+            ).update(ultimo_id=hasta)
+            if not avanzada:
+                return 0
+
+            deltas = dict(self.aggregate(watermark.ultimo_id, hasta))
+            if not deltas:
+                return 0
+
+            fechas = [key[0] for key in deltas]
+            existentes = {
+                tuple(getattr(row, field) for field in self.attnames): row
+                for row in self.model.objects.filter(fecha__gte=min(fechas), fecha__lte=max(fechas))
+            }
+            nuevos, modificados = [], []
+            for key, valores in deltas.items():
+                row = existentes.get(key)
+                if row is None:
+                    nuevos.append(self.model(**dict(zip(self.attnames, key)), **valores))
+                    continue
+                for field, value in valores.items():
+                    setattr(row, field, getattr(row, field) + value)
+                modificados.append(row)
+
+            self.model.objects.bulk_create(nuevos, batch_size=500)
+            self.model.objects.bulk_update(modificados, list(self.values), batch_size=500)
+        return len(deltas)
+
+    @property
+    def attnames(self):
+        return [self.model._meta.get_field(field).attname for field in self.keys]
+
+
+# La fecha va siempre primero: se usa para acotar la lectura de filas existentes
+ROLLUPS = [
+    Rollup(
+        'ingresos', Pago, IngresoDiario, 'fecha_pago',
+        keys={'fecha': TruncDate('fecha_pago'), 'metodo': F('metodo'), 'membresia': F('socio__membresia_id')},
+        values={'total': Sum('monto'), 'cantidad': Count('pago_id')},
+    ),
+    Rollup(
+        'asistencia', Asistencia, AsistenciaHoraria, 'fecha_entrada',
+        keys={'fecha': TruncDate('fecha_entrada'), 'hora': ExtractHour('fecha_entrada')},
+        values={'entradas': Count('asistencia_id')},
+    ),
+    Rollup(
+        'inscripciones', SocioClase, InscripcionDiaria, 'fecha_inscripcion',
+        keys={'fecha': TruncDate('fecha_inscripcion'), 'clase': F('clase_id')},
+        values={'inscripciones': Count('id')},
+    ),
+]
+
+
+def refresh_rollups(lag=LAG_SECONDS):
+    return {rollup.nombre: rollup.refresh(lag) for rollup in ROLLUPS}
+
+
+def rebuild_rollups():
+    """
+    Vacía los rollups y los recalcula desde las tablas de origen. No aplica el
+    retraso: se ejecuta a mano o tras cargar datos, y los datos generados no
+    tienen ids en orden de fecha.
+    """
+    with transaction.atomic():
+        for rollup in ROLLUPS:
+            rollup.model.objects.all().delete()
+        RollupWatermark.objects.update(ultimo_id=0)
+        return refresh_rollups(lag=None)
@@ -0,0 +1,298 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.Users.models import UserAccount
+from apps.core.models import Asistencia, Clase, Entrenador, Membresia, Pago, Socio, SocioClase
+
+from .cohorts import MAX_MESES, indice_mes, matriz_retencion, mes_desde_indice
+from .models import AsistenciaHoraria, IngresoDiario, InscripcionDiaria, RollupWatermark
+from .rollups import LAG_SECONDS, rebuild_rollups, refresh_rollups
+
+
+def envejecer(queryset, campo, segundos):
+    """Mueve hacia atrás la fecha de las filas, como si se hubieran creado antes"""
+    queryset.update(**{campo: F(campo) - timedelta(seconds=segundos)})
+
+
+class ReportesTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = UserAccount.objects.create_superuser(
+            email='reportes@gimnasio.test', password='reportes', first_name='Reportes', last_name='Test'
+        )
+        cls.membresias = [
+            Membresia.objects.create(tipo='Mensual', descripcion='', precio_mensual=10, duracion_meses=1),
+            Membresia.objects.create(tipo='Anual', descripcion='', precio_mensual=8, duracion_meses=12),
+        ]
+        cls.socios = [
+            Socio.objects.create(nombre=f'Socio {i}', telefono='0', correo=f'rep{i}@gimnasio.test',
+                                 membresia=cls.membresias[i % 2])
+            for i in range(4)
+        ]
+        cls.entrenador = Entrenador.objects.create(nombre='E', especialidad='G', telefono='0',
+                                                   correo='rep-e@gimnasio.test')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+
+class RollupTests(ReportesTestCase):
+    """Los rollups incrementales coinciden con sumar las tablas de origen"""
+
+    def crear_actividad(self, horas_atras):
+        # Clases nuevas en cada tanda: un socio solo se inscribe una vez por clase
+        clases = [
+            Clase.objects.create(nombre='Clase', entrenador=self.entrenador, horario=timezone.now(), capacidad_max=30)
+            for _ in range(2)
+        ]
+        nuevos = []
+        for i, socio in enumerate(self.socios):
+            nuevos.append(Pago.objects.create(socio=socio, monto=Decimal('10.50') + i, metodo=['efectivo', 'tarjeta'][i % 2]))
+            Asistencia.objects.create(socio=socio, fecha_salida=timezone.now())
+            SocioClase.objects.create(socio=socio, clase=clases[i % 2])
+        segundos = horas_atras * 3600
+        envejecer(Pago.objects.filter(pk__in=[p.pk for p in nuevos]), 'fecha_pago', segundos)
+        envejecer(Asistencia.objects.filter(fecha_entrada__gt=timezone.now() - timedelta(minutes=5)),
+                  'fecha_entrada', segundos)
+        envejecer(SocioClase.objects.filter(fecha_inscripcion__gt=timezone.now() - timedelta(minutes=5)),
+                  'fecha_inscripcion', segundos)
+        return nuevos
+
+    def assertIgualAlOrigen(self):
+        ingresos = {
+            (fila['f'], fila['metodo'], fila['m']): (fila['total'], fila['cantidad'])
+            for fila in Pago.objects.annotate(f=TruncDate('fecha_pago'), m=F('socio__membresia_id'))
+            .values('f', 'metodo', 'm').annotate(total=Sum('monto'), cantidad=Count('pk')).order_by()
+        }
+        self.assertEqual(
+            {(r.fecha, r.metodo, r.membresia_id): (r.total, r.cantidad) for r in IngresoDiario.objects.all()},
+            ingresos,
+        )
+        asistencia = {
+            (fila['f'], fila['h']): fila['n']
+            for fila in Asistencia.objects.annotate(f=TruncDate('fecha_entrada'), h=ExtractHour('fecha_entrada'))
+            .values('f', 'h').annotate(n=Count('pk')).order_by()
+        }
+        self.assertEqual({(r.fecha, r.hora): r.entradas for r in AsistenciaHoraria.objects.all()}, asistencia)
+        inscripciones = {
+            (fila['f'], fila['clase_id']): fila['n']
+            for fila in SocioClase.objects.annotate(f=TruncDate('fecha_inscripcion'))
+            .values('f', 'clase_id').annotate(n=Count('pk')).order_by()
+        }
+        self.assertEqual({(r.fecha, r.clase_id): r.inscripciones for r in InscripcionDiaria.objects.all()},
+                         inscripciones)
+
+    def test_incrementos_igual_a_suma(self):
+        self.crear_actividad(horas_atras=50)
+        refresh_rollups()
+        self.assertIgualAlOrigen()
+
+        # Los incrementos se suman a filas existentes y crean las que faltan
+        self.crear_actividad(horas_atras=49)
+        self.crear_actividad(horas_atras=2)
+        refresh_rollups()
+        self.assertIgualAlOrigen()
+
+        # Sin filas nuevas no cambia nada
+        self.assertEqual(refresh_rollups(), {'ingresos': 0, 'asistencia': 0, 'inscripciones': 0})
+
+        rebuild_rollups()
+        self.assertIgualAlOrigen()
+
+    def test_filas_recientes_esperan(self):
+        antiguos = self.crear_actividad(horas_atras=3)
+        reciente = Pago.objects.create(socio=self.socios[0], monto=5, metodo='efectivo')
+        # Una fila confirmada después pero con id mayor que la reciente
+        tardio = Pago.objects.create(socio=self.socios[1], monto=7, metodo='efectivo')
+        envejecer(Pago.objects.filter(pk=tardio.pk), 'fecha_pago', 3 * 3600)
+
+        refresh_rollups()
+        self.assertEqual(RollupWatermark.objects.get(nombre='ingresos').ultimo_id, antiguos[-1].pk)
+        self.assertEqual(IngresoDiario.objects.aggregate(n=Sum('cantidad'))['n'], len(antiguos))
+
+        # Cuando la fila reciente supera el retraso se suman las dos
+        envejecer(Pago.objects.filter(pk=reciente.pk), 'fecha_pago', LAG_SECONDS + 1)
+        refresh_rollups()
+        self.assertEqual(RollupWatermark.objects.get(nombre='ingresos').ultimo_id, tardio.pk)
+        self.assertIgualAlOrigen()
+
+    def test_dashboard(self):
+        self.crear_actividad(horas_atras=24)
+        hoy = timezone.localdate()
+        response = self.client.get('/api/v1/reportes/dashboard/', {
+            'fecha_inicio': (hoy - timedelta(days=3)).isoformat(), 'fecha_fin': hoy.isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['ingresos_total'], Pago.objects.aggregate(t=Sum('monto'))['t'])
+        self.assertEqual(response.data['pagos_total'], 4)
+        self.assertEqual(response.data['asistencias_total'], 4)
+        self.assertEqual(response.data['inscripciones_total'], 4)
+
+
+class IngresosTests(ReportesTestCase):
+    """Agrupación de /reportes/ingresos/ por día, semana y mes, con variaciones"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        mensual, anual = cls.socios[0], cls.socios[1]
+        # (fecha, socio, monto, método); 2026-03-02 es lunes
+        for fecha, socio, monto, metodo in [
+            (date(2026, 1, 20), mensual, 40, 'efectivo'),
+            (date(2026, 3, 2), mensual, 10, 'efectivo'),
+            (date(2026, 3, 4), anual, 20, 'tarjeta'),
+            (date(2026, 3, 10), mensual, 30, 'tarjeta'),
+            (date(2026, 4, 1), anual, 50, 'efectivo'),
+        ]:
+            pago = Pago.objects.create(socio=socio, monto=monto, metodo=metodo)
+            Pago.objects.filter(pk=pago.pk).update(
+                fecha_pago=timezone.make_aware(datetime.combine(fecha, time(12, 0)))
+            )
+
+    def ingresos(self, agrupar_por, inicio='2026-03-01', fin='2026-04-30'):
+        response = self.client.get('/api/v1/reportes/ingresos/', {
+            'fecha_inicio': inicio, 'fecha_fin': fin, 'agrupar_por': agrupar_por,
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def resumen(self, data):
+        return [(p['periodo'], p['total'], p['cantidad'], p['anterior'], p['variacion']) for p in data['periodos']]
+
+    def test_por_mes(self):
+        data = self.ingresos('month')
+        self.assertEqual(self.resumen(data), [
+            (date(2026, 3, 1), 60, 3, None, None),
+            (date(2026, 4, 1), 50, 1, 60, -10),
+        ])
+        marzo = data['periodos'][0]
+        self.assertEqual(marzo['por_metodo'], {'efectivo': 10, 'tarjeta': 50})
+        self.assertEqual(marzo['por_membresia'], {'Mensual': 40, 'Anual': 20})
+        self.assertEqual(data['periodos'][1]['variacion_pct'], Decimal('-16.67'))
+
+        # Los 61 días anteriores a marzo solo incluyen el pago de enero
+        self.assertEqual((data['total'], data['cantidad']), (110, 4))
+        self.assertEqual((data['anterior'], data['variacion'], data['variacion_pct']), (40, 70, Decimal('175.00')))
+
+    def test_por_semana(self):
+        # La semana del domingo 1 de marzo empieza el lunes 23 de febrero
+        data = self.ingresos('week', fin='2026-03-31')
+        self.assertEqual(self.resumen(data), [
+            (date(2026, 2, 23), 0, 0, None, None),
+            (date(2026, 3, 2), 30, 2, 0, 30),
+            (date(2026, 3, 9), 30, 1, 30, 0),
+            (date(2026, 3, 16), 0, 0, 30, -30),
+            (date(2026, 3, 23), 0, 0, 0, 0),
+            (date(2026, 3, 30), 0, 0, 0, 0),
+        ])
+
+    def test_por_dia(self):
+        data = self.ingresos('day', fin='2026-03-05')
+        self.assertEqual(self.resumen(data), [
+            (date(2026, 3, 1), 0, 0, None, None),
+            (date(2026, 3, 2), 10, 1, 0, 10),
+            (date(2026, 3, 3), 0, 0, 10, -10),
+            (date(2026, 3, 4), 20, 1, 0, 20),
+            (date(2026, 3, 5), 0, 0, 20, -20),
+        ])
+        self.assertEqual([p['variacion_pct'] for p in data['periodos']], [None, None, Decimal('-100.00'), None,
+                                                                         Decimal('-100.00')])
+
+    def test_periodo_vacio_intermedio(self):
+        # Febrero no tiene pagos: marzo se compara con cero, no con enero
+        data = self.ingresos('month', inicio='2026-01-01', fin='2026-03-31')
+        self.assertEqual(self.resumen(data), [
+            (date(2026, 1, 1), 40, 1, None, None),
+            (date(2026, 2, 1), 0, 0, 40, -40),
+            (date(2026, 3, 1), 60, 3, 0, 60),
+        ])
+        self.assertEqual(data['periodos'][1]['por_metodo'], {})
+
+    def test_sin_base_anterior(self):
+        data = self.ingresos('month', inicio='2026-04-01', fin='2026-04-30')
+        self.assertEqual((data['total'], data['anterior'], data['variacion']), (50, 60, -10))
+        data = self.ingresos('month', inicio='2025-12-01', fin='2025-12-31')
+        self.assertEqual((data['total'], data['anterior'], data['variacion_pct']), (0, 0, None))
+
+    def test_agrupacion_invalida(self):
+        response = self.client.get('/api/v1/reportes/ingresos/', {'agrupar_por': 'year'})
+        self.assertEqual(response.status_code, 400)
+
+
+class RetencionTests(ReportesTestCase):
+    """Matriz de retención por cohorte de registro"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Cohortes: enero (socios 0 y 1), febrero (socio 2); el socio 3 queda fuera del rango
+        registros = [date(2026, 1, 5), date(2026, 1, 20), date(2026, 2, 10), date(2025, 6, 1)]
+        for socio, fecha in zip(cls.socios, registros):
+            Socio.objects.filter(pk=socio.pk).update(fecha_registro=cls.momento(fecha))
+        # (socio, fechas de asistencia): dos visitas el mismo mes cuentan una vez
+        for indice, fechas in [
+            (0, [date(2026, 1, 6), date(2026, 2, 1), date(2026, 2, 15), date(2026, 3, 3)]),
+            (1, [date(2026, 3, 9)]),
+            (2, [date(2026, 2, 11), date(2026, 3, 1)]),
+            (3, [date(2026, 1, 2)]),
+        ]:
+            for fecha in fechas:
+                asistencia = Asistencia.objects.create(socio=cls.socios[indice], fecha_salida=timezone.now())
+                Asistencia.objects.filter(pk=asistencia.pk).update(fecha_entrada=cls.momento(fecha))
+
+    @staticmethod
+    def momento(fecha):
+        return timezone.make_aware(datetime.combine(fecha, time(10, 0)))
+
+    def test_matriz(self):
+        tamanos, activos = matriz_retencion(indice_mes(date(2026, 1, 1)), indice_mes(date(2026, 3, 1)), 'asistencia')
+        self.assertEqual(tamanos.tolist(), [2, 1, 0])
+        self.assertEqual(activos.tolist(), [
+            [1, 1, 2],
+            [1, 1, 0],
+            [0, 0, 0],
+        ])
+
+    def test_reporte(self):
+        response = self.client.get('/api/v1/reportes/retencion/', {'desde': '2026-01', 'hasta': '2026-03'})
+        self.assertEqual(response.status_code, 200)
+        enero, febrero, marzo = response.data['cohortes']
+        self.assertEqual((enero['cohorte'], enero['socios'], enero['activos']), ('2026-01', 2, [1, 1, 2]))
+        self.assertEqual(enero['retencion'], [50.0, 50.0, 100.0])
+        self.assertEqual((febrero['socios'], febrero['retencion']), (1, [100.0, 100.0, 0.0]))
+        self.assertEqual((marzo['socios'], marzo['retencion']), (0, [0.0, 0.0, 0.0]))
+
+        # Los meses que aún no transcurrieron no se incluyen
+        with mock.patch('apps.reports.views.timezone.localdate', return_value=date(2026, 2, 15)):
+            response = self.client.get('/api/v1/reportes/retencion/', {
+                'desde': '2026-01', 'hasta': '2026-02', 'metrica': 'asistencia',
+            })
+        self.assertEqual([c['activos'] for c in response.data['cohortes']], [[1, 1], [1]])
+
+    def test_metrica_pago(self):
+        pago = Pago.objects.create(socio=self.socios[2], monto=10, metodo='efectivo')
+        Pago.objects.filter(pk=pago.pk).update(fecha_pago=self.momento(date(2026, 3, 2)))
+        tamanos, activos = matriz_retencion(indice_mes(date(2026, 1, 1)), indice_mes(date(2026, 3, 1)), 'pago')
+        self.assertEqual(activos.tolist(), [[0, 0, 0], [0, 1, 0], [0, 0, 0]])
+
+    def test_rango_maximo(self):
+        response = self.client.get('/api/v1/reportes/retencion/', {'desde': '0001-01', 'hasta': '2026-03'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('desde', response.data)
+
+        hasta = date(2026, 3, 1)
+        desde = mes_desde_indice(indice_mes(hasta) - MAX_MESES + 1)
+        response = self.client.get('/api/v1/reportes/retencion/', {
+            'desde': desde.strftime('%Y-%m'), 'hasta': hasta.strftime('%Y-%m'),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['cohortes']), MAX_MESES)
@@ -0,0 +1,246 @@
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from apps.core.models import Pago, Socio
+
+from .cohorts import MAX_MESES, METRICAS, indice_mes, reporte_retencion
+from .models import AsistenciaHoraria, IngresoDiario, InscripcionDiaria
+from .rollups import refresh_rollups
+
+DIAS_POR_DEFECTO = 30
+
+# agrupar_por -> tipo de Trunc
+AGRUPACIONES = {'day': 'day', 'week': 'week', 'month': 'month'}
+
+ACCIONES_ROLLUP = {'dashboard', 'pagos', 'asistencia', 'clases'}
+
+
+class ReportViewSet(viewsets.ViewSet):
+    """Reportes servidos desde las tablas de rollup diarias"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Incorpora a los rollups las filas creadas desde la última consulta
+        if self.action in ACCIONES_ROLLUP:
+            refresh_rollups()
+
+    def get_rango(self):
+        """Rango `fecha_inicio`..`fecha_fin` (inclusive); por defecto los últimos 30 días"""
+        fechas = {}
+        for param in ('fecha_inicio', 'fecha_fin'):
+            valor = self.request.query_params.get(param)
+            if valor:
+                try:
+                    fechas[param] = parse_date(valor)
+                except ValueError:
+                    fechas[param] = None
+                if fechas[param] is None:
+                    raise ValidationError({param: ['Formato de fecha inválido, use AAAA-MM-DD.']})
+
+        fin = fechas.get('fecha_fin') or timezone.localdate()
+        inicio = fechas.get('fecha_inicio') or fin - timedelta(days=DIAS_POR_DEFECTO - 1)
+        if inicio > fin:
+            raise ValidationError({'fecha_inicio': ['Debe ser anterior o igual a fecha_fin.']})
+        return inicio, fin
+
+    def rango_datetimes(self, inicio, fin):
+        """Límites [desde, hasta) en hora local para filtrar columnas DateTimeField"""
+        desde = timezone.make_aware(datetime.combine(inicio, time.min))
+        hasta = timezone.make_aware(datetime.combine(fin + timedelta(days=1), time.min))
+        return desde, hasta
+
+    def rango_response(self, inicio, fin, **data):
+        return Response({'fecha_inicio': inicio.isoformat(), 'fecha_fin': fin.isoformat(), **data})
+
+    @action(detail=False, methods=['get'])
+    def dashboard(self, request):
+        """Resumen general del período"""
+        inicio, fin = self.get_rango()
+        ingresos = IngresoDiario.objects.filter(fecha__range=(inicio, fin)).aggregate(
+            total=Sum('total'), cantidad=Sum('cantidad')
+        )
+        asistencias = AsistenciaHoraria.objects.filter(fecha__range=(inicio, fin)).aggregate(total=Sum('entradas'))
+        inscripciones = InscripcionDiaria.objects.filter(fecha__range=(inicio, fin)).aggregate(
+            total=Sum('inscripciones')
+        )
+        return self.rango_response(
+            inicio, fin,
+            ingresos_total=ingresos['total'] or 0,
+            pagos_total=ingresos['cantidad'] or 0,
+            asistencias_total=asistencias['total'] or 0,
+            inscripciones_total=inscripciones['total'] or 0,
+            socios_total=Socio.objects.count(),
+            socios_nuevos=Socio.objects.filter(
+                fecha_registro__date__range=(inicio, fin)
+            ).count(),
+        )
+
+    @action(detail=False, methods=['get'])
+    def pagos(self, request):
+        """Ingresos por día, método de pago y membresía"""
+        inicio, fin = self.get_rango()
+        ingresos = IngresoDiario.objects.filter(fecha__range=(inicio, fin)).order_by()
+
+        def agrupar(*campos):
+            return list(
+                ingresos.values(*campos).annotate(total=Sum('total'), cantidad=Sum('cantidad')).order_by(*campos)
+            )
+
+        resumen = ingresos.aggregate(total=Sum('total'), cantidad=Sum('cantidad'))
+        return self.rango_response(
+            inicio, fin,
+            total=resumen['total'] or 0,
+            cantidad=resumen['cantidad'] or 0,
+            por_dia=agrupar('fecha'),
+            por_metodo=agrupar('metodo'),
+            por_membresia=agrupar('membresia', 'membresia__tipo'),
+        )
+
+    @action(detail=False, methods=['get'])
+    def asistencia(self, request):
+        """Entradas por día y por hora del día"""
+        inicio, fin = self.get_rango()
+        entradas = AsistenciaHoraria.objects.filter(fecha__range=(inicio, fin)).order_by()
+
+        por_hora = [0] * 24
+        for item in entradas.values('hora').annotate(total=Sum('entradas')):
+            por_hora[item['hora']] = item['total']
+
+        total = sum(por_hora)
+        return self.rango_response(
+            inicio, fin,
+            total=total,
+            por_dia=list(entradas.values('fecha').annotate(entradas=Sum('entradas')).order_by('fecha')),
+            por_hora=por_hora,
+            hora_pico=por_hora.index(max(por_hora)) if total else None,
+        )
+
+    @action(detail=False, methods=['get'])
+    def clases(self, request):
+        """Inscripciones por clase y por día"""
+        inicio, fin = self.get_rango()
+        inscripciones = InscripcionDiaria.objects.filter(fecha__range=(inicio, fin)).order_by()
+
+        por_clase = list(
+            inscripciones.values('clase', 'clase__nombre', 'clase__capacidad_max')
+            .annotate(inscripciones=Sum('inscripciones'))
+            .order_by('-inscripciones')
+        )
+        return self.rango_response(
+            inicio, fin,
+            total=sum(item['inscripciones'] for item in por_clase),
+            por_clase=por_clase,
+            por_dia=list(inscripciones.values('fecha').annotate(inscripciones=Sum('inscripciones')).order_by('fecha')),
+        )
+
+    @action(detail=False, methods=['get'])
+    def ingresos(self, request):
+        """Ingresos agrupados por día, semana o mes, con variación respecto al período anterior"""
+        inicio, fin = self.get_rango()
+        agrupar_por = request.query_params.get('agrupar_por', 'day')
+        if agrupar_por not in AGRUPACIONES:
+            raise ValidationError({'agrupar_por': [f'Debe ser uno de: {", ".join(AGRUPACIONES)}.']})
+
+        desde, hasta = self.rango_datetimes(inicio, fin)
+        filas = (
+            Pago.objects.filter(fecha_pago__gte=desde, fecha_pago__lt=hasta)
+            .annotate(periodo=Trunc('fecha_pago', AGRUPACIONES[agrupar_por], output_field=DateField()))
+            .values('periodo', 'metodo', membresia_tipo=F('socio__membresia__tipo'))
+            .annotate(total=Sum('monto'), cantidad=Count('pago_id'))
+            .order_by('periodo')
+        )
+
+        # Los períodos sin pagos cuentan como cero para que la variación compare con el anterior real
+        periodos = {
+            fecha: {'periodo': fecha, 'total': 0, 'cantidad': 0, 'por_metodo': {}, 'por_membresia': {}}
+            for fecha in inicios_de_periodo(inicio, fin, agrupar_por)
+        }
+        for fila in filas:
+            periodo = periodos[fila['periodo']]
+            periodo['total'] += fila['total']
+            periodo['cantidad'] += fila['cantidad']
+            for grupo, clave in (('por_metodo', fila['metodo']), ('por_membresia', fila['membresia_tipo'])):
+                periodo[grupo][clave] = periodo[grupo].get(clave, 0) + fila['total']
+
+        anterior = None
+        for periodo in periodos.values():
+            periodo.update(variacion(periodo['total'], anterior))
+            anterior = periodo['total']
+
+        # El rango anterior tiene la misma cantidad de días y termina justo antes de `inicio`
+        dias = (fin - inicio).days + 1
+        total = sum(periodo['total'] for periodo in periodos.values())
+        total_anterior = Pago.objects.filter(
+            fecha_pago__gte=desde - timedelta(days=dias), fecha_pago__lt=desde
+        ).aggregate(total=Sum('monto'))['total'] or 0
+
+        return self.rango_response(
+            inicio, fin,
+            agrupar_por=agrupar_por,
+            total=total,
+            cantidad=sum(periodo['cantidad'] for periodo in periodos.values()),
+            **variacion(total, total_anterior),
+            periodos=list(periodos.values()),
+        )
+
+    @action(detail=False, methods=['get'])
+    def retencion(self, request):
+        """Retención por cohorte de registro: % de socios con actividad N meses después"""
+        actual = indice_mes(timezone.localdate())
+        meses = {}
+        for param, defecto in (('desde', actual - 11), ('hasta', actual)):
+            valor = request.query_params.get(param)
+            if not valor:
+                meses[param] = defecto
+                continue
+            try:
+                meses[param] = indice_mes(datetime.strptime(valor, '%Y-%m'))
+            except ValueError:
+                raise ValidationError({param: ['Formato de mes inválido, use AAAA-MM.']})
+
+        if meses['desde'] > meses['hasta']:
+            raise ValidationError({'desde': ['Debe ser anterior o igual a hasta.']})
+        if meses['hasta'] - meses['desde'] >= MAX_MESES:
+            raise ValidationError({'desde': [f'El rango no puede superar {MAX_MESES} meses.']})
+
+        metrica = request.query_params.get('metrica', 'asistencia')
+        if metrica not in METRICAS:
+            raise ValidationError({'metrica': [f'Debe ser uno de: {", ".join(METRICAS)}.']})
+
+        return Response(reporte_retencion(meses['desde'], meses['hasta'], metrica, actual))
+
+
+def inicios_de_periodo(inicio, fin, agrupar_por):
+    """Primer día (como lo devuelve Trunc) de cada día, semana o mes que toca el rango"""
+    if agrupar_por == 'week':
+        fecha = inicio - timedelta(days=inicio.weekday())
+    elif agrupar_por == 'month':
+        fecha = inicio.replace(day=1)
+    else:
+        fecha = inicio
+    while fecha <= fin:
+        yield fecha
+        if agrupar_por == 'month':
+            fecha = (fecha + timedelta(days=32)).replace(day=1)
+        else:
+            fecha += timedelta(days=7 if agrupar_por == 'week' else 1)
+
+
+def variacion(actual, anterior):
+    """Diferencia absoluta y porcentual contra el valor anterior (None si no hay base)"""
+    if anterior is None:
+        return {'anterior': None, 'variacion': None, 'variacion_pct': None}
+    return {
+        'anterior': anterior,
+        'variacion': actual - anterior,
+        'variacion_pct': round((actual - anterior) * 100 / anterior, 2) if anterior else None,
+    }
@@ -3,6 +3,10 @@ ASGI config for gimnasio project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The notification stream (``/notifications/stream/``) is a long-lived async
+view, so production should serve this application with an ASGI worker, e.g.
+``gunicorn gimnasio.asgi:application -k uvicorn.workers.UvicornWorker``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -32,6 +32,7 @@ DJANGO_APPS = [
 PROJECT_APPS = [
     'apps.core',
     'apps.Users',
+    'apps.reports',
     'notifications',
 ]
 
@@ -55,6 +56,8 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    'DEFAULT_PAGINATION_CLASS': 'apps.core.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
 # JWT settings
@@ -69,6 +72,7 @@ SIMPLE_JWT = {
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'apps.core.middleware.QueryInstrumentationMiddleware',  # Server-Timing y consultas por petición
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware
     'django.middleware.common.CommonMiddleware',
@@ -113,6 +117,18 @@ DATABASES = {
     }
 }
 
+# Los contadores de no leídas, la ocupación y los registros de acceso viven en
+# esta caché. Con varios procesos debe ser compartida (p. ej. redis://host:6379/1);
+# LocMem solo sirve para un proceso.
+CACHES = {
+    'default': env.cache_url('CACHE_URL', default='locmemcache://'),
+}
+
+# Check-in en micro-lotes (apps/core/checkin.py): ventana en segundos para juntar
+# entradas simultáneas en un INSERT. Activarlo (p. ej. 0.005) solo con workers
+# con hilos (gunicorn --threads) o ASGI; con workers síncronos solo añade espera.
+CHECKIN_BATCH_WINDOW = env.float('CHECKIN_BATCH_WINDOW', default=0)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
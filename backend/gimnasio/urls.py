@@ -9,6 +9,7 @@ urlpatterns = [
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.jwt')),
     path('api/v1/', include('apps.core.urls')),
+    path('api/v1/', include('apps.reports.urls')),
     path('api/v1/', include('notifications.urls')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
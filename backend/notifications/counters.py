@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Notification
+
+UNREAD_TIMEOUT = getattr(settings, 'NOTIFICATIONS_UNREAD_CACHE_TIMEOUT', 60 * 60)
+STATS_TIMEOUT = getattr(settings, 'NOTIFICATIONS_STATS_CACHE_TIMEOUT', 60 * 60)
+
+
+def unread_cache_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def stats_cache_key(user_id):
+    return f'notifications:stats:{user_id}'
+
+
+def count_unread(user_id):
+    """Conteo real en la base de datos (usa el índice user+read)"""
+    return Notification.objects.filter(user_id=user_id, read=False).count()
+
+
+def get_unread_count(user_id):
+    """Contador de no leídas desde la caché; si no está, se calcula y se guarda"""
+    key = unread_cache_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = count_unread(user_id)
+        # add() no pisa un valor que otra petición haya guardado mientras tanto
+        cache.add(key, count, UNREAD_TIMEOUT)
+    return count
+
+
+def adjust_unread_count(user_id, delta):
+    """
+    Suma `delta` al contador cuando se confirma la transacción. Si el
+    contador no está en caché no se hace nada: la próxima lectura lo recalcula.
+    """
+    if not delta:
+        return
+
+    def apply():
+        key = unread_cache_key(user_id)
+        try:
+            if delta > 0:
+                cache.incr(key, delta)
+            else:
+                cache.decr(key, -delta)
+        except ValueError:
+            pass
+
+    transaction.on_commit(apply)
+
+
+def invalidate_unread_counts(user_ids):
+    """Descarta los contadores de varios usuarios en una sola operación de caché"""
+    keys = [unread_cache_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def set_unread_counts(counts):
+    cache.set_many({unread_cache_key(user_id): count for user_id, count in counts.items()}, UNREAD_TIMEOUT)
+
+
+def get_cached_stats(user_id, compute):
+    """Conteos de estadísticas del usuario; `compute` se llama solo si no están en caché"""
+    key = stats_cache_key(user_id)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute()
+        cache.set(key, stats, STATS_TIMEOUT)
+    return stats
+
+
+def invalidate_stats(user_ids):
+    """Descarta las estadísticas en caché cuando se confirma la transacción"""
+    keys = [stats_cache_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
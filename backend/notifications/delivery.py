@@ -0,0 +1,169 @@
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import NotificationLog
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = getattr(settings, 'NOTIFICATIONS_DELIVERY_LEASE', 300)
+MAX_ATTEMPTS = getattr(settings, 'NOTIFICATIONS_DELIVERY_MAX_ATTEMPTS', 5)
+BACKOFF_SECONDS = getattr(settings, 'NOTIFICATIONS_DELIVERY_BACKOFF', 60)
+
+RESULT_FIELDS = [
+    'delivery_status', 'delivered_at', 'error_message',
+    'attempts', 'next_attempt_at', 'locked_until', 'claimed_by',
+]
+
+
+def claim_batch(size, worker_id=None):
+    """
+    Reserva hasta `size` entregas pendientes para este worker.
+
+    La reserva es un UPDATE condicional que fija `claimed_by`/`locked_until`,
+    así que dos workers nunca reciben el mismo log; si el worker muere, la
+    reserva caduca y otro la retoma. En PostgreSQL los candidatos se leen con
+    FOR UPDATE SKIP LOCKED para no competir por las mismas filas.
+    """
+    worker_id = worker_id or uuid.uuid4().hex
+    now = timezone.now()
+    available = Q(delivery_status='pending', next_attempt_at__lte=now) & (
+        Q(locked_until__isnull=True) | Q(locked_until__lte=now)
+    )
+
+    with transaction.atomic():
+        candidates = NotificationLog.objects.filter(available).order_by('next_attempt_at')
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.values_list('log_id', flat=True)[:size])
+        if not ids:
+            return []
+        NotificationLog.objects.filter(available, log_id__in=ids).update(
+            claimed_by=worker_id,
+            locked_until=now + timedelta(seconds=LEASE_SECONDS),
+        )
+
+    return list(
+        NotificationLog.objects.filter(log_id__in=ids, claimed_by=worker_id)
+        .select_related('notification')
+    )
+
+
+def mark_delivered(log, now):
+    log.delivery_status = 'sent'
+    log.delivered_at = now
+    log.error_message = None
+
+
+def mark_failed(log, error, now):
+    log.attempts += 1
+    log.error_message = str(error)
+    if log.attempts >= MAX_ATTEMPTS:
+        log.delivery_status = 'failed'
+    else:
+        # Espera exponencial: 1, 2, 4, 8... veces el intervalo base
+        log.next_attempt_at = now + timedelta(seconds=BACKOFF_SECONDS * 2 ** (log.attempts - 1))
+
+
+def send_email_batch(logs):
+    """Envía los emails del lote reutilizando una sola conexión SMTP"""
+    now = timezone.now()
+    try:
+        email_connection = get_connection(fail_silently=False)
+        email_connection.open()
+    except Exception as exc:
+        logger.warning('No se pudo abrir la conexión de email: %s', exc)
+        for log in logs:
+            mark_failed(log, exc, now)
+        return
+
+    try:
+        for log in logs:
+            message = EmailMessage(
+                subject=log.notification.title,
+                body=log.notification.message,
+                to=[log.delivery_address],
+                connection=email_connection,
+            )
+            try:
+                message.send()
+            except Exception as exc:
+                mark_failed(log, exc, now)
+            else:
+                mark_delivered(log, now)
+    finally:
+        email_connection.close()
+
+
+def send_push_batch(logs):
+    now = timezone.now()
+    backend_path = getattr(settings, 'NOTIFICATIONS_PUSH_BACKEND', None)
+    if not backend_path:
+        for log in logs:
+            mark_failed(log, 'No hay proveedor de notificaciones push configurado', now)
+        return
+
+    backend = import_string(backend_path)()
+    for log in logs:
+        try:
+            backend.send(log.delivery_address, log.notification.title, log.notification.message)
+        except Exception as exc:
+            mark_failed(log, exc, now)
+        else:
+            mark_delivered(log, now)
+
+
+def send_in_app_batch(logs):
+    now = timezone.now()
+    for log in logs:
+        mark_delivered(log, now)
+
+
+SENDERS = {
+    'email': send_email_batch,
+    'push': send_push_batch,
+    'in_app': send_in_app_batch,
+}
+
+
+def deliver_batch(logs):
+    """Entrega un lote reservado y guarda los resultados con un solo bulk_update"""
+    by_method = {}
+    for log in logs:
+        by_method.setdefault(log.delivery_method, []).append(log)
+
+    now = timezone.now()
+    for method, method_logs in by_method.items():
+        sender = SENDERS.get(method)
+        if sender is None:
+            for log in method_logs:
+                mark_failed(log, f'Método de entrega no soportado: {method}', now)
+            continue
+        sender(method_logs)
+
+    for log in logs:
+        log.locked_until = None
+        log.claimed_by = ''
+    NotificationLog.objects.bulk_update(logs, RESULT_FIELDS)
+    return logs
+
+
+def enqueue_deliveries(notifications, addresses, methods):
+    """Crea los logs pendientes de entrega para las notificaciones recién creadas"""
+    logs = [
+        NotificationLog(
+            notification=notification,
+            delivery_method=method,
+            delivery_address=addresses[notification.user_id],
+        )
+        for notification in notifications
+        for method in methods
+    ]
+    return NotificationLog.objects.bulk_create(logs, batch_size=500)
@@ -0,0 +1,97 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import BulkNotificationJob
+from .services import create_bulk_notifications
+
+logger = logging.getLogger(__name__)
+
+# Tiempo que un worker reserva un trabajo antes de que otro pueda retomarlo
+LEASE_SECONDS = getattr(settings, 'NOTIFICATIONS_JOB_LEASE', 60 * 30)
+
+
+def submit_job(user, user_ids, send_email, send_push, data):
+    """Guarda un envío masivo pendiente; lo ejecuta el worker deliver_notifications"""
+    return BulkNotificationJob.objects.create(
+        created_by=user,
+        payload={'user_ids': user_ids, 'send_email': send_email, 'send_push': send_push, 'data': data},
+    )
+
+
+def claim_job(worker_id):
+    """
+    Reserva el trabajo pendiente más antiguo con un UPDATE condicional, igual
+    que claim_batch con los logs. Un trabajo cuya reserva caducó (el worker
+    murió) vuelve a estar disponible.
+    """
+    now = timezone.now()
+    available = Q(status__in=['pending', 'running']) & (Q(locked_until__isnull=True) | Q(locked_until__lte=now))
+
+    with transaction.atomic():
+        candidates = BulkNotificationJob.objects.filter(available).order_by('created_at')
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        job_id = candidates.values_list('job_id', flat=True).first()
+        if job_id is None:
+            return None
+        claimed = BulkNotificationJob.objects.filter(available, job_id=job_id).update(
+            status='running',
+            claimed_by=worker_id,
+            locked_until=now + timedelta(seconds=LEASE_SECONDS),
+        )
+    if not claimed:
+        return None
+    return BulkNotificationJob.objects.get(job_id=job_id)
+
+
+def run_job(job):
+    payload = job.payload
+    try:
+        # Las notificaciones y el estado final se confirman juntos: si el worker
+        # muere a mitad, el trabajo se retoma sin duplicar notificaciones
+        with transaction.atomic():
+            notifications = create_bulk_notifications(
+                payload['user_ids'], send_email=payload['send_email'], send_push=payload['send_push'],
+                **payload['data']
+            )
+            finish(job, 'done', result={
+                'created': len(notifications),
+                'skipped': len(set(payload['user_ids'])) - len(notifications),
+            })
+    except Exception as exc:
+        logger.exception('Error en el envío masivo %s', job.job_id.hex)
+        finish(job, 'failed', error_message=str(exc))
+    return job
+
+
+def finish(job, status, result=None, error_message=None):
+    job.status = status
+    job.result = result
+    job.error_message = error_message
+    job.finished_at = timezone.now()
+    job.locked_until = None
+    job.claimed_by = ''
+    job.save(update_fields=['status', 'result', 'error_message', 'finished_at', 'locked_until', 'claimed_by'])
+
+
+def job_status(job):
+    data = {'job_id': job.job_id.hex, 'status': job.status}
+    if job.status == 'done':
+        data['result'] = job.result
+    elif job.status == 'failed':
+        data['error'] = job.error_message
+    return data
+
+
+def get_job(job_id, user):
+    """Estado del trabajo si existe y es del usuario (el personal ve todos)"""
+    jobs = BulkNotificationJob.objects.filter(job_id=job_id)
+    if not user.is_staff:
+        jobs = jobs.filter(created_by=user)
+    job = jobs.first()
+    return None if job is None else job_status(job)
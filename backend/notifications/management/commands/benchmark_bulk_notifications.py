@@ -0,0 +1,49 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_databases, teardown_databases
+
+from notifications.models import Notification
+from notifications.services import create_bulk_notifications
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Mide notificaciones por segundo del envío masivo sobre una base de datos temporal'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5000, help='Tamaño de la audiencia')
+        parser.add_argument('--repeat', type=int, default=3, help='Número de envíos medidos')
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            self.run_benchmark(options['users'], options['repeat'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def run_benchmark(self, total_users, repeat):
+        User.objects.bulk_create(
+            [User(email=f'bench{i}@gimnasio.test', first_name='Bench', last_name=str(i)) for i in range(total_users)],
+            batch_size=1000,
+        )
+        user_ids = list(User.objects.values_list('id', flat=True))
+        self.stdout.write(f'Audiencia: {len(user_ids)} usuarios')
+
+        for run in range(1, repeat + 1):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                created = create_bulk_notifications(
+                    user_ids, title='Benchmark', message='Mensaje de prueba',
+                    notification_type='info', category='system', priority='high',
+                )
+                elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'Ejecución {run}: {len(created)} notificaciones en {elapsed * 1000:.1f} ms '
+                f'({len(created) / elapsed:,.0f} notificaciones/s, {len(queries)} consultas)'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Total insertadas: {Notification.objects.count()}'))
@@ -0,0 +1,41 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notifications.delivery import claim_batch, deliver_batch
+from notifications.jobs import claim_job, run_job
+
+
+class Command(BaseCommand):
+    help = 'Worker que ejecuta los envíos masivos pendientes y entrega las notificaciones de NotificationLog (email, push)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Logs reservados por lote')
+        parser.add_argument('--interval', type=float, default=5.0, help='Segundos de espera cuando no hay trabajo')
+        parser.add_argument('--once', action='store_true', help='Procesar la cola una vez y terminar')
+
+    def handle(self, *args, **options):
+        worker_id = f'worker-{uuid.uuid4().hex[:12]}'
+        self.stdout.write(f'Iniciando {worker_id}')
+
+        try:
+            while True:
+                close_old_connections()
+                job = claim_job(worker_id)
+                if job is not None:
+                    run_job(job)
+                    self.stdout.write(f'Envío masivo {job.job_id.hex}: {job.status}')
+                    continue
+                logs = claim_batch(options['batch_size'], worker_id)
+                if logs:
+                    deliver_batch(logs)
+                    sent = sum(1 for log in logs if log.delivery_status == 'sent')
+                    self.stdout.write(f'Lote de {len(logs)}: {sent} enviados, {len(logs) - sent} con error')
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Worker detenido')
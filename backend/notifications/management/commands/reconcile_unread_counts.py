@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from notifications.counters import set_unread_counts, unread_cache_key
+from notifications.models import Notification
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores de notificaciones no leídas guardados en caché'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        # Un solo GROUP BY para todos los usuarios con notificaciones sin leer
+        counts = dict(
+            Notification.objects.filter(read=False).order_by()
+            .values('user_id').annotate(total=Count('notification_id'))
+            .values_list('user_id', 'total')
+        )
+
+        user_ids = list(User.objects.values_list('id', flat=True))
+        drifted = 0
+        for start in range(0, len(user_ids), options['chunk_size']):
+            chunk = user_ids[start:start + options['chunk_size']]
+            cached = cache.get_many([unread_cache_key(user_id) for user_id in chunk])
+            expected = {user_id: counts.get(user_id, 0) for user_id in chunk}
+            drifted += sum(
+                1 for user_id, count in expected.items()
+                if unread_cache_key(user_id) in cached and cached[unread_cache_key(user_id)] != count
+            )
+            set_unread_counts(expected)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Contadores recalculados para {len(user_ids)} usuarios ({drifted} desajustados)'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from notifications.triggers import TRIGGERS, run_triggers
+
+
+class Command(BaseCommand):
+    help = 'Evalúa las plantillas de notificación activas y crea las notificaciones de sus disparadores'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--trigger', action='append', choices=sorted(TRIGGERS),
+            help='Evaluar solo este tipo de disparador (se puede repetir)',
+        )
+
+    def handle(self, *args, **options):
+        results = run_triggers(trigger_types=options['trigger'])
+        for template, notifications in results.items():
+            self.stdout.write(f'{template}: {len(notifications)} notificaciones')
+        self.stdout.write(self.style.SUCCESS(f'{sum(map(len, results.values()))} notificaciones creadas'))
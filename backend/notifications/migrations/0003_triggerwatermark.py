@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_notificationlog_delivery_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TriggerWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_run_at', models.DateTimeField()),
+                ('template', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='watermark', to='notifications.notificationtemplate')),
+            ],
+        ),
+    ]
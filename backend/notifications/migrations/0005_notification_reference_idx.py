@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_socio_busqueda'),
+        ('notifications', '0004_bulknotificationjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['reference_id', 'user'], name='notificatio_referen_a40a37_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_indices_keyset'),
+        ('notifications', '0005_notification_reference_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notificatio_created_46ad24_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['created_at', 'notification_id'], name='notificatio_created_bc6887_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'created_at', 'notification_id'], name='notificatio_user_id_3ae29c_idx'),
+        ),
+    ]
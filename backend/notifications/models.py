@@ -1,4 +1,7 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from apps.core.models import Socio
 
@@ -46,9 +49,13 @@ class Notification(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'read']),
-            models.Index(fields=['created_at']),
+            # Paginación keyset por (created_at, notification_id), global y por usuario
+            models.Index(fields=['created_at', 'notification_id']),
+            models.Index(fields=['user', 'created_at', 'notification_id']),
             models.Index(fields=['category']),
             models.Index(fields=['priority']),
+            # Deduplicación de los disparadores (build_notifications)
+            models.Index(fields=['reference_id', 'user']),
         ]
     
     def __str__(self):
@@ -113,6 +120,15 @@ class NotificationTemplate(models.Model):
     def __str__(self):
         return f'{self.name} ({self.trigger_type})'
 
+class TriggerWatermark(models.Model):
+    """Marca de agua de cada plantilla: hasta dónde se evaluó su disparador"""
+    
+    template = models.OneToOneField(NotificationTemplate, on_delete=models.CASCADE, related_name='watermark')
+    last_run_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f'{self.template.name} hasta {self.last_run_at}'
+
 class NotificationLog(models.Model):
     """Log de notificaciones enviadas para auditoría"""
     
@@ -141,8 +157,50 @@ class NotificationLog(models.Model):
     sent_at = models.DateTimeField(auto_now_add=True)
     delivered_at = models.DateTimeField(null=True, blank=True)
     
+    # Control de la cola de entrega (reintentos y reserva por el worker)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    claimed_by = models.CharField(max_length=64, blank=True, default='')
+    
     class Meta:
         ordering = ['-sent_at']
+        indexes = [
+            models.Index(fields=['delivery_status', 'next_attempt_at']),
+        ]
     
     def __str__(self):
         return f'{self.notification.title} - {self.delivery_method} ({self.delivery_status})'
+
+class BulkNotificationJob(models.Model):
+    """Envío masivo en segundo plano; lo ejecuta el worker deliver_notifications"""
+    
+    STATUS = [
+        ('pending', 'Pendiente'),
+        ('running', 'En curso'),
+        ('done', 'Terminado'),
+        ('failed', 'Fallido'),
+    ]
+    
+    job_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bulk_notification_jobs')
+    status = models.CharField(max_length=20, choices=STATUS, default='pending')
+    payload = models.JSONField()
+    result = models.JSONField(null=True, blank=True)
+    error_message = models.TextField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    # Reserva por el worker, como en NotificationLog
+    locked_until = models.DateTimeField(null=True, blank=True)
+    claimed_by = models.CharField(max_length=64, blank=True, default='')
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f'Envío masivo {self.job_id.hex} ({self.status})'
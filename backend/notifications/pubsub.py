@@ -0,0 +1,78 @@
+import asyncio
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+QUEUE_SIZE = 100
+
+
+class Subscription:
+    """Cola de mensajes de un cliente conectado"""
+
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Un cliente lento pierde mensajes en lugar de bloquear al resto
+            pass
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Pub/sub en memoria para un único proceso ASGI.
+
+    `publish` puede llamarse desde cualquier hilo (las vistas síncronas corren
+    en un pool de hilos); el mensaje se entrega en el event loop de cada
+    suscriptor. Para varios procesos se puede configurar en
+    NOTIFICATIONS_BROKER otra clase con la misma interfaz
+    (subscribe/unsubscribe/publish) respaldada por un broker compartido.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, message)
+            except RuntimeError:
+                # El event loop del suscriptor ya se cerró
+                self.unsubscribe(subscription)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    broker_path = getattr(settings, 'NOTIFICATIONS_BROKER', 'notifications.pubsub.InProcessBroker')
+    return import_string(broker_path)()
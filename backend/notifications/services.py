@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from .counters import invalidate_stats, invalidate_unread_counts
+from .delivery import enqueue_deliveries
+from .models import Notification, NotificationSettings
+from .pubsub import get_broker
+
+User = get_user_model()
+
+BULK_BATCH_SIZE = getattr(settings, 'NOTIFICATIONS_BULK_BATCH_SIZE', 500)
+
+
+def accepts_notifications(category, priority, relation='notification_settings'):
+    """
+    Condición sobre NotificationSettings para aceptar una categoría y prioridad.
+    Los usuarios sin configuración se evalúan con los valores por defecto del modelo.
+    """
+    category_field = f'{category}_enabled'
+    priority_field = f'{priority}_priority_enabled'
+    condition = Q(**{f'{relation}__{category_field}': True, f'{relation}__{priority_field}': True})
+
+    opts = NotificationSettings._meta
+    if opts.get_field(category_field).default and opts.get_field(priority_field).default:
+        condition |= Q(**{f'{relation}__isnull': True})
+    return condition
+
+
+def resolve_recipients(user_ids, category, priority):
+    """Email por id de los usuarios existentes que aceptan la notificación, en una sola consulta"""
+    return dict(
+        User.objects.filter(id__in=set(user_ids))
+        .filter(accepts_notifications(category, priority))
+        .values_list('id', 'email')
+    )
+
+
+def create_bulk_notifications(user_ids, send_email=False, send_push=False, **data):
+    """
+    Crea la misma notificación para varios usuarios con inserciones por lotes.
+    Los envíos por email/push quedan encolados en NotificationLog para el
+    worker `deliver_notifications`.
+    """
+    with transaction.atomic():
+        recipients = resolve_recipients(user_ids, data['category'], data['priority'])
+        methods = [method for method, enabled in (('email', send_email), ('push', send_push)) if enabled]
+        return create_notifications(
+            [Notification(user_id=user_id, **data) for user_id in recipients],
+            addresses=recipients,
+            methods=methods,
+        )
+
+
+def create_notifications(notifications, addresses=None, methods=()):
+    """
+    Inserta notificaciones ya construidas por lotes, encola sus entregas,
+    invalida los contadores de los destinatarios y las publica al confirmar.
+    """
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create(notifications, batch_size=BULK_BATCH_SIZE)
+        if methods:
+            enqueue_deliveries(notifications, addresses, methods)
+        user_ids = {notification.user_id for notification in notifications}
+        invalidate_unread_counts(user_ids)
+        invalidate_stats(user_ids)
+        publish_created(notifications)
+    return notifications
+
+
+def notification_payload(notification):
+    """Representación compacta que se envía a los clientes conectados"""
+    return {
+        'notification_id': notification.notification_id,
+        'title': notification.title,
+        'message': notification.message,
+        'notification_type': notification.notification_type,
+        'category': notification.category,
+        'priority': notification.priority,
+        'read': notification.read,
+        'created_at': notification.created_at.isoformat(),
+        'socio': notification.socio_id,
+        'reference_id': notification.reference_id,
+    }
+
+
+def publish_created(notifications):
+    """Publica las notificaciones nuevas a sus destinatarios cuando se confirma la transacción"""
+    messages = [(notification.user_id, notification_payload(notification)) for notification in notifications]
+
+    def publish():
+        broker = get_broker()
+        for user_id, payload in messages:
+            broker.publish(user_id, payload)
+
+    transaction.on_commit(publish)
@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .counters import get_unread_count
+from .pubsub import get_broker
+
+KEEPALIVE_SECONDS = 15
+TICKET_SALT = 'notifications.stream'
+# Segundos que un ticket sirve para abrir el stream
+TICKET_MAX_AGE = getattr(settings, 'NOTIFICATIONS_STREAM_TICKET_MAX_AGE', 60)
+
+
+def create_stream_ticket(user):
+    """
+    Ticket firmado y de vida corta para abrir el stream. EventSource no
+    permite enviar cabeceras, y así el JWT no queda en la URL ni en los
+    logs de acceso.
+    """
+    return signing.dumps(user.pk, salt=TICKET_SALT)
+
+
+def authenticate_stream(request):
+    """Autentica con el JWT de la cabecera Authorization o con un ticket de create_stream_ticket"""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header:
+        raw_token = authentication.get_raw_token(header)
+        if not raw_token:
+            return None
+        try:
+            return authentication.get_user(authentication.get_validated_token(raw_token))
+        except (InvalidToken, TokenError):
+            return None
+
+    ticket = request.GET.get('ticket')
+    if not ticket:
+        return None
+    try:
+        user_id = signing.loads(ticket, salt=TICKET_SALT, max_age=TICKET_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return get_user_model().objects.filter(pk=user_id).first()
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+async def event_stream(user_id):
+    subscription = get_broker().subscribe(user_id)
+    try:
+        unread_count = await sync_to_async(get_unread_count)(user_id)
+        yield format_event('unread_count', {'unread_count': unread_count})
+
+        while True:
+            try:
+                notification = await asyncio.wait_for(subscription.get(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            unread_count = await sync_to_async(get_unread_count)(user_id)
+            yield format_event('notification', {'notification': notification, 'unread_count': unread_count})
+    finally:
+        subscription.close()
+
+
+async def notification_stream(request):
+    """
+    Server-Sent Events con las notificaciones nuevas del usuario y su
+    contador de no leídas. Requiere servir la aplicación ASGI
+    (gimnasio.asgi:application).
+    """
+    user = await sync_to_async(authenticate_stream)(request)
+    if user is None or not user.is_active:
+        return HttpResponse(status=401)
+
+    response = StreamingHttpResponse(event_stream(user.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
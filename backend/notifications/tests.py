@@ -1,3 +1,422 @@
-from django.test import TestCase
+from copy import copy
+from datetime import timedelta
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.Users.models import UserAccount
+from apps.core.models import DIAS_POR_MES, Asistencia, Clase, Entrenador, Equipo, Membresia, Pago, Socio, SocioClase
+
+from .counters import count_unread
+from .delivery import BACKOFF_SECONDS, MAX_ATTEMPTS, claim_batch, deliver_batch, enqueue_deliveries
+from .jobs import claim_job, run_job
+from .models import BulkNotificationJob, Notification, NotificationLog, NotificationTemplate, TriggerWatermark
+from .streams import authenticate_stream
+from .triggers import LOW_ATTENDANCE_DAYS, MAINTENANCE_INTERVAL, low_attendance, run_template
+from .views import NotificationViewSet
+
+
+def crear_usuario(email, **extra):
+    return UserAccount.objects.create_user(email=email, password='x', first_name='Test', last_name='Test', **extra)
+
+
+class BulkJobTests(TestCase):
+    """Los envíos masivos grandes quedan en la base de datos y los ejecuta el worker"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.autor = crear_usuario('autor@gimnasio.test', is_staff=True)
+        cls.otro = crear_usuario('otro@gimnasio.test')
+        cls.destinatarios = [crear_usuario(f'dest{i}@gimnasio.test') for i in range(3)]
+
+    def cliente(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def encolar(self):
+        with mock.patch('notifications.views.BULK_SYNC_LIMIT', 1):
+            response = self.cliente(self.autor).post('/api/v1/api/notifications/bulk_create/', {
+                'title': 'Aviso', 'message': 'Mensaje', 'notification_type': 'info',
+                'category': 'system', 'priority': 'medium',
+                'user_ids': [user.pk for user in self.destinatarios],
+            }, format='json')
+        self.assertEqual(response.status_code, 202)
+        return response.data['job_id']
+
+    def test_el_trabajo_se_persiste_y_lo_ejecuta_el_worker(self):
+        job_id = self.encolar()
+        self.assertEqual(Notification.objects.count(), 0)
+        url = f'/api/v1/api/notifications/bulk_jobs/{job_id}/'
+        self.assertEqual(self.cliente(self.autor).get(url).data['status'], 'pending')
+
+        job = claim_job('worker-1')
+        self.assertEqual(job.job_id.hex, job_id)
+        run_job(job)
+
+        response = self.cliente(self.autor).get(url)
+        self.assertEqual(response.data['status'], 'done')
+        self.assertEqual(response.data['result'], {'created': 3, 'skipped': 0})
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertIsNone(claim_job('worker-1'))
+
+    def test_solo_el_autor_o_el_personal_ven_el_trabajo(self):
+        job_id = self.encolar()
+        url = f'/api/v1/api/notifications/bulk_jobs/{job_id}/'
+        self.assertEqual(self.cliente(self.otro).get(url).status_code, 404)
+        admin = crear_usuario('admin-jobs@gimnasio.test', is_staff=True)
+        self.assertEqual(self.cliente(admin).get(url).status_code, 200)
+
+    def test_reserva_exclusiva_y_caducidad(self):
+        self.encolar()
+        job = claim_job('worker-1')
+        self.assertIsNotNone(job)
+        self.assertIsNone(claim_job('worker-2'))
+
+        # El worker murió: al caducar la reserva otro worker retoma el trabajo
+        BulkNotificationJob.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        retomado = claim_job('worker-2')
+        self.assertEqual(retomado.job_id, job.job_id)
+        self.assertEqual(retomado.claimed_by, 'worker-2')
+
+    def test_error_marca_el_trabajo_como_fallido(self):
+        self.encolar()
+        job = claim_job('worker-1')
+        with mock.patch('notifications.jobs.create_bulk_notifications', side_effect=RuntimeError('sin base')), \
+                self.assertLogs('notifications.jobs', 'ERROR'):
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.error_message, 'sin base')
+        self.assertIsNone(claim_job('worker-1'))
+
+
+class DeliveryTests(TestCase):
+    """Cola de entregas de NotificationLog contra el backend de email en memoria"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = crear_usuario('entregas@gimnasio.test')
+        cls.notification = Notification.objects.create(user=cls.user, title='Aviso', message='Mensaje')
+
+    def encolar(self, cantidad, method='email'):
+        return enqueue_deliveries(
+            [self.notification] * cantidad, {self.user.pk: self.user.email}, [method]
+        )
+
+    def test_entrega_por_email(self):
+        self.encolar(3)
+        logs = claim_batch(10, 'worker-1')
+        deliver_batch(logs)
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].to, [self.user.email])
+        self.assertEqual(mail.outbox[0].subject, 'Aviso')
+        for log in NotificationLog.objects.all():
+            self.assertEqual(log.delivery_status, 'sent')
+            self.assertIsNotNone(log.delivered_at)
+            self.assertIsNone(log.locked_until)
+            self.assertEqual(log.claimed_by, '')
+
+    def test_reserva_exclusiva(self):
+        self.encolar(5)
+        primero = claim_batch(3, 'worker-1')
+        segundo = claim_batch(10, 'worker-2')
+        self.assertEqual(len(primero), 3)
+        self.assertEqual(len(segundo), 2)
+        self.assertFalse({log.pk for log in primero} & {log.pk for log in segundo})
+        self.assertEqual(claim_batch(10, 'worker-3'), [])
+
+    def test_reserva_caducada(self):
+        self.encolar(2)
+        claim_batch(10, 'worker-1')
+        self.assertEqual(claim_batch(10, 'worker-2'), [])
+
+        # El worker murió sin entregar: al caducar la reserva otro la retoma
+        NotificationLog.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        retomados = claim_batch(10, 'worker-2')
+        self.assertEqual(len(retomados), 2)
+        self.assertTrue(all(log.claimed_by == 'worker-2' for log in retomados))
+
+    def test_reintento_con_espera_exponencial(self):
+        self.encolar(1)
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=SMTPException('caído')):
+            antes = timezone.now()
+            deliver_batch(claim_batch(10, 'worker-1'))
+            log = NotificationLog.objects.get()
+            self.assertEqual(log.delivery_status, 'pending')
+            self.assertEqual(log.attempts, 1)
+            self.assertEqual(log.error_message, 'caído')
+            self.assertGreaterEqual(log.next_attempt_at, antes + timedelta(seconds=BACKOFF_SECONDS))
+
+            # Hasta que pase la espera no se vuelve a reservar
+            self.assertEqual(claim_batch(10, 'worker-1'), [])
+
+            NotificationLog.objects.update(next_attempt_at=timezone.now())
+            antes = timezone.now()
+            deliver_batch(claim_batch(10, 'worker-1'))
+            log.refresh_from_db()
+            self.assertEqual(log.attempts, 2)
+            self.assertGreaterEqual(log.next_attempt_at, antes + timedelta(seconds=BACKOFF_SECONDS * 2))
+
+    def test_fallido_al_agotar_intentos(self):
+        self.encolar(1)
+        NotificationLog.objects.update(attempts=MAX_ATTEMPTS - 1)
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=SMTPException('caído')):
+            deliver_batch(claim_batch(10, 'worker-1'))
+        log = NotificationLog.objects.get()
+        self.assertEqual(log.delivery_status, 'failed')
+        self.assertEqual(log.attempts, MAX_ATTEMPTS)
+        self.assertEqual(claim_batch(10, 'worker-1'), [])
+
+    def test_resultados_en_un_solo_update(self):
+        self.encolar(4)
+        self.encolar(2, method='in_app')
+        logs = claim_batch(10, 'worker-1')
+        with CaptureQueriesContext(connection) as queries:
+            deliver_batch(logs)
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(NotificationLog.objects.filter(delivery_status='sent').count(), 6)
+
+
+class UnreadCounterTests(TestCase):
+    """El contador en caché sigue al conteo real aunque lleguen peticiones repetidas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = crear_usuario('contador@gimnasio.test')
+        Notification.objects.bulk_create([
+            Notification(user=cls.user, title=f'Aviso {i}', message='') for i in range(3)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.notification = Notification.objects.filter(user=self.user).first()
+        self.url = f'/api/v1/api/notifications/{self.notification.pk}/'
+
+    def contador(self):
+        return self.client.get('/api/v1/api/notifications/unread_count/').data['unread_count']
+
+    def assertContador(self, esperado):
+        self.assertEqual(self.contador(), esperado)
+        self.assertEqual(count_unread(self.user.pk), esperado)
+
+    def como_peticion_concurrente(self):
+        # Cada petición recibe la notificación tal como estaba antes de marcarla
+        return mock.patch.object(NotificationViewSet, 'get_object', side_effect=lambda: copy(self.notification))
+
+    def test_mark_read_concurrente(self):
+        self.assertContador(3)
+        with self.captureOnCommitCallbacks(execute=True), self.como_peticion_concurrente():
+            self.client.post(f'{self.url}mark_read/')
+            response = self.client.post(f'{self.url}mark_read/')
+        self.assertTrue(response.data['read'])
+        self.assertContador(2)
+
+    def test_patch_concurrente(self):
+        self.assertContador(3)
+        with self.captureOnCommitCallbacks(execute=True), self.como_peticion_concurrente():
+            self.client.patch(self.url, {'read': True}, format='json')
+            self.client.patch(self.url, {'read': True}, format='json')
+        self.assertContador(2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(self.url, {'read': False}, format='json')
+        self.assertFalse(response.data['read'])
+        self.assertContador(3)
+
+    def test_borrado(self):
+        self.assertContador(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'{self.url}mark_read/')
+            self.client.delete(self.url)
+            otra = Notification.objects.filter(user=self.user).first()
+            self.client.delete(f'/api/v1/api/notifications/{otra.pk}/')
+        self.assertContador(1)
+
+
+class StreamAuthTests(TestCase):
+    """El stream SSE se abre con un ticket firmado, nunca con el JWT en la URL"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = crear_usuario('stream@gimnasio.test')
+
+    def pedir_ticket(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/v1/api/notifications/stream_ticket/')
+        self.assertEqual(response.status_code, 200)
+        return response.data['ticket']
+
+    def test_ruta_del_stream(self):
+        self.assertEqual(reverse('notification-stream'), '/api/v1/api/notifications/stream/')
+
+    def test_ticket_valido(self):
+        request = RequestFactory().get('/', {'ticket': self.pedir_ticket()})
+        self.assertEqual(authenticate_stream(request), self.user)
+
+    def test_ticket_caducado_o_alterado(self):
+        ticket = self.pedir_ticket()
+        with mock.patch('notifications.streams.TICKET_MAX_AGE', -1):
+            self.assertIsNone(authenticate_stream(RequestFactory().get('/', {'ticket': ticket})))
+        self.assertIsNone(authenticate_stream(RequestFactory().get('/', {'ticket': ticket + 'x'})))
+
+    def test_jwt_en_la_url_no_se_acepta(self):
+        token = str(AccessToken.for_user(self.user))
+        self.assertIsNone(authenticate_stream(RequestFactory().get('/', {'token': token})))
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'JWT {token}')
+        self.assertEqual(authenticate_stream(request), self.user)
+
+    async def test_sin_credenciales(self):
+        response = await self.async_client.get('/api/v1/api/notifications/stream/')
+        self.assertEqual(response.status_code, 401)
+
+
+class TriggerTests(TestCase):
+    """Ventanas de los disparadores y avance de su marca de agua"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = crear_usuario('staff-triggers@gimnasio.test', is_staff=True)
+        cls.miembro = crear_usuario('miembro-triggers@gimnasio.test')
+        cls.membresia = Membresia.objects.create(tipo='Mensual', descripcion='', precio_mensual=10, duracion_meses=1)
+        cls.socio = Socio.objects.create(nombre='Ana', telefono='0', correo='ana@gimnasio.test',
+                                         membresia=cls.membresia, user=cls.miembro)
+        Socio.objects.filter(pk=cls.socio.pk).update(fecha_registro=timezone.now() - timedelta(days=30))
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def plantilla(self, trigger_type, category='system'):
+        return NotificationTemplate.objects.create(
+            name=trigger_type, trigger_type=trigger_type, title_template='{nombre}', message_template='Aviso',
+            notification_type='info', category=category, priority='medium',
+        )
+
+    def test_nuevo_socio_y_marca_de_agua(self):
+        template = self.plantilla('new_member')
+        nuevo = Socio.objects.create(nombre='Beto', telefono='0', correo='beto@gimnasio.test', membresia=self.membresia)
+
+        creadas = run_template(template, self.now + timedelta(seconds=1))
+        self.assertEqual([(n.user_id, n.socio_id) for n in creadas], [(self.staff.pk, nuevo.pk)])
+        self.assertEqual(template.watermark.last_run_at, self.now + timedelta(seconds=1))
+
+        # Sin tiempo nuevo no se evalúa nada
+        self.assertEqual(run_template(template, self.now + timedelta(seconds=1)), [])
+
+        otro = Socio.objects.create(nombre='Carla', telefono='0', correo='carla@gimnasio.test',
+                                    membresia=self.membresia)
+        Socio.objects.filter(pk=otro.pk).update(fecha_registro=self.now + timedelta(seconds=2))
+        creadas = run_template(template, self.now + timedelta(seconds=3))
+        self.assertEqual([n.socio_id for n in creadas], [otro.pk])
+
+        # Aunque la ventana se repita, las notificaciones ya creadas no se duplican
+        TriggerWatermark.objects.filter(template=template).update(last_run_at=self.now - timedelta(days=1))
+        self.assertEqual(run_template(template, self.now + timedelta(seconds=4)), [])
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_recordatorio_de_clase(self):
+        template = self.plantilla('class_reminder', 'classes')
+        entrenador = Entrenador.objects.create(nombre='E', especialidad='G', telefono='0', correo='e@gimnasio.test')
+        pronto = Clase.objects.create(nombre='Pronto', entrenador=entrenador, capacidad_max=10,
+                                      horario=self.now + timedelta(hours=23))
+        despues = Clase.objects.create(nombre='Después', entrenador=entrenador, capacidad_max=10,
+                                       horario=self.now + timedelta(hours=30))
+        for clase in (pronto, despues):
+            SocioClase.objects.create(socio=self.socio, clase=clase)
+
+        creadas = run_template(template, self.now)
+        self.assertEqual([n.reference_id.rsplit(':', 1)[1] for n in creadas],
+                         [str(SocioClase.objects.get(clase=pronto).pk)])
+
+        # Siete horas después la clase de las 30 h entra en la ventana de 24 h
+        creadas = run_template(template, self.now + timedelta(hours=7))
+        self.assertEqual([n.reference_id.rsplit(':', 1)[1] for n in creadas],
+                         [str(SocioClase.objects.get(clase=despues).pk)])
+        self.assertTrue(all(n.user_id == self.miembro.pk for n in creadas))
+
+    def test_vencimiento_de_membresia(self):
+        template = self.plantilla('membership_expiry', 'memberships')
+        pago = Pago.objects.create(socio=self.socio, monto=10, metodo='efectivo')
+        # Vence dentro de 6,5 días: entra en la ventana (since + 7 d, now + 7 d]
+        Pago.objects.filter(pk=pago.pk).update(
+            fecha_pago=self.now - timedelta(days=DIAS_POR_MES) + timedelta(days=6, hours=12)
+        )
+        creadas = run_template(template, self.now)
+        self.assertEqual([(n.user_id, n.socio_id) for n in creadas], [(self.miembro.pk, self.socio.pk)])
+        self.assertEqual(run_template(template, self.now + timedelta(hours=1)), [])
+
+    def test_mantenimiento_de_equipos(self):
+        template = self.plantilla('equipment_maintenance', 'equipment')
+        hoy = timezone.localdate(self.now)
+        vencido = Equipo.objects.create(nombre='Cinta', descripcion='', estado='disponible',
+                                        fecha_adquisicion=hoy - timedelta(days=400),
+                                        ultima_mantenimiento=hoy - MAINTENANCE_INTERVAL)
+        Equipo.objects.create(nombre='Bici', descripcion='', estado='disponible',
+                              fecha_adquisicion=hoy - timedelta(days=400),
+                              ultima_mantenimiento=hoy - MAINTENANCE_INTERVAL + timedelta(days=1))
+        creadas = run_template(template, self.now)
+        self.assertEqual([n.reference_id.split(':')[2] for n in creadas], [str(vencido.pk)])
+        self.assertEqual(creadas[0].user_id, self.staff.pk)
+
+    def socio_con_usuario(self, nombre, membresia=None):
+        usuario = crear_usuario(f'{nombre.lower()}-triggers@gimnasio.test')
+        return Socio.objects.create(nombre=nombre, telefono='0', correo=f'{nombre.lower()}@gimnasio.test',
+                                    membresia=membresia or self.membresia, user=usuario)
+
+    def pagar(self, socio, hace):
+        pago = Pago.objects.create(socio=socio, monto=10, metodo='efectivo')
+        Pago.objects.filter(pk=pago.pk).update(fecha_pago=self.now - hace)
+
+    def visitar(self, socio, hace):
+        asistencia = Asistencia.objects.create(socio=socio, fecha_salida=self.now)
+        Asistencia.objects.filter(pk=asistencia.pk).update(fecha_entrada=self.now - hace)
+
+    def test_pago_pendiente_con_varias_duraciones(self):
+        template = self.plantilla('payment_due', 'payments')
+        anual = Membresia.objects.create(tipo='Anual', descripcion='', precio_mensual=8, duracion_meses=12)
+        beto, carla = self.socio_con_usuario('Beto', anual), self.socio_con_usuario('Carla', anual)
+        # Vencen en la ventana de la primera ejecución (now - 1 d, now]
+        self.pagar(self.socio, timedelta(days=DIAS_POR_MES, hours=3))
+        self.pagar(beto, timedelta(days=12 * DIAS_POR_MES, hours=2))
+        # Carla pagó de nuevo: su pago en la ventana no es el último
+        self.pagar(carla, timedelta(days=12 * DIAS_POR_MES, hours=2))
+        self.pagar(carla, timedelta(days=1))
+
+        creadas = run_template(template, self.now)
+        self.assertEqual(sorted(n.socio_id for n in creadas), [self.socio.pk, beto.pk])
+
+    def test_baja_asistencia(self):
+        template = self.plantilla('low_attendance', 'classes')
+        beto, carla = self.socio_con_usuario('Beto'), self.socio_con_usuario('Carla')
+        self.visitar(self.socio, LOW_ATTENDANCE_DAYS + timedelta(hours=2))
+        # Beto volvió después; Carla no viene desde mucho antes de la ventana
+        self.visitar(beto, LOW_ATTENDANCE_DAYS + timedelta(hours=2))
+        self.visitar(beto, timedelta(days=3))
+        self.visitar(carla, LOW_ATTENDANCE_DAYS * 3)
+
+        creadas = run_template(template, self.now)
+        self.assertEqual([n.socio_id for n in creadas], [self.socio.pk])
+
+    def test_candidatos_acotados_por_la_ventana(self):
+        template = self.plantilla('low_attendance', 'classes')
+        with CaptureQueriesContext(connection) as consultas:
+            list(low_attendance(template, self.now - timedelta(hours=1), self.now))
+        # El MAX de visitas solo se calcula para socios con una visita en la ventana
+        self.assertEqual(len(consultas), 1)
+        self.assertRegex(consultas[0]['sql'], r'IN \(SELECT [^)]* FROM "core_asistencia" \w+ WHERE \(\w+\."fecha_entrada" >')
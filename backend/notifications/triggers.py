@@ -0,0 +1,296 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.core.models import DIAS_POR_MES, Asistencia, Equipo, Membresia, Pago, Socio, SocioClase
+
+from .models import Notification, NotificationTemplate, TriggerWatermark
+from .services import accepts_notifications, create_notifications
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+EXPIRY_LEAD = timedelta(days=getattr(settings, 'NOTIFICATIONS_EXPIRY_LEAD_DAYS', 7))
+CLASS_REMINDER_LEAD = timedelta(hours=getattr(settings, 'NOTIFICATIONS_CLASS_REMINDER_HOURS', 24))
+LOW_ATTENDANCE_DAYS = timedelta(days=getattr(settings, 'NOTIFICATIONS_LOW_ATTENDANCE_DAYS', 14))
+MAINTENANCE_INTERVAL = timedelta(days=getattr(settings, 'NOTIFICATIONS_MAINTENANCE_INTERVAL_DAYS', 90))
+# Ventana de la primera ejecución de una plantilla sin marca de agua
+FIRST_RUN_LOOKBACK = timedelta(days=1)
+
+# Destinatarios: None en `user_id` significa "todo el personal"
+STAFF = None
+
+
+def _fecha(value):
+    return timezone.localtime(value).strftime('%d/%m/%Y') if value else ''
+
+
+def _hora(value):
+    return timezone.localtime(value).strftime('%d/%m/%Y %H:%M') if value else ''
+
+
+# Cada disparador recibe la plantilla y la ventana (since, now] y devuelve
+# eventos con `key`, `user_id`, `socio_id` y el contexto de la plantilla.
+# La ventana se aplica sobre el momento en que vence el evento, así cada
+# ejecución solo evalúa lo que ocurrió desde la anterior. Los que agregan
+# (último pago, última visita) acotan antes los socios candidatos con las
+# filas de la ventana, para no agregar sobre toda la tabla en cada ejecución.
+
+
+def _pagos_que_vencen(desde, hasta):
+    """
+    Socios con un pago cuyo vencimiento (pago + meses de su membresía) cae en
+    (desde, hasta]. Todo socio con `vigente_hasta` en la ventana tiene uno: su
+    último pago.
+    """
+    ventanas = Q(pk__in=[])
+    for meses in Membresia.objects.values_list('duracion_meses', flat=True).distinct():
+        duracion = timedelta(days=meses * DIAS_POR_MES)
+        ventanas |= Q(
+            socio__membresia__duracion_meses=meses,
+            fecha_pago__gt=desde - duracion, fecha_pago__lte=hasta - duracion,
+        )
+    return Pago.objects.filter(ventanas).values('socio_id')
+
+def membership_expiry(template, since, now):
+    """Membresías que vencen dentro de EXPIRY_LEAD"""
+    rows = (
+        Socio.objects.filter(pk__in=_pagos_que_vencen(since + EXPIRY_LEAD, now + EXPIRY_LEAD))
+        .con_vigencia()
+        .filter(user__isnull=False)
+        .filter(accepts_notifications(template.category, template.priority, relation='user__notification_settings'))
+        .filter(vigente_hasta__gt=since + EXPIRY_LEAD, vigente_hasta__lte=now + EXPIRY_LEAD)
+        .values('socio_id', 'user_id', 'nombre', 'vigente_hasta', membresia_tipo=F('membresia__tipo'))
+    )
+    for row in rows:
+        yield {
+            'key': f"{row['socio_id']}:{row['vigente_hasta']:%Y%m%d}",
+            'user_id': row['user_id'],
+            'socio_id': row['socio_id'],
+            'nombre': row['nombre'],
+            'membresia': row['membresia_tipo'],
+            'fecha_vencimiento': _fecha(row['vigente_hasta']),
+            'dias': EXPIRY_LEAD.days,
+        }
+
+
+def payment_due(template, since, now):
+    """Membresías que vencieron sin un pago posterior"""
+    rows = (
+        Socio.objects.filter(pk__in=_pagos_que_vencen(since, now))
+        .con_vigencia()
+        .filter(user__isnull=False)
+        .filter(accepts_notifications(template.category, template.priority, relation='user__notification_settings'))
+        .filter(vigente_hasta__gt=since, vigente_hasta__lte=now)
+        .values('socio_id', 'user_id', 'nombre', 'vigente_hasta', membresia_tipo=F('membresia__tipo'),
+                precio=F('membresia__precio_mensual'))
+    )
+    for row in rows:
+        yield {
+            'key': f"{row['socio_id']}:{row['vigente_hasta']:%Y%m%d}",
+            'user_id': row['user_id'],
+            'socio_id': row['socio_id'],
+            'nombre': row['nombre'],
+            'membresia': row['membresia_tipo'],
+            'monto': row['precio'],
+            'fecha_vencimiento': _fecha(row['vigente_hasta']),
+        }
+
+
+def class_reminder(template, since, now):
+    """Inscripciones a clases que empiezan dentro de CLASS_REMINDER_LEAD"""
+    rows = (
+        SocioClase.objects
+        .filter(socio__user__isnull=False)
+        .filter(accepts_notifications(
+            template.category, template.priority, relation='socio__user__notification_settings'
+        ))
+        .filter(clase__horario__gt=since + CLASS_REMINDER_LEAD, clase__horario__lte=now + CLASS_REMINDER_LEAD)
+        .values('id', 'socio_id', user_id=F('socio__user_id'), nombre=F('socio__nombre'),
+                clase_nombre=F('clase__nombre'), horario=F('clase__horario'))
+    )
+    for row in rows:
+        yield {
+            'key': str(row['id']),
+            'user_id': row['user_id'],
+            'socio_id': row['socio_id'],
+            'nombre': row['nombre'],
+            'clase': row['clase_nombre'],
+            'horario': _hora(row['horario']),
+        }
+
+
+def low_attendance(template, since, now):
+    """Socios cuya última visita cumplió LOW_ATTENDANCE_DAYS en la ventana"""
+    desde, hasta = since - LOW_ATTENDANCE_DAYS, now - LOW_ATTENDANCE_DAYS
+    # Solo puede cumplirlo quien tiene una visita en la ventana desplazada
+    candidatos = Asistencia.objects.filter(fecha_entrada__gt=desde, fecha_entrada__lte=hasta).values('socio_id')
+    rows = (
+        Socio.objects.filter(pk__in=candidatos)
+        .filter(user__isnull=False)
+        .filter(accepts_notifications(template.category, template.priority, relation='user__notification_settings'))
+        .annotate(ultima_asistencia=Max('asistencia__fecha_entrada'))
+        .filter(ultima_asistencia__gt=desde, ultima_asistencia__lte=hasta)
+        .values('socio_id', 'user_id', 'nombre', 'ultima_asistencia')
+    )
+    for row in rows:
+        yield {
+            'key': f"{row['socio_id']}:{row['ultima_asistencia']:%Y%m%d}",
+            'user_id': row['user_id'],
+            'socio_id': row['socio_id'],
+            'nombre': row['nombre'],
+            'ultima_asistencia': _fecha(row['ultima_asistencia']),
+            'dias': LOW_ATTENDANCE_DAYS.days,
+        }
+
+
+def equipment_maintenance(template, since, now):
+    """Equipos que cumplen MAINTENANCE_INTERVAL desde su último mantenimiento"""
+    desde = timezone.localdate(since) - MAINTENANCE_INTERVAL
+    hasta = timezone.localdate(now) - MAINTENANCE_INTERVAL
+    rows = (
+        Equipo.objects.exclude(estado='baja')
+        .annotate(referencia=Coalesce('ultima_mantenimiento', 'fecha_adquisicion'))
+        .filter(referencia__gt=desde, referencia__lte=hasta)
+        .values('equipo_id', 'nombre', 'estado', 'referencia')
+    )
+    for row in rows:
+        yield {
+            'key': f"{row['equipo_id']}:{row['referencia']:%Y%m%d}",
+            'user_id': STAFF,
+            'socio_id': None,
+            'equipo': row['nombre'],
+            'estado': row['estado'],
+            'ultima_mantenimiento': row['referencia'].strftime('%d/%m/%Y'),
+        }
+
+
+def new_member(template, since, now):
+    """Socios registrados en la ventana"""
+    rows = (
+        Socio.objects.filter(fecha_registro__gt=since, fecha_registro__lte=now)
+        .values('socio_id', 'nombre', 'fecha_registro', membresia_tipo=F('membresia__tipo'))
+    )
+    for row in rows:
+        yield {
+            'key': str(row['socio_id']),
+            'user_id': STAFF,
+            'socio_id': row['socio_id'],
+            'nombre': row['nombre'],
+            'membresia': row['membresia_tipo'],
+            'fecha_registro': _fecha(row['fecha_registro']),
+        }
+
+
+TRIGGERS = {
+    'membership_expiry': membership_expiry,
+    'payment_due': payment_due,
+    'class_reminder': class_reminder,
+    'equipment_maintenance': equipment_maintenance,
+    'low_attendance': low_attendance,
+    'new_member': new_member,
+}
+
+
+class TemplateContext(dict):
+    """Deja intactas las variables que el evento no define"""
+
+    def __missing__(self, key):
+        return '{' + key + '}'
+
+
+def render(text, context):
+    try:
+        return text.format_map(TemplateContext(context))
+    except (ValueError, IndexError, AttributeError, TypeError):
+        return text
+
+
+def staff_recipients(template):
+    return list(
+        User.objects.filter(is_staff=True, is_active=True)
+        .filter(accepts_notifications(template.category, template.priority))
+        .values_list('id', flat=True)
+    )
+
+
+def build_notifications(template, events):
+    """Expande los eventos a notificaciones, descartando las que ya se crearon"""
+    staff = None
+    pending = []
+    for event in events:
+        reference_id = f'{template.trigger_type}:{template.template_id}:{event["key"]}'
+        if event['user_id'] is STAFF:
+            if staff is None:
+                staff = staff_recipients(template)
+            user_ids = staff
+        else:
+            user_ids = [event['user_id']]
+        pending.extend((user_id, reference_id, event) for user_id in user_ids)
+
+    if not pending:
+        return []
+
+    existing = set(
+        Notification.objects.filter(reference_id__in={reference_id for _, reference_id, _ in pending})
+        .order_by()
+        .values_list('user_id', 'reference_id')
+    )
+    return [
+        Notification(
+            user_id=user_id,
+            socio_id=event['socio_id'],
+            reference_id=reference_id,
+            title=render(template.title_template, event)[:200],
+            message=render(template.message_template, event),
+            notification_type=template.notification_type,
+            category=template.category,
+            priority=template.priority,
+        )
+        for user_id, reference_id, event in pending
+        if (user_id, reference_id) not in existing
+    ]
+
+
+def run_template(template, now=None):
+    """
+    Evalúa una plantilla sobre la ventana desde su marca de agua hasta `now`
+    y crea sus notificaciones. La marca avanza en la misma transacción.
+    """
+    now = now or timezone.now()
+    trigger = TRIGGERS[template.trigger_type]
+
+    with transaction.atomic():
+        watermark = TriggerWatermark.objects.select_for_update().filter(template=template).first()
+        since = watermark.last_run_at if watermark else now - FIRST_RUN_LOOKBACK
+        if since >= now:
+            return []
+
+        notifications = create_notifications(build_notifications(template, trigger(template, since, now)))
+
+        if watermark:
+            watermark.last_run_at = now
+            watermark.save(update_fields=['last_run_at'])
+        else:
+            TriggerWatermark.objects.create(template=template, last_run_at=now)
+    return notifications
+
+
+def run_triggers(now=None, trigger_types=None):
+    """Evalúa todas las plantillas activas; devuelve las notificaciones creadas por plantilla"""
+    now = now or timezone.now()
+    templates = NotificationTemplate.objects.filter(is_active=True, trigger_type__in=trigger_types or TRIGGERS)
+    results = {}
+    for template in templates:
+        try:
+            results[template] = run_template(template, now)
+        except Exception:
+            logger.exception('Error evaluando la plantilla %s', template.template_id)
+    return results
@@ -6,6 +6,7 @@ from .views import (
     NotificationTemplateViewSet,
     NotificationLogViewSet
 )
+from .streams import notification_stream
 
 router = DefaultRouter()
 router.register(r'notifications', NotificationViewSet, basename='notification')
@@ -14,5 +15,6 @@ router.register(r'templates', NotificationTemplateViewSet, basename='notificatio
 router.register(r'logs', NotificationLogViewSet, basename='notification-log')
 
 urlpatterns = [
+    path('api/notifications/stream/', notification_stream, name='notification-stream'),
     path('api/', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,20 +1,29 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
 from django.db.models import Q, Count
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
+from apps.core.mixins import QueryPlannerMixin
+
 from .models import Notification, NotificationSettings, NotificationTemplate, NotificationLog
 from .serializers import (
     NotificationSerializer, NotificationCreateSerializer, NotificationUpdateSerializer,
     NotificationSettingsSerializer, NotificationTemplateSerializer, NotificationLogSerializer,
     NotificationStatsSerializer, BulkNotificationSerializer
 )
+from .counters import adjust_unread_count, get_cached_stats, get_unread_count, invalidate_stats
+from .jobs import get_job, job_status, submit_job
+from .services import create_bulk_notifications, publish_created
+from .streams import TICKET_MAX_AGE, create_stream_ticket
 
 User = get_user_model()
 
-class NotificationViewSet(viewsets.ModelViewSet):
+BULK_SYNC_LIMIT = getattr(settings, 'NOTIFICATIONS_BULK_SYNC_LIMIT', 1000)
+
+class NotificationViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_serializer_class(self):
@@ -43,13 +52,56 @@ class NotificationViewSet(viewsets.ModelViewSet):
         return queryset.select_related('socio')
     
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        notification = serializer.save(user=self.request.user)
+        if not notification.read:
+            adjust_unread_count(notification.user_id, 1)
+        invalidate_stats([notification.user_id])
+        publish_created([notification])
+    
+    def perform_update(self, serializer):
+        notification = serializer.instance
+        data = serializer.validated_data
+        if 'read' in data:
+            self.set_read(notification, data['read'])
+        if 'read_at' in data:
+            notification.read_at = data['read_at']
+            notification.save(update_fields=['read_at'])
+    
+    def set_read(self, notification, read):
+        """
+        Cambia el estado con un UPDATE condicional: de dos peticiones
+        concurrentes solo la que cambia la fila ajusta el contador.
+        """
+        changes = {'read': read}
+        if read:
+            changes['read_at'] = timezone.now()
+        changed = Notification.objects.filter(pk=notification.pk, read=not read).update(**changes)
+        if changed:
+            for field, value in changes.items():
+                setattr(notification, field, value)
+            adjust_unread_count(notification.user_id, -changed if read else changed)
+            invalidate_stats([notification.user_id])
+        else:
+            notification.refresh_from_db(fields=['read', 'read_at'])
+    
+    def perform_destroy(self, instance):
+        # Igual que en set_read, solo el borrado que encuentra la fila sin leer descuenta
+        _, unread = Notification.objects.filter(pk=instance.pk, read=False).delete()
+        if unread.get(Notification._meta.label):
+            adjust_unread_count(instance.user_id, -1)
+        else:
+            instance.delete()
+        invalidate_stats([instance.user_id])
     
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
         """Obtener el número de notificaciones no leídas"""
-        count = self.get_queryset().filter(read=False).count()
-        return Response({'unread_count': count})
+        return Response({'unread_count': get_unread_count(request.user.id)})
+    
+    @action(detail=False, methods=['post'])
+    def stream_ticket(self, request):
+        """Ticket de corta duración para abrir el stream de notificaciones (SSE)"""
+        return Response({'ticket': create_stream_ticket(request.user), 'expires_in': TICKET_MAX_AGE})
     
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
@@ -58,16 +110,15 @@ class NotificationViewSet(viewsets.ModelViewSet):
             read=True,
             read_at=timezone.now()
         )
+        adjust_unread_count(request.user.id, -updated)
+        invalidate_stats([request.user.id])
         return Response({'marked_read': updated})
     
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         """Marcar una notificación específica como leída"""
         notification = self.get_object()
-        if not notification.read:
-            notification.read = True
-            notification.read_at = timezone.now()
-            notification.save()
+        self.set_read(notification, True)
         
         serializer = self.get_serializer(notification)
         return Response(serializer.data)
@@ -77,33 +128,44 @@ class NotificationViewSet(viewsets.ModelViewSet):
         """Obtener estadísticas de notificaciones"""
         queryset = self.get_queryset()
         
-        total = queryset.count()
-        unread = queryset.filter(read=False).count()
-        
-        # Estadísticas por categoría
-        by_category = queryset.values('category').annotate(
-            count=Count('notification_id')
-        ).order_by('-count')
-        
-        # Estadísticas por prioridad
-        by_priority = queryset.values('priority').annotate(
-            count=Count('notification_id')
-        ).order_by('-count')
+        # Sin filtros los conteos se sirven desde la caché del usuario
+        filtered = any(request.query_params.get(param) for param in ('category', 'priority', 'read'))
+        if filtered:
+            counts = self.compute_stats(queryset)
+        else:
+            counts = get_cached_stats(request.user.id, lambda: self.compute_stats(queryset))
         
         # Notificaciones recientes (últimas 5)
-        recent = queryset.order_by('-created_at')[:5]
-        
-        stats_data = {
-            'total_notifications': total,
-            'unread_notifications': unread,
-            'notifications_by_category': {item['category']: item['count'] for item in by_category},
-            'notifications_by_priority': {item['priority']: item['count'] for item in by_priority},
-            'recent_notifications': NotificationSerializer(recent, many=True).data
-        }
+        recent = queryset.select_related('socio__membresia').order_by('-created_at')[:5]
         
+        stats_data = dict(counts, recent_notifications=recent)
         serializer = NotificationStatsSerializer(stats_data)
         return Response(serializer.data)
     
+    def compute_stats(self, queryset):
+        """Todos los conteos en una sola consulta con agregación condicional"""
+        aggregates = {
+            'total': Count('notification_id'),
+            'unread': Count('notification_id', filter=Q(read=False)),
+        }
+        for category, _ in Notification.CATEGORIES:
+            aggregates[f'category_{category}'] = Count('notification_id', filter=Q(category=category))
+        for priority, _ in Notification.PRIORITIES:
+            aggregates[f'priority_{priority}'] = Count('notification_id', filter=Q(priority=priority))
+        
+        result = queryset.order_by().aggregate(**aggregates)
+        
+        def by_count(prefix, choices):
+            counts = [(value, result[f'{prefix}_{value}']) for value, _ in choices]
+            return {value: count for value, count in sorted(counts, key=lambda item: -item[1]) if count}
+        
+        return {
+            'total_notifications': result['total'],
+            'unread_notifications': result['unread'],
+            'notifications_by_category': by_count('category', Notification.CATEGORIES),
+            'notifications_by_priority': by_count('priority', Notification.PRIORITIES),
+        }
+    
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
         """Crear notificaciones en lote"""
@@ -114,30 +176,33 @@ class NotificationViewSet(viewsets.ModelViewSet):
             send_email = data.pop('send_email', False)
             send_push = data.pop('send_push', False)
             
-            # Crear notificaciones para cada usuario
-            notifications = []
-            for user_id in user_ids:
-                try:
-                    user = User.objects.get(id=user_id)
-                    notification = Notification.objects.create(user=user, **data)
-                    notifications.append(notification)
-                except User.DoesNotExist:
-                    continue
+            # Las audiencias grandes se procesan en segundo plano
+            if len(user_ids) > BULK_SYNC_LIMIT:
+                job = submit_job(request.user, user_ids, send_email, send_push, data)
+                return Response(job_status(job), status=status.HTTP_202_ACCEPTED)
             
-            # Aquí se podría implementar el envío de emails/push notifications
-            # if send_email:
-            #     send_email_notifications(notifications)
-            # if send_push:
-            #     send_push_notifications(notifications)
+            # Los emails/push se encolan y los entrega el worker deliver_notifications
+            notifications = create_bulk_notifications(
+                user_ids, send_email=send_email, send_push=send_push, **data
+            )
             
             return Response({
                 'created': len(notifications),
+                'skipped': len(set(user_ids)) - len(notifications),
                 'notifications': NotificationSerializer(notifications, many=True).data
             })
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['get'], url_path=r'bulk_jobs/(?P<job_id>[0-9a-f]{32})')
+    def bulk_job(self, request, job_id=None):
+        """Consultar el estado de un envío masivo en segundo plano"""
+        job = get_job(job_id, request.user)
+        if job is None:
+            return Response({'detail': 'Trabajo no encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job)
 
-class NotificationSettingsViewSet(viewsets.ModelViewSet):
+class NotificationSettingsViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     serializer_class = NotificationSettingsSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -168,7 +233,7 @@ class NotificationSettingsViewSet(viewsets.ModelViewSet):
                 return Response(serializer.data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class NotificationTemplateViewSet(viewsets.ModelViewSet):
+class NotificationTemplateViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     queryset = NotificationTemplate.objects.all()
     serializer_class = NotificationTemplateSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -197,7 +262,7 @@ class NotificationTemplateViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(template)
         return Response(serializer.data)
 
-class NotificationLogViewSet(viewsets.ReadOnlyModelViewSet):
+class NotificationLogViewSet(QueryPlannerMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = NotificationLogSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -8,6 +8,8 @@ from decimal import Decimal
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gimnasio.settings')
 django.setup()
 
+from django.db import transaction
+
 from apps.core.models import (
     Membresia, Entrenador, Clase, Socio, Pago, Asistencia, 
     SocioClase, Equipo
@@ -274,8 +276,8 @@ def create_attendance():
             duracion_minutos = random.randint(45, 180)
             fecha_salida = fecha_entrada + timedelta(minutes=duracion_minutos)
             
-            # 90% de probabilidad de tener fecha de salida
-            if random.random() < 0.9:
+            # Solo las visitas de hoy pueden seguir abiertas (una por socio), con un 10% de probabilidad
+            if i > 0 or random.random() < 0.9:
                 Asistencia.objects.create(
                     socio=socio,
                     fecha_entrada=fecha_entrada,
@@ -306,17 +308,16 @@ def create_class_enrollments():
         clases_socio = random.sample(clases, min(num_clases, len(clases)))
         
         for clase in clases_socio:
-            # Verificar que no exceda la capacidad
-            inscripciones_actuales = SocioClase.objects.filter(clase=clase).count()
-            
-            if inscripciones_actuales < clase.capacidad_max:
-                SocioClase.objects.get_or_create(
-                    socio=socio,
-                    clase=clase,
-                    defaults={
-                        'fecha_inscripcion': datetime.now() - timedelta(days=random.randint(1, 7))
-                    }
-                )
+            if SocioClase.objects.filter(socio=socio, clase=clase).exists():
+                continue
+            # El cupo se reserva con el contador de la clase, igual que en la API
+            with transaction.atomic():
+                if Clase.objects.reservar_cupo(clase.pk):
+                    SocioClase.objects.create(
+                        socio=socio,
+                        clase=clase,
+                        fecha_inscripcion=datetime.now() - timedelta(days=random.randint(1, 7))
+                    )
     
     print(f"✓ Creadas inscripciones a clases")
 
@@ -46,6 +46,28 @@ export const NotificationProvider = ({ children }) => {
     loadUnreadCount();
   }, []);
 
+  // Recibir notificaciones nuevas y el contador de no leídas en tiempo real
+  useEffect(() => {
+    const unsubscribe = notificationService.subscribe({
+      onUnreadCount: setUnreadCount,
+      onNotification: (notification) => {
+        setNotifications(prev => [{
+          id: notification.notification_id,
+          type: notification.notification_type,
+          title: notification.title,
+          message: notification.message,
+          timestamp: new Date(notification.created_at),
+          read: notification.read,
+          category: notification.category,
+          priority: notification.priority,
+          socio: notification.socio,
+          reference_id: notification.reference_id,
+        }, ...prev]);
+      },
+    });
+    return unsubscribe;
+  }, []);
+
   // Cargar notificaciones desde la API
   const loadNotifications = async (params = {}) => {
     try {
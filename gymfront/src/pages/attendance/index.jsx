@@ -25,7 +25,7 @@ import {
 } from "@heroicons/react/24/outline";
 import attendanceService from "../../services/attendanceService";
 import classService from "../../services/classService";
-import api from "../../services/api";
+import { getAllPages } from "../../services/api";
 import { useAuth } from "../../contexts/AuthContext";
 import { useNotification } from "../../contexts/NotificationContext";
 
@@ -148,6 +148,8 @@ const AttendancePage = () => {
   };
 
   const loadStats = async () => {
+    // Las estadísticas de todo el gimnasio solo están disponibles para el personal
+    if (!user?.is_staff) return;
     try {
       const statsData = await attendanceService.getAttendanceStats(filters.date);
       setStats(statsData);
@@ -157,6 +159,7 @@ const AttendancePage = () => {
   };
 
   const loadChartData = async () => {
+    if (!user?.is_staff) return;
     try {
       // Cargar datos por horas
       const hourlyResponse = await attendanceService.getHourlyData(filters.date);
@@ -259,8 +262,7 @@ const AttendancePage = () => {
   // Cargar miembros desde la API
   const loadMembers = async () => {
     try {
-      const response = await api.get('/socios/');
-      const socios = response.data.results || response.data;
+      const socios = await getAllPages('/socios/');
       
       // Formatear datos para el selector
       const formattedMembers = socios.map(socio => ({
@@ -1,5 +1,7 @@
 import apiClient, { createBaseService } from './apiClient.js';
 
+export { getAllPages } from './apiClient.js';
+
 // Crear servicios base para cada entidad
 const sociosService = createBaseService('socios');
 const membresiasService = createBaseService('membresias');
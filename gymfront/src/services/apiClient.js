@@ -1,7 +1,7 @@
 import axios from 'axios';
 
 // Configuración base de la API
-const API_BASE_URL = 'http://localhost:8000/api/v1';
+export const API_BASE_URL = 'http://localhost:8000/api/v1';
 
 // Crear instancia de axios con configuración base
 const apiClient = axios.create({
@@ -67,6 +67,28 @@ apiClient.interceptors.response.use(
   }
 );
 
+// Tamaño de página máximo que acepta el backend (KeysetPagination.max_page_size)
+const MAX_PAGE_SIZE = 200;
+
+// Obtener todas las filas de un listado paginado por cursor siguiendo `next`;
+// si la respuesta no está paginada se devuelve tal cual
+export const getAllPages = async (url, config = {}) => {
+  let { data } = await apiClient.get(url, {
+    ...config,
+    params: { page_size: MAX_PAGE_SIZE, ...config.params },
+  });
+  if (!data || !Array.isArray(data.results)) {
+    return data;
+  }
+  const results = [...data.results];
+  while (data.next) {
+    // `next` es una URL absoluta que ya lleva los filtros, el tamaño y el cursor
+    ({ data } = await apiClient.get(data.next));
+    results.push(...data.results);
+  }
+  return results;
+};
+
 // Función para crear un servicio base con operaciones CRUD
 export const createBaseService = (endpoint) => {
   return {
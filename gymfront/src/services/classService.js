@@ -1,11 +1,10 @@
-import api from "./api.js";
+import api, { getAllPages } from "./api.js";
 
 class ClassService {
   // Obtener todas las clases
   async getClasses(params = {}) {
     try {
-      const response = await api.get("/clases/", { params });
-      return response.data;
+      return await getAllPages("/clases/", { params });
     } catch (error) {
       console.error("Error fetching classes:", error);
       throw error;
@@ -59,10 +58,9 @@ class ClassService {
   // Obtener clases por fecha
   async getClassesByDate(date) {
     try {
-      const response = await api.get("/clases/", {
+      return await getAllPages("/clases/", {
         params: { fecha: date },
       });
-      return response.data;
     } catch (error) {
       console.error("Error fetching classes by date:", error);
       throw error;
@@ -72,10 +70,9 @@ class ClassService {
   // Obtener clases por entrenador
   async getClassesByTrainer(trainerId) {
     try {
-      const response = await api.get("/clases/", {
+      return await getAllPages("/clases/", {
         params: { entrenador: trainerId },
       });
-      return response.data;
     } catch (error) {
       console.error("Error fetching classes by trainer:", error);
       throw error;
@@ -124,10 +121,9 @@ class ClassService {
   // Obtener inscripciones de una clase
   async getClassEnrollments(classId) {
     try {
-      const response = await api.get("/socio-clases/", {
+      return await getAllPages("/socio-clases/", {
         params: { clase: classId },
       });
-      return response.data;
     } catch (error) {
       console.error("Error fetching class enrollments:", error);
       throw error;
@@ -164,10 +160,9 @@ class ClassService {
   // Obtener asistencias de una clase
   async getClassAttendance(classId) {
     try {
-      const response = await api.get("/asistencias/", {
+      return await getAllPages("/asistencias/", {
         params: { clase: classId },
       });
-      return response.data;
     } catch (error) {
       console.error("Error fetching class attendance:", error);
       throw error;
@@ -313,8 +308,7 @@ class ClassService {
         horario__lte: endDate,
         ordering: "horario",
       };
-      const response = await api.get("/clases/", { params });
-      return response.data;
+      return await getAllPages("/clases/", { params });
     } catch (error) {
       console.error("Error fetching classes by date range:", error);
       throw error;
@@ -341,8 +335,7 @@ class ClassService {
         horario__lt: endOfDay.toISOString(),
         ordering: "horario",
       };
-      const response = await api.get("/clases/", { params });
-      return response.data;
+      return await getAllPages("/clases/", { params });
     } catch (error) {
       console.error("Error fetching today classes:", error);
       throw error;
@@ -405,7 +398,7 @@ class ClassService {
     let reservations = 0;
     try {
       const enrollments = await this.getClassEnrollments(classData.clase_id);
-      reservations = (enrollments.results || enrollments).length;
+      reservations = enrollments.length;
     } catch (error) {
       console.error("Error getting enrollments:", error);
     }
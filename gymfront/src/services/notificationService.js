@@ -1,4 +1,7 @@
 import api from './api.js';
+import { API_BASE_URL } from './apiClient.js';
+
+const STREAM_RETRY_MS = 5000;
 
 class NotificationService {
   // Obtener todas las notificaciones del usuario
@@ -155,6 +158,49 @@ class NotificationService {
     }
   }
 
+  // Suscribirse a las notificaciones en tiempo real (Server-Sent Events)
+  // El stream se abre con un ticket de corta duración para no poner el JWT en la URL
+  subscribe({ onNotification, onUnreadCount }) {
+    let source = null;
+    let closed = false;
+    
+    const connect = async () => {
+      const response = await api.post('/api/notifications/stream_ticket/');
+      if (closed) return;
+      
+      const ticket = encodeURIComponent(response.data.ticket);
+      source = new EventSource(`${API_BASE_URL}/api/notifications/stream/?ticket=${ticket}`);
+      
+      source.addEventListener('unread_count', (event) => {
+        onUnreadCount?.(JSON.parse(event.data).unread_count);
+      });
+      source.addEventListener('notification', (event) => {
+        const data = JSON.parse(event.data);
+        onNotification?.(data.notification);
+        onUnreadCount?.(data.unread_count);
+      });
+      // Si la reconexión automática falla (ticket caducado) se pide uno nuevo
+      source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED && !closed) {
+          setTimeout(reconnect, STREAM_RETRY_MS);
+        }
+      };
+    };
+    
+    const reconnect = () => {
+      connect().catch((error) => {
+        console.error('Error opening notification stream:', error);
+        if (!closed) setTimeout(reconnect, STREAM_RETRY_MS);
+      });
+    };
+    
+    reconnect();
+    return () => {
+      closed = true;
+      source?.close();
+    };
+  }
+
   // Obtener estadísticas de entrega
   async getDeliveryStats() {
     try {
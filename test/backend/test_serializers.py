@@ -233,9 +233,11 @@ class AsistenciaSerializerTest(TestCase):
             'fecha_entrada': '2024-01-15T08:00:00Z'
         }
         
+        # Visita ya cerrada: un socio solo puede tener una visita abierta
         self.asistencia = Asistencia.objects.create(
             socio=self.socio,
-            fecha_entrada=datetime(2024, 1, 15, 9, 0, 0)
+            fecha_entrada=datetime(2024, 1, 15, 9, 0, 0),
+            fecha_salida=datetime(2024, 1, 15, 10, 0, 0)
         )
     
     def test_asistencia_serializer_valid_data(self):
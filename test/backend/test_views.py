@@ -131,7 +131,7 @@ class SocioAPITestCase(APITestCase):
         url = '/api/v1/socios/'
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(response.data), 1)
+        self.assertGreaterEqual(len(response.data['results']), 1)
 
 
 class EntrenadorAPITestCase(APITestCase):
@@ -168,7 +168,7 @@ class EntrenadorAPITestCase(APITestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(response.data), 1)
+        self.assertGreaterEqual(len(response.data['results']), 1)
     
     def test_create_entrenador(self):
         """Test para crear un nuevo entrenador"""
@@ -243,7 +243,7 @@ class ClaseAPITestCase(APITestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(response.data), 1)
+        self.assertGreaterEqual(len(response.data['results']), 1)
     
     def test_create_clase(self):
         """Test para crear una nueva clase"""
@@ -312,7 +312,7 @@ class EquipoAPITestCase(APITestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(response.data), 1)
+        self.assertGreaterEqual(len(response.data['results']), 1)
     
     def test_create_equipo(self):
         """Test para crear un nuevo equipo"""
@@ -395,7 +395,7 @@ class PagoAPITestCase(APITestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(response.data), 1)
+        self.assertGreaterEqual(len(response.data['results']), 1)
     
     def test_create_pago(self):
         """Test para crear un nuevo pago"""
@@ -416,7 +416,7 @@ class PagoAPITestCase(APITestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        for pago in response.data:
+        for pago in response.data['results']:
             self.assertEqual(pago['socio'], self.socio.socio_id)
     
     def test_pago_validation(self):
@@ -526,7 +526,7 @@ class MembresiaAPITestCase(APITestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(response.data), 1)
+        self.assertGreaterEqual(len(response.data['results']), 1)
     
     def test_create_membresia(self):
         """Test para crear una nueva membresía"""
@@ -593,7 +593,8 @@ class AsistenciaAPITestCase(APITestCase):
             nombre='Pedro Asistente',
             telefono='555-7777',
             correo='pedro@test.com',
-            membresia=self.membresia
+            membresia=self.membresia,
+            user=self.user
         )
     
     def test_create_asistencia(self):
@@ -620,4 +621,4 @@ class AsistenciaAPITestCase(APITestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(response.data), 1)
\ No newline at end of file
+        self.assertGreaterEqual(len(response.data['results']), 1)
\ No newline at end of file